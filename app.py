@@ -9,6 +9,9 @@ import json
 import tempfile
 import time
 from enhanced_detector import RedLightViolationDetector
+from frame_store import open_frame_store
+from upload_storage import (STATIC_DIR, UPLOAD_DIR, cleanup_stale_files, download_link, replace_session_file,
+                            servable_inline, session_upload, too_large_notice, write_json_file)
 from PIL import Image
 def tensor_to_list(obj):
     try:
@@ -143,6 +146,30 @@ def process_frame_with_detections(frame, detector, frame_number):
         st.error(f"Error processing frame: {e}")
         return frame, 0
 
+def _iter_sampled_frames(video_path, frame_skip, resolution, frame_store=None):
+    """
+    Yield (frame_number, frame) for every nth frame, from the frame store when available
+    
+    Decoded frames are resized to the resolution the frame store keeps, so the
+    detection line lands in the same place with or without the store.
+    """
+    if frame_store is not None:
+        yield from frame_store.iter_frames()
+        return
+    
+    cap = cv2.VideoCapture(video_path)
+    try:
+        frame_number = 0
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame_number += 1
+            if frame_number % frame_skip == 0:
+                yield frame_number, cv2.resize(frame, tuple(resolution))
+    finally:
+        cap.release()
+
 def _save_processed_video(video_path, detector, frame_count, fps):
     """Save the processed video with annotations"""
     try:
@@ -181,48 +208,34 @@ def _save_processed_video(video_path, detector, frame_count, fps):
                 return None
         
         # Process video again to save annotated version
-        cap = cv2.VideoCapture(video_path)
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        frame_number = 0
         processed_frames = 0
         
         with st.spinner("🎬 Saving processed video..."):
-            while cap.isOpened() and frame_number < frame_count:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                # ... your processing ...
-                frame_number += 1
-                
-                # Process every nth frame based on frame_skip
-                if frame_number % frame_skip == 0:
-                    try:
-                        # Process frame with detections
-                        annotated_frame, _ = process_frame_with_detections(frame, detector, frame_number)
-                        
-                        # Ensure frame is in BGR format
-                        if len(annotated_frame.shape) == 3 and annotated_frame.shape[2] == 3:
-                            # Resize frame to output resolution
-                            annotated_frame_resized = cv2.resize(annotated_frame, output_resolution)
-                            
-                            # Write frame to output video
-                            out.write(annotated_frame_resized)
-                            processed_frames += 1
-                        else:
-                            st.warning(f"⚠️ Frame {frame_number} has invalid format, skipping...")
+            for frame_number, frame in _iter_sampled_frames(video_path, frame_skip, output_resolution):
+                try:
+                    # Process frame with detections
+                    annotated_frame, _ = process_frame_with_detections(frame, detector, frame_number)
                     
-                    except Exception as e:
-                        st.error(f"❌ Error processing frame {frame_number}: {e}")
-                        continue
+                    # Ensure frame is in BGR format
+                    if len(annotated_frame.shape) == 3 and annotated_frame.shape[2] == 3:
+                        # Resize frame to output resolution
+                        annotated_frame_resized = cv2.resize(annotated_frame, output_resolution)
+                        
+                        # Write frame to output video
+                        out.write(annotated_frame_resized)
+                        processed_frames += 1
+                    else:
+                        st.warning(f"⚠️ Frame {frame_number} has invalid format, skipping...")
                 
-                frame_number += 1
+                except Exception as e:
+                    st.error(f"❌ Error processing frame {frame_number}: {e}")
+                    continue
                 
                 # Update progress
-                if frame_number % 10 == 0:
+                if processed_frames % 10 == 0:
                     progress = min(100, (frame_number / frame_count) * 100)
                     st.progress(int(progress))
         
-        cap.release()
         out.release()
         
         # Verify the video was created successfully
@@ -284,43 +297,30 @@ def _create_compatible_video(video_path, detector, frame_count, fps):
             return None
         
         # Process video frames
-        cap = cv2.VideoCapture(video_path)
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        frame_number = 0
         processed_frames = 0
         
         with st.spinner(f"🎬 Creating video with {successful_codec} codec..."):
-            while cap.isOpened() and frame_number < frame_count:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                # ... your processing ...
-                frame_number += 1
-                
-                if frame_number % frame_skip == 0:
-                    try:
-                        # Process frame
-                        annotated_frame, _ = process_frame_with_detections(frame, detector, frame_number)
-                        
-                        # Ensure proper format
-                        if len(annotated_frame.shape) == 3:
-                            # Resize and write frame
-                            annotated_frame_resized = cv2.resize(annotated_frame, output_resolution)
-                            out.write(annotated_frame_resized)
-                            processed_frames += 1
+            for frame_number, frame in _iter_sampled_frames(video_path, frame_skip, output_resolution):
+                try:
+                    # Process frame
+                    annotated_frame, _ = process_frame_with_detections(frame, detector, frame_number)
                     
-                    except Exception as e:
-                        st.warning(f"⚠️ Error processing frame {frame_number}: {e}")
-                        continue
+                    # Ensure proper format
+                    if len(annotated_frame.shape) == 3:
+                        # Resize and write frame
+                        annotated_frame_resized = cv2.resize(annotated_frame, output_resolution)
+                        out.write(annotated_frame_resized)
+                        processed_frames += 1
                 
-                frame_number += 1
+                except Exception as e:
+                    st.warning(f"⚠️ Error processing frame {frame_number}: {e}")
+                    continue
                 
                 # Update progress
-                if frame_number % 20 == 0:
+                if processed_frames % 20 == 0:
                     progress = min(100, (frame_number / frame_count) * 100)
                     st.progress(int(progress))
         
-        cap.release()
         out.release()
         
         # Final validation
@@ -394,6 +394,12 @@ def _create_test_video():
         return False, f"Test video creation failed: {e}"
 
 def main():
+    # Sweep uploads and results left behind by ended sessions
+    if 'stale_files_cleaned' not in st.session_state:
+        cleanup_stale_files()
+        cleanup_stale_files(STATIC_DIR, keep_linked=True)
+        st.session_state.stale_files_cleaned = True
+    
     # Initialize default configuration if not exists
     if 'config' not in st.session_state:
         st.session_state.config = {
@@ -433,6 +439,10 @@ def main():
             flash_duration = st.slider("Flash Duration (frames)", 30, 120, 60)
             output_width = st.number_input("Output Width", 640, 1920, 854)
             output_height = st.number_input("Output Height", 480, 1080, 480)
+            use_frame_store = st.checkbox(
+                "Decode once into a frame store", value=False,
+                help="Keep decoded frames on disk at the output resolution so re-processing skips video decoding"
+            )
         
         # Create configuration with ALL required parameters
         st.session_state.config = {
@@ -443,7 +453,8 @@ def main():
             'flash_duration_frames': flash_duration,
             'output_resolution': (output_width, output_height),
             'violation_save_path': 'violations',
-            'classes_to_detect': [0, 1, 2, 3, 4, 5, 7, 8, 9, 10, 11, 12]  # Vehicle classes
+            'classes_to_detect': [0, 1, 2, 3, 4, 5, 7, 8, 9, 10, 11, 12],  # Vehicle classes
+            'frame_store_dir': os.path.join('cache', 'frames') if use_frame_store else None
         }
     
     # Main content
@@ -460,10 +471,8 @@ def main():
         )
         
         if uploaded_file is not None:
-            # Save uploaded file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                video_path = tmp_file.name
+            # Save uploaded file to disk in chunks, once per upload
+            video_path = session_upload(st.session_state, uploaded_file)
             
             # Display video info
             cap = cv2.VideoCapture(video_path)
@@ -474,6 +483,19 @@ def main():
             
             st.info(f"📊 Video Info: {frame_count} frames, {fps:.1f} FPS, {duration:.1f} seconds")
             
+            # Decode once into the frame store; later passes slice it instead
+            frame_store = None
+            if st.session_state.config.get('frame_store_dir'):
+                with st.spinner("📼 Decoding video into frame store..."):
+                    frame_store = open_frame_store(video_path, st.session_state.config)
+                if frame_store is not None:
+                    st.caption(f"📼 Frame store: {len(frame_store)} frames at "
+                               f"{frame_store.metadata['resolution'][0]}x{frame_store.metadata['resolution'][1]}")
+                    preview_index = st.slider("Preview frame", 0, max(0, len(frame_store) - 1), 0)
+                    if len(frame_store):
+                        st.image(frame_store[preview_index][:, :, ::-1],
+                                 caption=f"Frame {frame_store.frame_number(preview_index)}")
+            
             # Show processing capability for longer videos
             if duration > 30:
                 st.success(f"🎬 This video will be processed completely! Duration: {duration:.1f} seconds")
@@ -498,9 +520,11 @@ def main():
                     progress_bar = st.progress(0)
                     status_text = st.empty()
                     
-                    # Create temporary output file
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp_output:
+                    # Create temporary output file, replacing this session's previous one
+                    os.makedirs(UPLOAD_DIR, exist_ok=True)
+                    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4", dir=UPLOAD_DIR) as tmp_output:
                         output_path = tmp_output.name
+                    replace_session_file(st.session_state, 'output_video_path', output_path)
                     
                     # Setup video writer
                     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
@@ -516,49 +540,36 @@ def main():
                         return
                     
                     # Process video
-                    cap = cv2.VideoCapture(video_path)
-                    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
                     frame_number = 0
                     total_violations = 0
                     processed_frames = 0
                     
                     with st.spinner("🎬 Processing video frames..."):
-                        frame_number = 0
-                        while cap.isOpened() and frame_number < frame_count:
-                            ret, frame = cap.read()
-                            if not ret:
-                                break
-                            # ... your processing ...
-                            frame_number += 1
+                        for frame_number, frame in _iter_sampled_frames(video_path, frame_skip, output_resolution,
+                                                                        frame_store):
+                            # Process frame with detections
+                            annotated_frame, violations = process_frame_with_detections(
+                                frame, detector, frame_number
+                            )
+                            total_violations += violations
                             
-                            # Process every nth frame based on frame_skip
-                            if frame_number % frame_skip == 0:
-                                # Process frame with detections
-                                annotated_frame, violations = process_frame_with_detections(
-                                    frame, detector, frame_number
-                                )
-                                total_violations += violations
-                                
-                                # Ensure proper format and write to video
-                                if len(annotated_frame.shape) == 3:
-                                    # Resize frame to output resolution
-                                    annotated_frame_resized = cv2.resize(annotated_frame, output_resolution)
-                                    out.write(annotated_frame_resized)
-                                    processed_frames += 1
-                                
-                                # Update progress
-                                progress = min(100, (frame_number / frame_count) * 100)
-                                progress_bar.progress(int(progress))
-                                
-                                # Update status
-                                if frame_number % 30 == 0:
-                                    status_text.text(f"Processing frame {frame_number}/{frame_count} - Violations: {total_violations}")
+                            # Ensure proper format and write to video
+                            if len(annotated_frame.shape) == 3:
+                                # Resize frame to output resolution
+                                annotated_frame_resized = cv2.resize(annotated_frame, output_resolution)
+                                out.write(annotated_frame_resized)
+                                processed_frames += 1
+                            
+                            # Update progress
+                            progress = min(100, (frame_number / frame_count) * 100)
+                            progress_bar.progress(int(progress))
                             
-                            frame_number += 1
+                            # Update status
+                            if frame_number % 30 == 0:
+                                status_text.text(f"Processing frame {frame_number}/{frame_count} - Violations: {total_violations}")
                     
-                    # Close video writer and capture
+                    # Close video writer
                     out.release()
-                    cap.release()
                     
                     progress_bar.progress(100)
                     status_text.text("✅ Video processing completed!")
@@ -577,17 +588,22 @@ def main():
                     st.markdown("### 🎬 Processed Video Output")
                     
                     if os.path.exists(output_path) and os.path.getsize(output_path) > 1024:
-                        # Display the processed video
-                        st.video(output_path)
-                        
-                        # Download button for the processed video
-                        with open(output_path, "rb") as video_file:
-                            st.download_button(
-                                label="📥 Download Processed Video",
-                                data=video_file.read(),
-                                file_name=f"processed_video_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4",
-                                mime="video/mp4"
-                            )
+                        if servable_inline(output_path):
+                            # Display the processed video
+                            st.video(output_path)
+                            
+                            # Download button for the processed video
+                            with open(output_path, "rb") as video_file:
+                                st.download_button(
+                                    label="📥 Download Processed Video",
+                                    data=video_file,
+                                    file_name=f"processed_video_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4",
+                                    mime="video/mp4"
+                                )
+                        else:
+                            st.info(too_large_notice(output_path))
+                            st.markdown(download_link(output_path, "📥 Download Processed Video"),
+                                        unsafe_allow_html=True)
                         
                         st.success(f"🎉 Video processing completed! Found {total_violations} violations in {processed_frames} processed frames.")
                         
@@ -603,7 +619,6 @@ def main():
                     else:
                         st.error("❌ Failed to create valid video file. Please try again.")
                     
-                    st.session_state.output_video_path = output_path
                     st.session_state.detector = detector
                     
                     st.balloons()  # Celebrate completion!
@@ -707,17 +722,22 @@ def main():
                 is_valid, validation_message = _validate_video(video_path)
                 
                 if is_valid:
-                    # Display the processed video
-                    st.video(video_path)
-                    
-                    # Download button for the processed video
-                    with open(video_path, "rb") as video_file:
-                        st.download_button(
-                            label="📥 Download Processed Video",
-                            data=video_file.read(),
-                            file_name=os.path.basename(video_path),
-                            mime="video/mp4"
-                        )
+                    if servable_inline(video_path):
+                        # Display the processed video
+                        st.video(video_path)
+                        
+                        # Download button for the processed video
+                        with open(video_path, "rb") as video_file:
+                            st.download_button(
+                                label="📥 Download Processed Video",
+                                data=video_file,
+                                file_name=os.path.basename(video_path),
+                                mime="video/mp4"
+                            )
+                    else:
+                        st.info(too_large_notice(video_path))
+                        st.markdown(download_link(video_path, "📥 Download Processed Video"),
+                                    unsafe_allow_html=True)
                     
                     st.success(f"🎉 Your processed video is ready! Found {results['total_violations']} violations.")
                     
@@ -738,28 +758,19 @@ def main():
         
         # Download results
         st.markdown("### 💾 Download Results")
-        # ...existing code...
-        # Create results JSON
-        serializable_results = recursive_convert(results)
-        results_json = json.dumps(serializable_results, indent=2)
-        st.download_button(
-            label="📄 Download Results JSON",
-            data=results_json,
-            file_name="detection_results.json",
-            mime="application/json"
-        )
-# ...existing code...
-        # Create results JSON
-       # ...existing code...
-# Create results JSON
-        serializable_results = recursive_convert(results)
-        results_json = json.dumps(serializable_results, indent=2)
-        st.download_button(
-            label="📄 Download Results JSON",
-            data=results_json,
-            file_name="detection_results.json",
-            mime="application/json"
-        )
+        # Write results JSON to disk once per result set
+        if st.session_state.get('results_json_for') is not results:
+            results_json_path = os.path.join(UPLOAD_DIR, f"results_{datetime.now():%Y%m%d_%H%M%S_%f}.json")
+            write_json_file(recursive_convert(results), results_json_path)
+            replace_session_file(st.session_state, 'results_json_path', results_json_path)
+            st.session_state.results_json_for = results
+        with open(st.session_state.results_json_path, 'rb') as f:
+            st.download_button(
+                label="📄 Download Results JSON",
+                data=f,
+                file_name="detection_results.json",
+                mime="application/json"
+            )
     
     # Footer
     st.markdown("---")
@@ -0,0 +1,179 @@
+"""
+Dynamic micro-batching for a shared detector
+
+A BatchScheduler collects items submitted from any number of threads
+(cameras, HTTP requests, detectors) and runs them through one batch
+function. A batch is dispatched as soon as it holds max_batch_size items or
+its oldest item has waited max_wait_ms, whichever comes first. Each caller
+gets a concurrent.futures.Future for its own result.
+
+max_wait_ms trades latency for throughput: 0 dispatches whatever is queued
+immediately, larger values let batches fill under light load. Items that
+queued while the previous batch ran are dispatched without further waiting.
+"""
+
+import time
+import queue
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+from perf_stats import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class BatchScheduler:
+    """
+    Runs items submitted from many threads in batches on one worker thread
+    """
+
+    def __init__(self, run_batch: Callable[[List], List], max_batch_size: int = 8,
+                 max_wait_ms: float = 5.0, name: str = 'batch'):
+        """
+        Initialize the scheduler and start its worker thread
+
+        Args:
+            run_batch: Maps a list of items to a list of results in the same order
+            max_batch_size: Largest batch passed to run_batch
+            max_wait_ms: Longest the oldest queued item waits for the batch to fill
+            name: Worker thread name prefix
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.batch_sizes = Counter()
+        self.batch_latency = LatencyHistogram()
+        self.queue_wait = LatencyHistogram()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._worker, name=f'{name}-scheduler', daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self) -> int:
+        """Items waiting for a batch"""
+        return self._queue.qsize()
+
+    def submit(self, item) -> Future:
+        """
+        Queue an item
+
+        Args:
+            item: Input for run_batch
+
+        Returns:
+            Future: Resolves to the item's result, or raises run_batch's error
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BatchScheduler is closed")
+            self._queue.put((item, future, time.perf_counter_ns()))
+        return future
+
+    def run(self, item, timeout: Optional[float] = None):
+        """Submit an item and wait for its result"""
+        return self.submit(item).result(timeout)
+
+    def close(self, wait: bool = True):
+        """Stop accepting items; queued items are still processed"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        if wait:
+            self._thread.join()
+
+    def _next_batch(self) -> Optional[List]:
+        entry = self._queue.get()
+        if entry is _STOP:
+            return None
+        batch = [entry]
+        deadline = entry[2] + int(self.max_wait_ms * 1e6)
+        while len(batch) < self.max_batch_size:
+            timeout = (deadline - time.perf_counter_ns()) / 1e9
+            try:
+                entry = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                # Finish this batch, then stop
+                self._queue.put(_STOP)
+                break
+            batch.append(entry)
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            # Skip items whose callers cancelled while queued
+            batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            start = time.perf_counter_ns()
+            for _, _, queued_ns in batch:
+                self.queue_wait.record(start - queued_ns)
+            try:
+                results = self.run_batch([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"run_batch returned {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                logger.error(f"❌ Batch of {len(batch)} failed: {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            self.batch_latency.record(time.perf_counter_ns() - start)
+            self.batch_sizes[len(batch)] += 1
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        """Batch counts, sizes and latencies"""
+        batches = sum(self.batch_sizes.values())
+        items = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ms,
+            'batches': batches,
+            'items': items,
+            'mean_batch_size': items / batches if batches else 0.0,
+            'batch_sizes': dict(sorted(self.batch_sizes.items())),
+            'batch_latency': self.batch_latency.summary(),
+            'queue_wait': self.queue_wait.summary(),
+        }
+
+
+def create_detection_scheduler(model_path: str, config: Dict) -> BatchScheduler:
+    """
+    Batch scheduler running detection for detectors that share one model
+
+    Pass the scheduler to each RedLightViolationDetector(batch_scheduler=...)
+    so frames from several streams run as batched model calls. Batch limits
+    come from config 'batch_max_size' and 'batch_max_wait_ms'.
+
+    Args:
+        model_path: Model weights
+        config: Detector configuration (backend, classes, confidence, size)
+
+    Returns:
+        BatchScheduler: Scheduler mapping frames to Detections
+    """
+    from enhanced_detector_fixed import RedLightViolationDetector
+
+    detector = RedLightViolationDetector(model_path, config)
+    return BatchScheduler(detector.detect_batch,
+                          max_batch_size=config.get('batch_max_size', 8),
+                          max_wait_ms=config.get('batch_max_wait_ms', 5.0),
+                          name='detection')
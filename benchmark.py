@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Reproducible benchmark suite for the Red Light Violation Detection System
+
+Generates deterministic synthetic traffic clips with known ground-truth
+stop-line crossings, runs RedLightViolationDetector.process_video on each
+clip under each processing mode, and reports fps, per-stage latency, peak
+RSS and violation precision/recall as JSON. Runs offline: when the model
+weights are not present, a stub detector segments the synthetic vehicles
+instead of running YOLO.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import cv2 as cv
+
+from testing_support import (LANES, LINE_Y_THRESHOLD, RED_LIGHT_START_TIME, WORKING_RESOLUTION,
+                             StubBackend, generate_synthetic_clip)
+
+# Processing modes exercised for every clip
+PROCESSING_MODES = {
+    'tracking': {'tracking_available': True, 'tracker': 'bytetrack'},
+    'iou_tracker': {'tracking_available': True, 'tracker': 'iou'},
+    'detection_only': {'tracking_available': False, 'tracker': 'none'},
+}
+
+# Clip matrices: (width, height), duration in seconds, vehicles per lane
+SCENARIOS = {
+    'quick': [
+        {'resolution': (640, 360), 'duration': 8, 'density': 1},
+    ],
+    'standard': [
+        {'resolution': (640, 360), 'duration': 8, 'density': 1},
+        {'resolution': (1280, 720), 'duration': 6, 'density': 1},
+        {'resolution': (1280, 720), 'duration': 12, 'density': 2},
+        {'resolution': (1920, 1080), 'duration': 12, 'density': 3},
+    ],
+}
+
+# Relative change that counts as a regression when comparing to a baseline
+DEFAULT_TOLERANCES = {
+    'fps': 0.10,
+    'peak_rss_mb': 0.15,
+    'precision': 0.05,
+    'recall': 0.05,
+}
+
+
+def score_violations(violations: List[Dict], crossings: List[Dict], frame_skip: int) -> Dict:
+    """
+    Match detected violations to ground-truth red-light crossings
+
+    A detection matches an unmatched crossing when it is within one
+    sampling interval of the crossing frame and in the same lane.
+
+    Returns:
+        Dict: Precision, recall and match counts
+    """
+    expected = [c for c in crossings if c['during_red']]
+    lane_width = WORKING_RESOLUTION[0] / LANES
+    tolerance = frame_skip + 1
+    matched = set()
+    true_positives = 0
+    for violation in violations:
+        x1, _, x2, _ = violation['bbox']
+        center_x = (float(x1) + float(x2)) / 2
+        for i, crossing in enumerate(expected):
+            if i in matched:
+                continue
+            if (abs(violation.get('frame_number', -10 ** 9) - crossing['frame_number']) <= tolerance
+                    and abs(center_x - crossing['center_x']) < lane_width / 2):
+                matched.add(i)
+                true_positives += 1
+                break
+
+    detected = len(violations)
+    return {
+        'expected_violations': len(expected),
+        'detected_violations': detected,
+        'true_positives': true_positives,
+        'precision': true_positives / detected if detected else (1.0 if not expected else 0.0),
+        'recall': true_positives / len(expected) if expected else 1.0,
+    }
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def run_case(case: Dict) -> Dict:
+    """
+    Run one clip under one processing mode
+
+    Runs in a fresh worker process so peak RSS is measured per case.
+    """
+    from enhanced_detector_fixed import RedLightViolationDetector
+
+    work_dir = case['work_dir']
+    os.chdir(work_dir)
+    config = {
+        'frame_skip': case['frame_skip'],
+        'line_y_threshold': LINE_Y_THRESHOLD,
+        'red_light_start_time': RED_LIGHT_START_TIME,
+        'flash_duration_frames': 30,
+        'confidence_threshold': 0.25,
+        'classes_to_detect': [0, 1, 2, 3, 5, 7],
+        'output_resolution': WORKING_RESOLUTION,
+        'violation_save_path': os.path.join(work_dir, 'violations'),
+        'warmup_iterations': 1,
+        'backend': case['backend'],
+        'tracker': PROCESSING_MODES[case['mode']]['tracker'],
+    }
+
+    detector = RedLightViolationDetector(case['model_path'], config)
+    detector.tracking_available = PROCESSING_MODES[case['mode']]['tracking_available']
+    if case['use_stub']:
+        detector._backend = StubBackend()
+        detector.model_load_time = 0.0
+
+    # Collect track IDs to measure ID stability
+    track_ids = set()
+    run_model = detector._run_model
+
+    def _run_model_collecting_ids(frame, persist=True, is_red=False):
+        detections = run_model(frame, persist=persist, is_red=is_red)
+        if persist and detections.ids is not None:
+            track_ids.update(int(i) for i in detections.ids)
+        return detections
+
+    detector._run_model = _run_model_collecting_ids
+
+    results = detector.process_video(case['clip']['path'], os.path.join(work_dir, 'output.mp4'))
+    processing_time = results['processing_time']
+    scores = score_violations(detector.violations, case['clip']['crossings'], case['frame_skip'])
+
+    return {
+        'case': case['name'],
+        'mode': case['mode'],
+        'resolution': case['clip']['resolution'],
+        'duration': case['clip']['duration'],
+        'density': case['clip']['density'],
+        'detector': 'stub' if case['use_stub'] else f"{case['backend']}:{case['model_path']}",
+        'total_frames': results['total_frames'],
+        'processed_frames': results['processed_frames'],
+        'processing_time': processing_time,
+        'fps': results['total_frames'] / processing_time if processing_time > 0 else 0.0,
+        'processed_fps': results['processed_frames'] / processing_time if processing_time > 0 else 0.0,
+        'startup': results['startup'],
+        'stage_timings': results['stage_timings'],
+        'peak_rss_mb': _peak_rss_mb(),
+        'unique_track_ids': len(track_ids),
+        # Track IDs per ground-truth vehicle; 1.0 means no ID switches
+        'id_fragmentation': len(track_ids) / case['clip']['vehicles'] if track_ids else None,
+        **scores,
+    }
+
+
+def compare_to_baseline(report: Dict, baseline: Dict, tolerances: Dict = None) -> Dict:
+    """
+    Compare a benchmark report with a stored baseline
+
+    Returns:
+        Dict: Per-case relative deltas and a list of regressions
+    """
+    tolerances = tolerances or DEFAULT_TOLERANCES
+    baseline_runs = {(run['case'], run['mode']): run for run in baseline.get('runs', [])}
+    deltas = []
+    regressions = []
+    for run in report['runs']:
+        base = baseline_runs.get((run['case'], run['mode']))
+        if base is None:
+            continue
+        entry = {'case': run['case'], 'mode': run['mode']}
+        for metric, tolerance in tolerances.items():
+            old, new = base.get(metric), run.get(metric)
+            if old is None or new is None:
+                continue
+            if metric in ('precision', 'recall'):
+                delta = new - old
+                regressed = delta < -tolerance
+            else:
+                delta = (new - old) / old if old else 0.0
+                regressed = delta < -tolerance if metric == 'fps' else delta > tolerance
+            entry[metric] = delta
+            if regressed:
+                regressions.append(f"{run['case']}/{run['mode']}: {metric} {old:.3f} -> {new:.3f}")
+        deltas.append(entry)
+    return {'deltas': deltas, 'regressions': regressions}
+
+
+def run_benchmark(scenario: str = 'quick', modes: List[str] = None, model_path: str = 'yolov8n.pt',
+                  use_stub: bool = None, frame_skip: int = 2, seed: int = 0,
+                  work_dir: str = None, backend: str = 'ultralytics') -> Dict:
+    """
+    Run the benchmark matrix
+
+    Args:
+        scenario: Name of a clip matrix in SCENARIOS
+        modes: Processing modes to run (defaults to all of PROCESSING_MODES)
+        model_path: YOLO weights to benchmark
+        use_stub: Force the stub detector on or off (defaults to on when weights are missing)
+        frame_skip: Detector frame_skip for every run
+        seed: Seed for clip generation
+        work_dir: Directory for clips and outputs (defaults to a temp directory)
+        backend: Detector backend name (see detector_backends.BACKENDS)
+
+    Returns:
+        Dict: Machine-readable benchmark report
+    """
+    modes = modes or list(PROCESSING_MODES)
+    if use_stub is None:
+        use_stub = not os.path.exists(model_path)
+    work_dir = os.path.abspath(work_dir or tempfile.mkdtemp(prefix='rlvd_bench_'))
+    os.makedirs(work_dir, exist_ok=True)
+
+    runs = []
+    for index, spec in enumerate(SCENARIOS[scenario]):
+        width, height = spec['resolution']
+        clip_name = f"{width}x{height}_{spec['duration']}s_d{spec['density']}"
+        clip = generate_synthetic_clip(os.path.join(work_dir, f"{clip_name}.mp4"), spec['resolution'],
+                                       spec['duration'], spec['density'], seed + index)
+        for mode in modes:
+            case_dir = os.path.join(work_dir, f"{clip_name}_{mode}")
+            os.makedirs(case_dir, exist_ok=True)
+            case = {
+                'name': clip_name,
+                'mode': mode,
+                'clip': clip,
+                'model_path': model_path,
+                'backend': backend,
+                'use_stub': use_stub,
+                'frame_skip': frame_skip,
+                'work_dir': case_dir,
+            }
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                runs.append(executor.submit(run_case, case).result())
+
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'scenario': scenario,
+        'seed': seed,
+        'frame_skip': frame_skip,
+        'system': {
+            'platform': platform.system(),
+            'python_version': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'opencv_version': cv.__version__,
+        },
+        'runs': runs,
+    }
+
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark the red light violation detector")
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='quick')
+    parser.add_argument('--mode', action='append', choices=sorted(PROCESSING_MODES),
+                        help="Processing mode to run (repeatable, default: all)")
+    parser.add_argument('--model', default='yolov8n.pt', help="Model weights to benchmark")
+    parser.add_argument('--backend', default='ultralytics', help="Detector backend (ultralytics, onnxruntime)")
+    parser.add_argument('--stub', action='store_true', help="Use the stub detector even if weights exist")
+    parser.add_argument('--frame-skip', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--work-dir', help="Directory for generated clips and outputs")
+    parser.add_argument('--output', default='bench_output.json', help="Report JSON path")
+    parser.add_argument('--baseline', help="Baseline report JSON to compare against")
+    parser.add_argument('--update-baseline', action='store_true', help="Write this report to --baseline")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.scenario, args.mode, args.model, True if args.stub else None,
+                           args.frame_skip, args.seed, args.work_dir, args.backend)
+
+    if args.baseline and os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, 'r') as f:
+            report['comparison'] = compare_to_baseline(report, json.load(f))
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"📊 Benchmark report saved: {args.output}")
+
+    for run in report['runs']:
+        print(f"   - {run['case']} [{run['mode']}]: {run['fps']:.1f} FPS, "
+              f"peak RSS {run['peak_rss_mb']:.0f} MB, "
+              f"precision {run['precision']:.2f}, recall {run['recall']:.2f}")
+
+    if args.update_baseline and args.baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Baseline updated: {args.baseline}")
+
+    regressions = report.get('comparison', {}).get('regressions', [])
+    if regressions:
+        print("❌ Regressions against baseline:")
+        for regression in regressions:
+            print(f"   - {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
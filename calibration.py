@@ -0,0 +1,104 @@
+"""
+Road-plane calibration and speed estimation
+
+A camera is calibrated with four reference points: their pixel positions
+in the working-resolution frame and their positions on the road in metres
+(for example the corners of a lane marking of known length and width).
+The resulting homography maps the tracks' ground anchors onto the road
+plane, all tracks in one matrix product per frame. Speeds are the
+least-squares slope of each track's last few road positions over time,
+computed for every track at once.
+"""
+
+import logging
+from typing import Dict, Optional, Sequence, Tuple
+
+import cv2 as cv
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def compute_homography(image_points: Sequence[Tuple[float, float]],
+                       world_points: Sequence[Tuple[float, float]]) -> np.ndarray:
+    """
+    Image-to-road homography from four reference points
+
+    Args:
+        image_points: Four (x, y) pixel positions at the working resolution
+        world_points: The same four points on the road plane, in metres
+
+    Returns:
+        np.ndarray: (3, 3) homography
+    """
+    image_points = np.asarray(image_points, dtype=np.float32)
+    world_points = np.asarray(world_points, dtype=np.float32)
+    if image_points.shape != (4, 2) or world_points.shape != (4, 2):
+        raise ValueError("Calibration needs exactly four image points and four world points")
+    for points in (image_points, world_points):
+        if _min_triangle_area(points) <= 1e-6 * np.ptp(points, axis=0).prod():
+            raise ValueError("Calibration points are degenerate (three or more are collinear)")
+    return cv.getPerspectiveTransform(image_points, world_points).astype(np.float64)
+
+
+def _min_triangle_area(points: np.ndarray) -> float:
+    """Smallest triangle area spanned by any three of four points"""
+    areas = []
+    for skip in range(4):
+        a, b, c = np.delete(points, skip, axis=0).astype(np.float64)
+        areas.append(abs((b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])) / 2)
+    return min(areas)
+
+
+def homography_from_config(config: Dict) -> Optional[np.ndarray]:
+    """
+    Homography from config 'speed_calibration', or None when uncalibrated
+
+    The calibration is {'image_points': [[x, y] * 4], 'world_points': [[x, y] * 4]}.
+    """
+    calibration = config.get('speed_calibration')
+    if not calibration:
+        return None
+    return compute_homography(calibration['image_points'], calibration['world_points'])
+
+
+def project_points(homography: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """
+    Map pixel points onto the road plane
+
+    Args:
+        homography: (3, 3) image-to-road homography
+        points: (N, 2) pixel coordinates
+
+    Returns:
+        np.ndarray: (N, 2) road coordinates in metres
+    """
+    projected = points @ homography[:, :2].T + homography[:, 2]
+    return projected[:, :2] / projected[:, 2:3]
+
+
+def window_speeds(times: np.ndarray, positions: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """
+    Least-squares speed over each row's window of samples
+
+    Args:
+        times: (N, W) sample times in seconds
+        positions: (N, W, 2) road positions in metres
+        valid: (N, W) mask of filled samples
+
+    Returns:
+        np.ndarray: (N,) speeds in metres per second (0 with fewer than two samples)
+    """
+    weights = valid.astype(np.float64)
+    counts = weights.sum(axis=1)
+    safe_counts = np.maximum(counts, 1)
+    mean_t = (times * weights).sum(axis=1) / safe_counts
+    mean_p = (positions * weights[..., None]).sum(axis=1) / safe_counts[:, None]
+    dt = (times - mean_t[:, None]) * weights
+    dp = positions - mean_p[:, None, :]
+    variance = (dt * dt).sum(axis=1)
+    covariance = (dt[..., None] * dp).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        velocity = covariance / variance[:, None]
+    speeds = np.linalg.norm(velocity, axis=1)
+    return np.where((counts >= 2) & (variance > 0), speeds, 0.0)
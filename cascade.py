@@ -0,0 +1,183 @@
+"""
+Two-stage cascade detection
+
+The configured (small) model runs on every sampled frame. While the light
+is red, detections whose box bottom is within a margin of the stop line are
+candidates for an imminent violation; only then is a larger model run,
+either on one crop around the candidates or on the whole frame. The larger
+model's boxes replace the candidates they overlap, add vehicles the small
+model missed and drop candidates it does not confirm, so the crossing
+decision is made on large-model boxes at close to small-model average cost.
+"""
+
+import time
+import logging
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+from detector_backends import DetectorBackend, Detections
+from iou_tracker import greedy_assignment, iou_matrix
+from track_timeline import BOTTOM_OFFSET
+
+logger = logging.getLogger(__name__)
+
+CASCADE_MODES = ('crop', 'frame')
+
+
+def gate_indices(xyxy: np.ndarray, line_y_threshold: float, margin: float) -> np.ndarray:
+    """
+    Indices of boxes whose offset bottom is within margin pixels of the stop line
+
+    Args:
+        xyxy: (N, 4) boxes in working-resolution pixels
+        line_y_threshold: Stop line y coordinate
+        margin: Distance from the line, on either side, that triggers the cascade
+
+    Returns:
+        np.ndarray: Indices of candidate boxes
+    """
+    bottoms = xyxy[:, 3] - BOTTOM_OFFSET
+    return np.flatnonzero(np.abs(bottoms - line_y_threshold) <= margin)
+
+
+def crop_region(xyxy: np.ndarray, frame_shape: Tuple[int, ...], padding: int) -> Tuple[int, int, int, int]:
+    """
+    Padded bounding region of a set of boxes, clipped to the frame
+
+    Returns:
+        Tuple of (x1, y1, x2, y2) integer pixel coordinates
+    """
+    height, width = frame_shape[:2]
+    x1 = max(0, int(xyxy[:, 0].min()) - padding)
+    y1 = max(0, int(xyxy[:, 1].min()) - padding)
+    x2 = min(width, int(np.ceil(xyxy[:, 2].max())) + padding)
+    y2 = min(height, int(np.ceil(xyxy[:, 3].max())) + padding)
+    return x1, y1, x2, y2
+
+
+class CascadeRefiner:
+    """
+    Runs a larger model on frames or crops with imminent stop-line crossings
+    """
+
+    def __init__(self, backend_factory: Callable[[], DetectorBackend], margin: float = 60,
+                 mode: str = 'crop', padding: int = 32, iou_threshold: float = 0.3):
+        """
+        Initialize the refiner
+
+        Args:
+            backend_factory: Creates the larger model's backend on first use
+            margin: Pixels from the stop line within which a vehicle is a candidate
+            mode: 'crop' runs the larger model on one crop around the candidates,
+                'frame' on the whole frame
+            padding: Context pixels added around the crop
+            iou_threshold: Minimum IoU for a large-model box to replace a candidate
+        """
+        if mode not in CASCADE_MODES:
+            raise ValueError(f"Unknown cascade mode: {mode}")
+        self.backend_factory = backend_factory
+        self.margin = margin
+        self.mode = mode
+        self.padding = padding
+        self.iou_threshold = iou_threshold
+        self._backend = None
+        self.frames = 0
+        self.refined_frames = 0
+        self.replaced = 0
+        self.added = 0
+        self.dropped = 0
+        self.total_ms = 0.0
+
+    @property
+    def backend(self) -> DetectorBackend:
+        """Larger model's backend, created on first use"""
+        if self._backend is None:
+            self._backend = self.backend_factory()
+        return self._backend
+
+    def refine(self, frame: np.ndarray, detections: Detections, is_red: bool,
+               line_y_threshold: float, inference_kwargs: Dict) -> Detections:
+        """
+        Re-detect the candidates of one frame with the larger model
+
+        Args:
+            frame: Working-resolution frame the detections were made on
+            detections: Small-model detections, tracked or not
+            is_red: Whether the light is red; the cascade only runs during red
+            line_y_threshold: Stop line y coordinate
+            inference_kwargs: classes/conf/imgsz for the larger model
+
+        Returns:
+            Detections: Merged detections (the input when nothing was gated)
+        """
+        self.frames += 1
+        if not is_red or len(detections) == 0:
+            return detections
+        gated = gate_indices(detections.xyxy, line_y_threshold, self.margin)
+        if len(gated) == 0:
+            return detections
+
+        start = time.perf_counter()
+        if self.mode == 'crop':
+            x1, y1, x2, y2 = crop_region(detections.xyxy[gated], frame.shape, self.padding)
+            refined = self.backend.detect(frame[y1:y2, x1:x2], **inference_kwargs)
+            refined_xyxy = refined.xyxy + np.array([x1, y1, x1, y1], dtype=np.float32)
+        else:
+            refined = self.backend.detect(frame, **inference_kwargs)
+            refined_xyxy = refined.xyxy
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.total_ms += elapsed_ms
+        self.refined_frames += 1
+
+        # Only large-model boxes in the same band speak for the candidates
+        in_band = gate_indices(refined_xyxy, line_y_threshold, self.margin)
+        merged = self._merge(detections, gated, refined_xyxy[in_band], refined.conf[in_band],
+                             refined.cls[in_band])
+        merged.speed = dict(detections.speed)
+        merged.speed['inference'] = (merged.speed.get('inference') or 0.0) + elapsed_ms
+        merged.speed['cascade'] = elapsed_ms
+        return merged
+
+    def _merge(self, detections: Detections, gated: np.ndarray, xyxy: np.ndarray,
+               conf: np.ndarray, cls: np.ndarray) -> Detections:
+        rows, cols = greedy_assignment(1.0 - iou_matrix(detections.xyxy[gated], xyxy), 1.0 - self.iou_threshold)
+
+        keep = np.ones(len(detections), dtype=bool)
+        keep[gated] = False
+        keep[gated[rows]] = True
+        out_xyxy = detections.xyxy.copy()
+        out_conf = detections.conf.copy()
+        out_cls = detections.cls.copy()
+        out_xyxy[gated[rows]] = xyxy[cols]
+        out_conf[gated[rows]] = conf[cols]
+        out_cls[gated[rows]] = cls[cols]
+        self.replaced += len(rows)
+        self.dropped += len(gated) - len(rows)
+
+        out_ids = detections.ids
+        unmatched = np.setdiff1d(np.arange(len(xyxy)), cols)
+        if out_ids is None and len(unmatched):
+            # Untracked detections can take new boxes; the tracker assigns their IDs
+            self.added += len(unmatched)
+            return Detections(np.concatenate([out_xyxy[keep], xyxy[unmatched]]),
+                              np.concatenate([out_conf[keep], conf[unmatched]]),
+                              np.concatenate([out_cls[keep], cls[unmatched]]),
+                              names=detections.names)
+        return Detections(out_xyxy[keep], out_conf[keep], out_cls[keep],
+                          ids=None if out_ids is None else out_ids[keep], names=detections.names)
+
+    def stats(self) -> Dict:
+        """How often the larger model ran and what it changed"""
+        return {
+            'mode': self.mode,
+            'margin': self.margin,
+            'frames': self.frames,
+            'refined_frames': self.refined_frames,
+            'refined_fraction': self.refined_frames / self.frames if self.frames else 0.0,
+            'replaced': self.replaced,
+            'added': self.added,
+            'dropped': self.dropped,
+            'mean_ms': self.total_ms / self.refined_frames if self.refined_frames else 0.0,
+        }
+
@@ -0,0 +1,265 @@
+"""
+Chart rendering for Red Light Violation Detection reports
+
+Charts are drawn with the object-oriented matplotlib API on the Agg canvas,
+so no global pyplot state is touched and each chart can be built in its own
+worker process. The worker pool is started once and shared by every
+renderer, so repeated renders do not pay for spawning processes and
+importing matplotlib again.
+"""
+
+import os
+import json
+import atexit
+import hashlib
+import logging
+import threading
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Resolution presets for saved charts
+DPI_PRESETS = {
+    'thumbnail': 40,
+    'draft': 72,
+    'screen': 110,
+    'print': 300,
+}
+
+SUPPORTED_FORMATS = ('png', 'svg')
+
+# Sidecar file that records the data hash of every chart in a directory
+HASH_INDEX_FILE = '.chart_hashes.json'
+
+# Worker pools shared across renders, keyed by worker count
+_executors: Dict[Optional[int], ProcessPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def resolve_dpi(dpi: Union[str, int]) -> int:
+    """
+    Resolve a DPI preset name or explicit value
+
+    Args:
+        dpi: Preset name from DPI_PRESETS or an integer DPI
+
+    Returns:
+        int: DPI value
+    """
+    if isinstance(dpi, str):
+        if dpi not in DPI_PRESETS:
+            raise ValueError(f"Unknown DPI preset: {dpi}")
+        return DPI_PRESETS[dpi]
+    if dpi <= 0:
+        raise ValueError("dpi must be positive")
+    return int(dpi)
+
+
+def chart_hash(spec: Dict) -> str:
+    """Stable hash of a chart spec, including its data and output settings"""
+    payload = json.dumps(spec, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _shared_executor(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Worker pool for the given worker count, started on first use"""
+    with _executors_lock:
+        executor = _executors.get(max_workers)
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+            _executors[max_workers] = executor
+        return executor
+
+
+def _discard_executor(max_workers: Optional[int]):
+    """Drop a broken pool so the next render starts a fresh one"""
+    with _executors_lock:
+        executor = _executors.pop(max_workers, None)
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def shutdown_executors():
+    """Stop every shared worker pool"""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=True)
+
+
+def _render_chart(job: Dict) -> List[str]:
+    """
+    Render one chart spec to disk
+
+    Runs in a worker process, so it only receives plain data and imports
+    matplotlib lazily.
+
+    Args:
+        job: Chart spec with output settings
+
+    Returns:
+        List[str]: Paths of files written
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=job.get('figsize', (12, 6)))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+
+    kind = job['kind']
+    x = job['x']
+    y = job['y']
+    if kind == 'bar':
+        ax.bar(x, y, color=job.get('color', 'red'), alpha=0.7)
+    elif kind == 'line':
+        if job.get('x_is_date'):
+            x = [date.fromisoformat(value) for value in x]
+        ax.plot(x, y, marker='o', linewidth=2, markersize=6)
+    elif kind == 'barh':
+        positions = list(range(len(y)))
+        ax.barh(positions, y, color=job.get('color', 'orange'), alpha=0.7)
+        ax.set_yticks(positions)
+        ax.set_yticklabels(x)
+        ax.invert_yaxis()
+    else:
+        raise ValueError(f"Unknown chart kind: {kind}")
+
+    ax.set_title(job['title'], fontsize=16, fontweight='bold')
+    if job.get('xlabel'):
+        ax.set_xlabel(job['xlabel'])
+    if job.get('ylabel'):
+        ax.set_ylabel(job['ylabel'])
+    if job.get('xtick_rotation'):
+        ax.tick_params(axis='x', labelrotation=job['xtick_rotation'])
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+
+    written = []
+    base_path = os.path.join(job['save_path'], job['name'])
+    for fmt in job['formats']:
+        path = f"{base_path}.{fmt}"
+        fig.savefig(path, dpi=job['dpi'], format=fmt)
+        written.append(path)
+
+    if job.get('thumbnail_dpi'):
+        path = f"{base_path}_thumb.png"
+        fig.savefig(path, dpi=job['thumbnail_dpi'], format='png')
+        written.append(path)
+
+    return written
+
+
+class ChartRenderer:
+    """
+    Parallel, cache-aware renderer for report charts
+    """
+
+    def __init__(self, save_path: str = 'charts', dpi: Union[str, int] = 'print',
+                 formats: tuple = ('png',), thumbnails: bool = False,
+                 max_workers: Optional[int] = None, parallel: bool = True):
+        """
+        Initialize the renderer
+
+        Args:
+            save_path: Directory to save charts
+            dpi: DPI preset name or explicit DPI for full-size charts
+            formats: Output formats, any of SUPPORTED_FORMATS
+            thumbnails: Also write a small PNG thumbnail per chart
+            max_workers: Worker process count (defaults to one per CPU)
+            parallel: Render charts in worker processes
+        """
+        unsupported = [fmt for fmt in formats if fmt not in SUPPORTED_FORMATS]
+        if unsupported:
+            raise ValueError(f"Unsupported chart formats: {unsupported}")
+
+        self.save_path = save_path
+        self.dpi = resolve_dpi(dpi)
+        self.formats = tuple(formats)
+        self.thumbnails = thumbnails
+        self.max_workers = max_workers
+        self.parallel = parallel
+
+    def _index_path(self) -> str:
+        return os.path.join(self.save_path, HASH_INDEX_FILE)
+
+    def _load_index(self) -> Dict[str, str]:
+        try:
+            with open(self._index_path(), 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_index(self, index: Dict[str, str]):
+        with open(self._index_path(), 'w') as f:
+            json.dump(index, f, indent=2)
+
+    def _make_job(self, spec: Dict) -> Dict:
+        job = dict(spec)
+        job['save_path'] = self.save_path
+        job['dpi'] = self.dpi
+        job['formats'] = list(self.formats)
+        job['thumbnail_dpi'] = DPI_PRESETS['thumbnail'] if self.thumbnails else None
+        return job
+
+    def _output_paths(self, job: Dict) -> List[str]:
+        base_path = os.path.join(self.save_path, job['name'])
+        paths = [f"{base_path}.{fmt}" for fmt in job['formats']]
+        if job['thumbnail_dpi']:
+            paths.append(f"{base_path}_thumb.png")
+        return paths
+
+    def render(self, specs: List[Dict]) -> List[str]:
+        """
+        Render chart specs, skipping charts whose data has not changed
+
+        Args:
+            specs: Chart specs (name, kind, x, y, title and optional labels)
+
+        Returns:
+            List[str]: Paths to chart files, in spec order
+        """
+        if not specs:
+            return []
+
+        os.makedirs(self.save_path, exist_ok=True)
+        index = self._load_index()
+
+        jobs = [self._make_job(spec) for spec in specs]
+        hashes = [chart_hash(job) for job in jobs]
+        pending = [
+            i for i, job in enumerate(jobs)
+            if index.get(job['name']) != hashes[i]
+            or not all(os.path.exists(p) for p in self._output_paths(job))
+        ]
+
+        if len(pending) < len(jobs):
+            logger.info(f"Skipping {len(jobs) - len(pending)} unchanged chart(s)")
+
+        if pending:
+            pending_jobs = [jobs[i] for i in pending]
+            if self.parallel and len(pending_jobs) > 1:
+                try:
+                    executor = _shared_executor(self.max_workers)
+                    list(executor.map(_render_chart, pending_jobs))
+                except (OSError, RuntimeError) as e:
+                    _discard_executor(self.max_workers)
+                    logger.warning(f"Parallel chart rendering unavailable ({e}), rendering sequentially")
+                    for job in pending_jobs:
+                        _render_chart(job)
+            else:
+                for job in pending_jobs:
+                    _render_chart(job)
+
+            for i in pending:
+                index[jobs[i]['name']] = hashes[i]
+            self._save_index(index)
+
+        chart_paths = []
+        for job in jobs:
+            chart_paths.extend(self._output_paths(job))
+        return chart_paths
@@ -14,6 +14,10 @@ DEFAULT_CONFIG = {
     # Model parameters
     'classes_to_detect': [0, 1, 2, 3, 4, 5, 7, 8, 9, 10, 11, 12],  # Vehicle classes
     'model_path': 'yolov8n.pt',
+    'tracker': 'bytetrack',  # 'bytetrack' (needs lap), 'iou' (built-in) or 'none'
+    'cascade_model_path': None,  # Larger model run near the stop line during red, e.g. 'yolov8m.pt'
+    'cascade_margin_px': 60,  # Distance from the stop line that triggers the larger model
+    'cascade_mode': 'crop',  # 'crop' (around candidates) or 'frame'
     
     # Video parameters
     'output_resolution': (854, 480),
@@ -22,11 +26,25 @@ DEFAULT_CONFIG = {
     # File paths
     'violation_save_path': 'violations',
     'results_save_path': 'results',
+    'detection_cache_dir': 'cache/detections',  # None disables the detection cache
     
     # Processing parameters
     'max_violations_per_vehicle': 1,
     'save_violation_images': True,
+    'violation_rules': ['red_light_violation'],  # Rules enabled for this camera (keys of VIOLATION_TYPES)
+    'rule_params': {},  # Per-rule settings, e.g. {'illegal_parking': {'zones': [...], 'max_dwell_s': 60}}
+    'parking_model_path': None,  # Model for low-rate parking samples ('sample_interval_s'); defaults to model_path
+    'speed_calibration': None,  # {'image_points': 4 x [x, y] pixels, 'world_points': 4 x [x, y] metres}
+    'speed_window': 5,  # Road positions per track used to fit its speed
+    'full_resolution_snapshots': True,  # Cut snapshots from the decoded frame, not the resized one
+    'snapshot_refine': False,  # Re-detect the vehicle on the full-resolution crop before saving
     'save_annotated_video': True,
+    'batch_max_size': 8,  # Frames per batched model call when streams share a detector
+    'batch_max_wait_ms': 5.0,  # Longest a frame waits for its batch; 0 favours latency
+    'latency_slo_ms': None,  # Live streams: end-to-end frame latency target; None disables pacing
+    'signal_cycle': None,  # Live streams: fixed-time plan {'red_s', 'green_s', 'offset_s'}; cameras need this or a callback
+    'stream_stats_window': 1000,  # Live streams: most recent per-frame stats returned
+    'stream_timeline_frames': 9000,  # Live streams: most recent frames kept in the track timeline
     
     # UI parameters
     'enable_realtime_display': True,
@@ -40,13 +58,15 @@ MODEL_CONFIGS = {
         'path': 'yolov8n.pt',
         'description': 'YOLOv8 Nano - Fast and lightweight',
         'speed': 'fast',
-        'accuracy': 'medium'
+        'accuracy': 'medium',
+        'quantizable': True  # INT8 CPU inference supported
     },
     'yolov8s': {
         'path': 'yolov8s.pt',
         'description': 'YOLOv8 Small - Balanced speed and accuracy',
         'speed': 'medium',
-        'accuracy': 'high'
+        'accuracy': 'high',
+        'quantizable': True
     },
     'yolov8m': {
         'path': 'yolov8m.pt',
@@ -178,6 +198,31 @@ def validate_config(config):
     if 'red_light_start_time' in config and config['red_light_start_time'] < 0:
         errors.append("red_light_start_time must be non-negative")
     
+    if 'tracker' in config and config['tracker'] not in ('bytetrack', 'iou', 'none'):
+        errors.append("tracker must be one of 'bytetrack', 'iou' or 'none'")
+    
+    for violation_type in config.get('violation_rules', []):
+        if violation_type not in VIOLATION_TYPES:
+            errors.append(f"Unknown violation type in violation_rules: {violation_type}")
+    
+    if 'speeding' in config.get('violation_rules', []) and not config.get('speed_calibration'):
+        errors.append("speeding needs a road-plane calibration in speed_calibration")
+    
+    if 'speed_window' in config and config['speed_window'] < 2:
+        errors.append("speed_window must be at least 2")
+    
+    if 'cascade_mode' in config and config['cascade_mode'] not in ('crop', 'frame'):
+        errors.append("cascade_mode must be 'crop' or 'frame'")
+    
+    if 'batch_max_size' in config and config['batch_max_size'] < 1:
+        errors.append("batch_max_size must be at least 1")
+    
+    if 'batch_max_wait_ms' in config and config['batch_max_wait_ms'] < 0:
+        errors.append("batch_max_wait_ms must be non-negative")
+    
+    if config.get('latency_slo_ms') is not None and config['latency_slo_ms'] <= 0:
+        errors.append("latency_slo_ms must be positive")
+    
     return errors
 
 def save_config(config, filename='config.json'):
@@ -0,0 +1,38 @@
+"""
+Shared pytest fixtures
+"""
+
+import pytest
+
+import enhanced_detector_fixed
+from enhanced_detector_fixed import RedLightViolationDetector
+from testing_support import StubBackend, generate_synthetic_clip
+
+
+@pytest.fixture
+def work_dir(tmp_path, monkeypatch):
+    """Temporary working directory; relative outputs (violations/, results JSON) land here"""
+    monkeypatch.chdir(tmp_path)
+    return str(tmp_path)
+
+
+@pytest.fixture
+def synthetic_clip(tmp_path):
+    """8 s 640x360 synthetic clip with one vehicle per lane"""
+    return generate_synthetic_clip(str(tmp_path / 'clip.mp4'), (640, 360), 8, 1)
+
+
+@pytest.fixture
+def make_detector(work_dir):
+    """Factory for detectors running on the stub backend"""
+    def make(config=None, backend=None, **kwargs):
+        detector = RedLightViolationDetector('stub.pt', config, **kwargs)
+        detector._backend = backend if backend is not None else StubBackend()
+        return detector
+    return make
+
+
+@pytest.fixture
+def stub_backends(monkeypatch):
+    """Every backend created by the detector module is a stub"""
+    monkeypatch.setattr(enhanced_detector_fixed, 'create_backend', lambda *args, **kwargs: StubBackend())
@@ -0,0 +1,249 @@
+"""
+Per-frame detection cache
+
+Detections and track IDs depend only on the input video, the model and the
+detection settings, never on the stop line or signal timing. Storing them
+per frame lets a video be re-analysed with new violation parameters by
+replaying the cached detections instead of running inference again.
+
+Each cache file holds one (video, model, detection settings) combination as
+flat columns in a compressed .npz: frame numbers with row offsets into the
+box, confidence, class and track ID columns.
+"""
+
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+
+from detector_backends import Detections
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+# Config keys that change what the model or tracker returns for a frame
+FINGERPRINT_KEYS = (
+    'backend',
+    'confidence_threshold',
+    'classes_to_detect',
+    'inference_size',
+    'output_resolution',
+    'frame_skip',
+    'tracker',
+    'tracker_iou_threshold',
+    'tracker_max_age',
+    'tracker_solver',
+)
+
+# With a cascade, which frames get the larger model depends on the signal
+# timing and stop line too
+CASCADE_FINGERPRINT_KEYS = (
+    'cascade_model_path',
+    'cascade_margin_px',
+    'cascade_mode',
+    'cascade_padding',
+    'cascade_inference_size',
+    'line_y_threshold',
+    'red_light_start_time',
+)
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    SHA-1 of a file's contents, read in chunks
+
+    Args:
+        path: File to hash
+        chunk_size: Bytes read per chunk
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def detection_fingerprint(model_path: str, config: Dict, tracking_available: bool = True) -> str:
+    """
+    Fingerprint of everything besides the video that affects detections
+
+    The model file's size and modification time are included, so retrained
+    weights saved under the same name do not reuse stale detections.
+
+    Args:
+        model_path: Model weights path
+        config: Detector configuration
+        tracking_available: Whether ByteTrack (lap) can be used
+
+    Returns:
+        str: Hex digest
+    """
+    model_stat = None
+    if os.path.exists(model_path):
+        stat = os.stat(model_path)
+        model_stat = [stat.st_size, int(stat.st_mtime)]
+    spec = {
+        'version': CACHE_VERSION,
+        'model_path': os.path.basename(model_path),
+        'model_stat': model_stat,
+        'tracking_available': tracking_available,
+        'config': {key: config.get(key) for key in FINGERPRINT_KEYS},
+    }
+    if config.get('cascade_model_path'):
+        spec['cascade'] = {key: config.get(key) for key in CASCADE_FINGERPRINT_KEYS}
+    return hashlib.sha1(json.dumps(spec, sort_keys=True, default=list).encode()).hexdigest()
+
+
+class DetectionCache:
+    """
+    Cached detections for one video under one model and detection config
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a cache file, loading it when it exists
+
+        Args:
+            path: Cache file path (.npz)
+        """
+        self.path = path
+        self.complete = False
+        self.hits = 0
+        self.misses = 0
+        self._frames = {}
+        self._dirty = False
+        if os.path.exists(path):
+            self._load()
+
+    @classmethod
+    def for_video(cls, cache_dir: str, video_path: str, model_path: str, config: Dict,
+                  tracking_available: bool = True) -> 'DetectionCache':
+        """
+        Open the cache entry for a video, model and detection config
+
+        Args:
+            cache_dir: Directory holding cache files
+            video_path: Input video; its contents, not its path, are hashed
+            model_path: Model weights path
+            config: Detector configuration
+            tracking_available: Whether ByteTrack (lap) can be used
+
+        Returns:
+            DetectionCache: Cache for this combination
+        """
+        video_hash = file_hash(video_path)
+        fingerprint = detection_fingerprint(model_path, config, tracking_available)
+        return cls(os.path.join(cache_dir, f"{video_hash[:16]}_{fingerprint[:16]}.npz"))
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def _load(self):
+        try:
+            with np.load(self.path) as data:
+                if int(data['version']) != CACHE_VERSION:
+                    logger.info(f"Ignoring detection cache with old format: {self.path}")
+                    return
+                frames = data['frames']
+                offsets = data['offsets']
+                has_ids = data['has_ids']
+                xyxy, conf, cls, ids = data['xyxy'], data['conf'], data['cls'], data['ids']
+                self.complete = bool(data['complete'])
+        except Exception as e:
+            logger.warning(f"Could not read detection cache {self.path}: {e}")
+            return
+
+        for i, frame_number in enumerate(frames):
+            rows = slice(offsets[i], offsets[i + 1])
+            self._frames[int(frame_number)] = Detections(
+                xyxy[rows], conf[rows], cls[rows],
+                ids=ids[rows] if has_ids[i] else None
+            )
+        logger.info(f"📦 Loaded {len(frames)} cached frames from {self.path}")
+
+    def get(self, frame_number: int) -> Optional[Detections]:
+        """
+        Cached detections for a frame, or None on a miss
+
+        Args:
+            frame_number: 1-based frame number in the video
+
+        Returns:
+            Optional[Detections]: Detections without backend timings or plotter
+        """
+        cached = self._frames.get(frame_number)
+        if cached is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return Detections(cached.xyxy, cached.conf, cached.cls, ids=cached.ids)
+
+    def put(self, frame_number: int, detections: Detections):
+        """
+        Store the detections for a frame
+
+        Args:
+            frame_number: 1-based frame number in the video
+            detections: Detections to store
+        """
+        self._frames[frame_number] = Detections(detections.xyxy, detections.conf,
+                                                detections.cls, ids=detections.ids)
+        self._dirty = True
+
+    def clear(self):
+        """Drop every cached frame; the file is rewritten on the next save"""
+        self._frames = {}
+        self.complete = False
+        self._dirty = True
+
+    def save(self, complete: bool = False):
+        """
+        Write the cache to disk if anything was added
+
+        Args:
+            complete: Whether every sampled frame of the video is now cached
+        """
+        if not self._dirty and complete == self.complete:
+            return
+
+        frame_numbers = sorted(self._frames)
+        entries = [self._frames[n] for n in frame_numbers]
+        offsets = np.zeros(len(entries) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(d) for d in entries])
+
+        def column(attr, width=None, dtype=np.float32):
+            shape = (0, width) if width else (0,)
+            parts = [getattr(d, attr) for d in entries]
+            return np.concatenate(parts).astype(dtype) if parts else np.zeros(shape, dtype)
+
+        ids = [d.ids if d.ids is not None else np.full(len(d), -1, np.int64) for d in entries]
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                version=np.int32(CACHE_VERSION),
+                complete=np.bool_(complete),
+                frames=np.asarray(frame_numbers, dtype=np.int32),
+                offsets=offsets,
+                has_ids=np.asarray([d.ids is not None for d in entries], dtype=bool),
+                xyxy=column('xyxy', 4),
+                conf=column('conf', dtype=np.float16),
+                cls=column('cls', dtype=np.int16),
+                ids=np.concatenate(ids) if ids else np.zeros(0, np.int64),
+            )
+        os.replace(tmp_path, self.path)
+        self.complete = complete
+        self._dirty = False
+        logger.info(f"📦 Detection cache saved: {self.path} ({len(frame_numbers)} frames)")
+
+    def stats(self) -> Dict:
+        """Hit and miss counts for the current run"""
+        return {'path': self.path, 'hits': self.hits, 'misses': self.misses, 'complete': self.complete}
@@ -0,0 +1,458 @@
+"""
+Detector backends for the Red Light Violation Detection System
+
+A backend turns a BGR frame into plain NumPy detections, so the violation
+logic does not depend on the ultralytics results API. The ultralytics
+backend is the default; the ONNX Runtime and OpenVINO backends run an
+exported (optionally INT8-quantized) YOLOv8 model on CPU without torch.
+"""
+
+import os
+import ast
+import shutil
+import time
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import cv2 as cv
+import numpy as np
+
+from model_registry import get_model
+
+logger = logging.getLogger(__name__)
+
+# COCO class names used when a model carries no name metadata
+COCO_NAMES = {
+    0: 'person', 1: 'bicycle', 2: 'car', 3: 'motorcycle', 4: 'airplane',
+    5: 'bus', 6: 'train', 7: 'truck', 8: 'boat', 9: 'traffic light',
+    10: 'fire hydrant', 11: 'stop sign', 12: 'parking meter'
+}
+
+
+class Detections:
+    """
+    Detections for one frame as plain arrays
+
+    Attributes:
+        xyxy: (N, 4) float32 boxes in frame pixel coordinates
+        conf: (N,) float32 confidences
+        cls: (N,) int32 class IDs
+        ids: (N,) int64 track IDs, or None when the frame was not tracked
+        speed: Backend timings in milliseconds (preprocess/inference/postprocess)
+    """
+
+    def __init__(self, xyxy: np.ndarray, conf: np.ndarray, cls: np.ndarray,
+                 ids: Optional[np.ndarray] = None, speed: Optional[Dict] = None,
+                 names: Optional[Dict] = None, plotter=None):
+        self.xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        self.conf = np.asarray(conf, dtype=np.float32).reshape(-1)
+        self.cls = np.asarray(cls, dtype=np.int32).reshape(-1)
+        self.ids = None if ids is None else np.asarray(ids, dtype=np.int64).reshape(-1)
+        self.speed = speed or {}
+        self.names = names or COCO_NAMES
+        self._plotter = plotter
+
+    @classmethod
+    def empty(cls, speed: Optional[Dict] = None) -> 'Detections':
+        """Detections with no boxes"""
+        return cls(np.zeros((0, 4)), np.zeros(0), np.zeros(0), speed=speed)
+
+    def __len__(self) -> int:
+        return len(self.xyxy)
+
+    def plot(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Draw the detections on a copy of the frame
+
+        Args:
+            frame: Frame the detections were made on
+
+        Returns:
+            np.ndarray: Annotated frame
+        """
+        if self._plotter is not None:
+            return self._plotter()
+
+        annotated = frame.copy()
+        for i, (x1, y1, x2, y2) in enumerate(self.xyxy.astype(int)):
+            label = f"{self.names.get(int(self.cls[i]), int(self.cls[i]))} {self.conf[i]:.2f}"
+            if self.ids is not None:
+                label = f"id:{self.ids[i]} {label}"
+            cv.rectangle(annotated, (x1, y1), (x2, y2), (255, 128, 0), 2)
+            cv.putText(annotated, label, (x1, max(12, y1 - 5)),
+                       cv.FONT_HERSHEY_SIMPLEX, 0.5, (255, 128, 0), 1)
+        return annotated
+
+
+class DetectorBackend:
+    """
+    Base class for detector backends
+    """
+
+    name = 'base'
+    # Whether track() returns persistent track IDs
+    supports_tracking = False
+    # Whether detect() honours a per-call imgsz
+    supports_resize = True
+
+    @property
+    def model(self):
+        """Underlying model object, if the backend has one"""
+        return None
+
+    def detect(self, frame: np.ndarray, classes: List[int] = None, conf: float = 0.5,
+               imgsz: Optional[int] = None) -> Detections:
+        """Run detection on a BGR frame"""
+        raise NotImplementedError
+
+    def track(self, frame: np.ndarray, classes: List[int] = None, conf: float = 0.5,
+              imgsz: Optional[int] = None, persist: bool = True) -> Detections:
+        """Run detection with tracking on a BGR frame"""
+        return self.detect(frame, classes=classes, conf=conf, imgsz=imgsz)
+
+    def detect_batch(self, frames: List[np.ndarray], classes: List[int] = None, conf: float = 0.5,
+                     imgsz: Optional[int] = None) -> List[Detections]:
+        """Run detection on several independent BGR frames; backends that batch natively override this"""
+        return [self.detect(frame, classes=classes, conf=conf, imgsz=imgsz) for frame in frames]
+
+
+class UltralyticsBackend(DetectorBackend):
+    """
+    Default backend running ultralytics YOLO (PyTorch)
+    """
+
+    name = 'ultralytics'
+    supports_tracking = True
+
+    def __init__(self, model_path: str, device: Optional[str] = None,
+                 task: Optional[str] = None, shared: bool = True):
+        self._model = get_model(model_path, device=device, task=task, shared=shared)
+
+    @property
+    def model(self):
+        return self._model
+
+    @staticmethod
+    def _to_detections(results) -> Detections:
+        return UltralyticsBackend._result_to_detections(results[0])
+
+    @staticmethod
+    def _result_to_detections(result) -> Detections:
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return Detections.empty(speed=result.speed)
+        ids = boxes.id.cpu().numpy() if boxes.id is not None else None
+        return Detections(
+            boxes.xyxy.cpu().numpy(),
+            boxes.conf.cpu().numpy(),
+            boxes.cls.cpu().numpy(),
+            ids=ids,
+            speed=result.speed,
+            names=result.names,
+            plotter=result.plot
+        )
+
+    @staticmethod
+    def _kwargs(classes, conf, imgsz) -> Dict:
+        kwargs = {'classes': classes, 'conf': conf}
+        if imgsz:
+            kwargs['imgsz'] = imgsz
+        return kwargs
+
+    def detect(self, frame, classes=None, conf=0.5, imgsz=None):
+        return self._to_detections(self._model(frame, **self._kwargs(classes, conf, imgsz)))
+
+    def track(self, frame, classes=None, conf=0.5, imgsz=None, persist=True):
+        return self._to_detections(
+            self._model.track(frame, persist=persist, **self._kwargs(classes, conf, imgsz))
+        )
+
+    def detect_batch(self, frames, classes=None, conf=0.5, imgsz=None):
+        # A list source runs as one batched forward pass
+        results = self._model(list(frames), **self._kwargs(classes, conf, imgsz))
+        return [self._result_to_detections(result) for result in results]
+
+
+# Compiled sessions are thread-safe for inference, so one is shared per model file
+_SESSIONS: Dict[tuple, object] = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def default_intra_op_threads() -> int:
+    """Physical core count, which is usually the best intra-op thread count"""
+    try:
+        import psutil
+        cores = psutil.cpu_count(logical=False)
+    except ImportError:
+        cores = None
+    return cores or os.cpu_count() or 1
+
+
+def letterbox(frame: np.ndarray, imgsz: int):
+    """
+    Letterbox a BGR frame into a normalized NCHW float32 tensor
+
+    Args:
+        frame: BGR frame
+        imgsz: Square model input size
+
+    Returns:
+        Tuple of (blob, scale, pad_x, pad_y) to map boxes back to the frame
+    """
+    height, width = frame.shape[:2]
+    scale = min(imgsz / height, imgsz / width)
+    new_w, new_h = int(round(width * scale)), int(round(height * scale))
+    pad_x, pad_y = (imgsz - new_w) / 2, (imgsz - new_h) / 2
+
+    resized = cv.resize(frame, (new_w, new_h), interpolation=cv.INTER_LINEAR)
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top, left = int(round(pad_y - 0.1)), int(round(pad_x - 0.1))
+    canvas[top:top + new_h, left:left + new_w] = resized
+
+    blob = cv.dnn.blobFromImage(canvas, 1 / 255.0, swapRB=True)
+    return blob, scale, left, top
+
+
+class ExportedYoloBackend(DetectorBackend):
+    """
+    Shared pre- and post-processing for exported YOLOv8 models
+
+    Subclasses load the model and implement _infer().
+    """
+
+    # The exported input shape is fixed
+    supports_resize = False
+
+    def __init__(self, model_path: str, imgsz: int = 640, iou_threshold: float = 0.45):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model not found: {model_path}")
+        self.model_path = model_path
+        self.imgsz = imgsz
+        self.iou_threshold = iou_threshold
+        self.names = COCO_NAMES
+
+    def _infer(self, blob: np.ndarray) -> np.ndarray:
+        """Run the model on a (1, 3, imgsz, imgsz) blob"""
+        raise NotImplementedError
+
+    def _postprocess(self, output: np.ndarray, scale: float, pad_x: int, pad_y: int,
+                     frame_shape, classes: Optional[List[int]], conf: float) -> Detections:
+        # YOLOv8 output is (1, 4 + num_classes, num_anchors)
+        predictions = output[0].T
+        class_scores = predictions[:, 4:]
+        class_ids = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(class_ids)), class_ids]
+
+        keep = scores >= conf
+        if classes is not None:
+            keep &= np.isin(class_ids, classes)
+        if not keep.any():
+            return Detections.empty()
+
+        boxes = predictions[keep, :4]
+        scores = scores[keep]
+        class_ids = class_ids[keep]
+
+        # cx, cy, w, h in letterbox space -> x1, y1, x2, y2 in frame space
+        xyxy = np.empty_like(boxes)
+        xyxy[:, 0] = boxes[:, 0] - boxes[:, 2] / 2
+        xyxy[:, 1] = boxes[:, 1] - boxes[:, 3] / 2
+        xyxy[:, 2] = boxes[:, 0] + boxes[:, 2] / 2
+        xyxy[:, 3] = boxes[:, 1] + boxes[:, 3] / 2
+        xyxy[:, [0, 2]] = (xyxy[:, [0, 2]] - pad_x) / scale
+        xyxy[:, [1, 3]] = (xyxy[:, [1, 3]] - pad_y) / scale
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, frame_shape[1])
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, frame_shape[0])
+
+        # Class-aware NMS: offset boxes per class so classes never suppress each other
+        offsets = class_ids[:, None].astype(np.float32) * 4096.0
+        nms_boxes = xyxy + offsets
+        nms_boxes[:, 2:] -= nms_boxes[:, :2]
+        indices = cv.dnn.NMSBoxes(nms_boxes.tolist(), scores.tolist(), conf, self.iou_threshold)
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+
+        return Detections(xyxy[indices], scores[indices], class_ids[indices], names=self.names)
+
+    def detect(self, frame, classes=None, conf=0.5, imgsz=None):
+        # A static export only accepts the size it was exported with
+        start = time.perf_counter()
+        blob, scale, pad_x, pad_y = letterbox(frame, self.imgsz)
+        preprocess_done = time.perf_counter()
+        output = self._infer(blob)
+        inference_done = time.perf_counter()
+        detections = self._postprocess(output, scale, pad_x, pad_y, frame.shape, classes, conf)
+        detections.speed = {
+            'preprocess': (preprocess_done - start) * 1000,
+            'inference': (inference_done - preprocess_done) * 1000,
+            'postprocess': (time.perf_counter() - inference_done) * 1000
+        }
+        return detections
+
+
+class OnnxRuntimeBackend(ExportedYoloBackend):
+    """
+    CPU backend running an exported YOLOv8 ONNX model with onnxruntime
+    """
+
+    name = 'onnxruntime'
+
+    def __init__(self, model_path: str, intra_op_threads: Optional[int] = None,
+                 imgsz: int = 640, iou_threshold: float = 0.45):
+        """
+        Initialize the backend
+
+        Args:
+            model_path: Path to an ONNX model exported with export_onnx()
+            intra_op_threads: Threads per operator (defaults to physical cores)
+            imgsz: Square input size the model was exported with
+            iou_threshold: IoU threshold for non-maximum suppression
+        """
+        super().__init__(model_path, imgsz=imgsz, iou_threshold=iou_threshold)
+        self.intra_op_threads = intra_op_threads or default_intra_op_threads()
+        self.session = self._get_session()
+        self.input_name = self.session.get_inputs()[0].name
+
+        # Static exports fix the input size; dynamic ones report strings
+        input_shape = self.session.get_inputs()[0].shape
+        if isinstance(input_shape[2], int):
+            self.imgsz = input_shape[2]
+        self.names = self._read_names()
+
+    def _get_session(self):
+        import onnxruntime as ort
+
+        key = ('onnxruntime', os.path.abspath(self.model_path), self.intra_op_threads)
+        with _SESSIONS_LOCK:
+            session = _SESSIONS.get(key)
+            if session is None:
+                options = ort.SessionOptions()
+                options.intra_op_num_threads = self.intra_op_threads
+                options.inter_op_num_threads = 1
+                options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+                options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                session = ort.InferenceSession(self.model_path, sess_options=options,
+                                               providers=['CPUExecutionProvider'])
+                _SESSIONS[key] = session
+                logger.info(f"ONNX Runtime session created: {self.model_path} "
+                            f"({self.intra_op_threads} intra-op threads)")
+            return session
+
+    def _read_names(self) -> Dict[int, str]:
+        # ultralytics stores the class names as a dict literal in the metadata
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        try:
+            return {int(k): v for k, v in ast.literal_eval(metadata['names']).items()}
+        except (KeyError, ValueError, SyntaxError):
+            return COCO_NAMES
+
+    def _infer(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class OpenVinoBackend(ExportedYoloBackend):
+    """
+    CPU backend running a YOLOv8 model (FP32 or INT8) with OpenVINO
+    """
+
+    name = 'openvino'
+
+    def __init__(self, model_path: str, num_threads: Optional[int] = None,
+                 imgsz: int = 640, iou_threshold: float = 0.45):
+        """
+        Initialize the backend
+
+        Args:
+            model_path: Path to an OpenVINO IR (.xml) or ONNX model
+            num_threads: CPU inference threads (defaults to physical cores)
+            imgsz: Square input size the model was exported with
+            iou_threshold: IoU threshold for non-maximum suppression
+        """
+        super().__init__(model_path, imgsz=imgsz, iou_threshold=iou_threshold)
+        self.num_threads = num_threads or default_intra_op_threads()
+        self.compiled_model = self._get_compiled_model()
+        self.output = self.compiled_model.output(0)
+
+        input_shape = self.compiled_model.input(0).get_partial_shape()
+        if input_shape[2].is_static:
+            self.imgsz = input_shape[2].get_length()
+
+    def _get_compiled_model(self):
+        import openvino as ov
+
+        key = ('openvino', os.path.abspath(self.model_path), self.num_threads)
+        with _SESSIONS_LOCK:
+            compiled_model = _SESSIONS.get(key)
+            if compiled_model is None:
+                core = ov.Core()
+                compiled_model = core.compile_model(
+                    core.read_model(self.model_path), 'CPU',
+                    {'PERFORMANCE_HINT': 'LATENCY', 'INFERENCE_NUM_THREADS': self.num_threads}
+                )
+                _SESSIONS[key] = compiled_model
+                logger.info(f"OpenVINO model compiled: {self.model_path} ({self.num_threads} threads)")
+            return compiled_model
+
+    def _infer(self, blob):
+        return self.compiled_model([blob])[self.output]
+
+
+def export_onnx(model_path: str, imgsz: int = 640, output_dir: Optional[str] = None) -> str:
+    """
+    Export YOLO weights to ONNX for the onnxruntime backend
+
+    Needs ultralytics and torch, so run it once on a build machine and ship
+    the .onnx file to CPU workers.
+
+    Args:
+        model_path: Path to YOLO .pt weights
+        imgsz: Input size to export with
+        output_dir: Directory for the .onnx file (default: next to the weights)
+
+    Returns:
+        str: Path to the exported ONNX model
+    """
+    from ultralytics import YOLO
+
+    exported = str(YOLO(model_path).export(format='onnx', imgsz=imgsz, dynamic=False, simplify=True))
+    if output_dir is None:
+        return exported
+    os.makedirs(output_dir, exist_ok=True)
+    target = os.path.join(output_dir, os.path.basename(exported))
+    if os.path.abspath(target) != os.path.abspath(exported):
+        shutil.move(exported, target)
+    return target
+
+
+BACKENDS = {
+    UltralyticsBackend.name: UltralyticsBackend,
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+    OpenVinoBackend.name: OpenVinoBackend,
+}
+
+
+def create_backend(name: str, model_path: str, config: Dict, shared: bool = True) -> DetectorBackend:
+    """
+    Create a detector backend from configuration
+
+    Args:
+        name: Backend name from BACKENDS
+        model_path: Path to model weights for the backend
+        config: Detector configuration
+        shared: Allow sharing the loaded model with other detectors
+
+    Returns:
+        DetectorBackend: Ready-to-use backend
+    """
+    if name == UltralyticsBackend.name:
+        return UltralyticsBackend(model_path, device=config.get('device'),
+                                  task=config.get('task'), shared=shared)
+    if name == OnnxRuntimeBackend.name:
+        return OnnxRuntimeBackend(model_path,
+                                  intra_op_threads=config.get('onnx_intra_op_threads'),
+                                  imgsz=config.get('inference_size') or 640)
+    if name == OpenVinoBackend.name:
+        return OpenVinoBackend(model_path,
+                               num_threads=config.get('openvino_num_threads'),
+                               imgsz=config.get('inference_size') or 640)
+    raise ValueError(f"Unknown detector backend: {name}")
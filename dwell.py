@@ -0,0 +1,275 @@
+"""
+Low-rate dwell detection for illegal parking
+
+Parking violations are measured in minutes, so running the full-rate
+tracker for them is wasted work. A DwellMonitor instead looks at the
+restricted zones once every few seconds: it runs detection on each zone's
+region only, matches the vehicles it finds to the previous sample by box
+overlap and a perceptual hash of their appearance, and reports a vehicle
+once it has stayed for the configured dwell time.
+
+A DwellSampler runs the monitor on its own thread. The video loop offers it
+frames; it takes one only when a sample is due and the previous one has
+finished, so the red-light pipeline never waits on it.
+"""
+
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2 as cv
+import numpy as np
+
+from detector_backends import Detections
+from iou_tracker import greedy_assignment, iou_matrix
+from rules import points_in_polygon
+
+logger = logging.getLogger(__name__)
+
+
+def appearance_hash(image: np.ndarray) -> int:
+    """
+    64-bit difference hash of an image crop
+
+    Robust to small shifts, lighting and compression changes, so the same
+    parked vehicle keeps nearly the same hash across samples.
+    """
+    if image.size == 0:
+        return 0
+    gray = cv.cvtColor(image, cv.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv.resize(gray, (9, 8), interpolation=cv.INTER_AREA).astype(np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def hash_distance(a: int, b: int) -> int:
+    """Number of differing bits between two appearance hashes"""
+    return bin(a ^ b).count('1')
+
+
+class DwellMonitor:
+    """
+    Matches stationary vehicles in restricted zones across sparse samples
+    """
+
+    def __init__(self, detect: Callable[[np.ndarray], Detections],
+                 zones: Sequence[Sequence[Tuple[float, float]]], max_dwell_s: float = 60.0,
+                 iou_threshold: float = 0.5, max_hash_distance: int = 12, max_missed: int = 1):
+        """
+        Initialize the monitor
+
+        Args:
+            detect: Runs detection on an image region and returns Detections
+            zones: Restricted-zone polygons in working-resolution pixels
+            max_dwell_s: Longest a vehicle may stay in a zone
+            iou_threshold: Least box overlap between samples for the same vehicle
+            max_hash_distance: Most appearance-hash bits that may differ for the same vehicle
+            max_missed: Samples a vehicle may be missing (occlusion) before it is forgotten
+        """
+        if not zones:
+            raise ValueError("Dwell detection needs at least one restricted zone")
+        self.detect = detect
+        self.zones = [np.asarray(zone, dtype=np.float64) for zone in zones]
+        self.max_dwell_s = max_dwell_s
+        self.iou_threshold = iou_threshold
+        self.max_hash_distance = max_hash_distance
+        self.max_missed = max_missed
+        self.samples = 0
+        self._next_id = 1
+        # Parked-vehicle candidates: id, box, hash, first_seen, missed, zone, reported
+        self._candidates = []
+
+    def _zone_regions(self, frame_shape: Tuple[int, ...]) -> List[Tuple[int, int, int, int]]:
+        height, width = frame_shape[:2]
+        regions = []
+        for zone in self.zones:
+            x1, y1 = np.floor(zone.min(axis=0)).astype(int)
+            x2, y2 = np.ceil(zone.max(axis=0)).astype(int)
+            regions.append((max(0, x1), max(0, y1), min(width, x2), min(height, y2)))
+        return regions
+
+    def _detect_in_zones(self, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Boxes, classes and zone indices of vehicles standing in a zone"""
+        boxes, classes, zone_ids = [], [], []
+        for zone_id, (x1, y1, x2, y2) in enumerate(self._zone_regions(frame.shape)):
+            if x2 <= x1 or y2 <= y1:
+                continue
+            detections = self.detect(frame[y1:y2, x1:x2])
+            if len(detections) == 0:
+                continue
+            xyxy = detections.xyxy.astype(np.float64) + np.array([x1, y1, x1, y1])
+            anchors = np.stack([(xyxy[:, 0] + xyxy[:, 2]) / 2, xyxy[:, 3]], axis=1)
+            inside = points_in_polygon(anchors, self.zones[zone_id])
+            boxes.append(xyxy[inside])
+            classes.append(detections.cls[inside])
+            zone_ids.append(np.full(int(inside.sum()), zone_id))
+        if not boxes:
+            return np.zeros((0, 4)), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(boxes), np.concatenate(classes), np.concatenate(zone_ids)
+
+    def sample(self, frame: np.ndarray, time_s: float) -> List[Dict]:
+        """
+        Take one sample of the restricted zones
+
+        Args:
+            frame: Working-resolution frame
+            time_s: Frame time in seconds
+
+        Returns:
+            List[Dict]: Vehicles that just exceeded the dwell time
+        """
+        self.samples += 1
+        xyxy, cls, zone_ids = self._detect_in_zones(frame)
+        hashes = [appearance_hash(frame[int(y1):int(y2), int(x1):int(x2)]) for x1, y1, x2, y2 in xyxy]
+
+        previous = self._candidates
+        cost = np.ones((len(previous), len(xyxy)))
+        if previous and len(xyxy):
+            cost = 1.0 - iou_matrix(np.array([c['bbox'] for c in previous]), xyxy)
+            for r, candidate in enumerate(previous):
+                for c, value in enumerate(hashes):
+                    if hash_distance(candidate['hash'], value) > self.max_hash_distance:
+                        cost[r, c] = 2.0
+        rows, cols = greedy_assignment(cost, 1.0 - self.iou_threshold)
+
+        candidates = []
+        for r, c in zip(rows, cols):
+            candidate = previous[r]
+            candidate.update(bbox=xyxy[c], hash=hashes[c], missed=0, cls=int(cls[c]))
+            candidates.append(candidate)
+        for r in np.setdiff1d(np.arange(len(previous)), rows):
+            candidate = previous[r]
+            candidate['missed'] += 1
+            if candidate['missed'] <= self.max_missed:
+                candidates.append(candidate)
+        for c in np.setdiff1d(np.arange(len(xyxy)), cols):
+            candidates.append({'id': self._next_id, 'bbox': xyxy[c], 'hash': hashes[c], 'cls': int(cls[c]),
+                               'zone': int(zone_ids[c]), 'first_seen': time_s, 'missed': 0, 'reported': False})
+            self._next_id += 1
+        self._candidates = candidates
+
+        events = []
+        for candidate in candidates:
+            dwell = time_s - candidate['first_seen']
+            if candidate['missed'] == 0 and not candidate['reported'] and dwell >= self.max_dwell_s:
+                candidate['reported'] = True
+                events.append({'vehicle_id': candidate['id'], 'bbox': candidate['bbox'].tolist(),
+                               'class_id': candidate['cls'], 'zone': candidate['zone'],
+                               'dwell_seconds': round(dwell, 1), 'time_s': time_s})
+        return events
+
+    def stats(self) -> Dict:
+        """Samples taken and vehicles currently in the zones"""
+        return {
+            'samples': self.samples,
+            'candidates': len(self._candidates),
+            'reported': sum(1 for c in self._candidates if c['reported']),
+        }
+
+
+class DwellSampler:
+    """
+    Runs a DwellMonitor on a background thread at a low sample rate
+    """
+
+    def __init__(self, monitor: DwellMonitor, interval_s: float = 5.0):
+        """
+        Initialize the sampler
+
+        Args:
+            monitor: Dwell monitor to feed
+            interval_s: Seconds of video time between samples
+        """
+        self.monitor = monitor
+        self.interval_s = interval_s
+        self.skipped_busy = 0
+        self.sample_ms = 0.0
+        self._last_sample = None
+        self._pending = None
+        self._busy = False
+        self._events = []
+        self._condition = threading.Condition()
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name='dwell-sampler', daemon=True)
+        self._thread.start()
+
+    def offer(self, frame: np.ndarray, time_s: float, source_frame: Optional[np.ndarray] = None) -> bool:
+        """
+        Offer the current frame; it is taken only when a sample is due
+
+        Never blocks: a frame offered while the previous sample is still
+        running is skipped.
+
+        Args:
+            frame: Working-resolution frame
+            time_s: Frame time in seconds
+            source_frame: Decoded frame before resizing, kept for evidence
+
+        Returns:
+            bool: Whether the frame was taken
+        """
+        if self._last_sample is not None and time_s - self._last_sample < self.interval_s:
+            return False
+        with self._condition:
+            if self._busy:
+                self.skipped_busy += 1
+                return False
+            self._busy = True
+            self._last_sample = time_s
+            # The video loop draws on its frames, so the sample keeps its own copy
+            self._pending = (frame.copy(), time_s, source_frame)
+            self._condition.notify_all()
+        return True
+
+    def drain(self) -> List[Dict]:
+        """Violations found since the last call; each carries its sampled frames"""
+        with self._condition:
+            events, self._events = self._events, []
+        return events
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for an in-flight sample to finish"""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._busy, timeout)
+
+    def close(self):
+        """Stop the sampler thread"""
+        with self._condition:
+            self._stop = True
+            self._condition.notify_all()
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._stop)
+                if self._stop:
+                    return
+                frame, time_s, source_frame = self._pending
+                self._pending = None
+            start = time.perf_counter()
+            try:
+                events = self.monitor.sample(frame, time_s)
+            except Exception as e:
+                logger.error(f"❌ Dwell sample failed: {e}")
+                events = []
+            self.sample_ms += (time.perf_counter() - start) * 1000
+            for event in events:
+                event['frame'] = frame
+                event['source_frame'] = source_frame
+                logger.info(f"🅿️ Vehicle {event['vehicle_id']} parked {event['dwell_seconds']:.0f}s in zone {event['zone']}")
+            with self._condition:
+                self._events.extend(events)
+                self._busy = False
+                self._condition.notify_all()
+
+    def stats(self) -> Dict:
+        """Sampling rate and cost"""
+        stats = self.monitor.stats()
+        stats.update({
+            'interval_s': self.interval_s,
+            'skipped_busy': self.skipped_busy,
+            'mean_sample_ms': self.sample_ms / stats['samples'] if stats['samples'] else 0.0,
+        })
+        return stats
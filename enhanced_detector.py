@@ -1,13 +1,13 @@
 import os
 import cv2 as cv
 import numpy as np
-from ultralytics import YOLO
 from datetime import datetime
 from collections import defaultdict
 import time
 import json
 from typing import Dict, List, Tuple, Optional
 import logging
+from model_registry import get_model
 
 def tensor_to_list(obj):
     try:
@@ -43,7 +43,8 @@ class RedLightViolationDetector:
             config: Configuration dictionary
         """
         self.config = config or self._get_default_config()
-        self.model = self._load_model(model_path)
+        self.model_path = model_path
+        self._model = None  # Loaded on first inference
         self.violations = []
         self.violation_timers = {}
         self.object_y_hist = defaultdict(list)
@@ -74,16 +75,28 @@ class RedLightViolationDetector:
             'violation_save_path': 'violations'
         }
     
-    def _load_model(self, model_path: str) -> YOLO:
+    @property
+    def model(self):
+        """YOLO model, fetched from the process-wide registry on first use"""
+        if self._model is None:
+            self._model = self._load_model(self.model_path)
+        return self._model
+    
+    def _load_model(self, model_path: str):
         """Load YOLO model with error handling"""
         try:
             if not os.path.exists(model_path):
                 logger.warning(f"Model {model_path} not found, using default YOLOv8n")
                 model_path = 'yolov8n.pt'
             
-            model = YOLO(model_path)
-            logger.info(f"Model loaded successfully: {model_path}")
-            return model
+            # model.track keeps tracker state on the model, so tracking
+            # detectors get a private copy instead of the shared instance
+            return get_model(
+                model_path,
+                device=self.config.get('device'),
+                task=self.config.get('task'),
+                shared=not self.tracking_available
+            )
         except Exception as e:
             logger.error(f"Error loading model: {e}")
             raise
@@ -1,13 +1,26 @@
 import os
 import cv2 as cv
 import numpy as np
-from ultralytics import YOLO
 from datetime import datetime
-from collections import defaultdict
 import time
 import json
-from typing import Dict, List, Tuple, Optional
+from collections import deque
+from typing import Callable, Dict, List, Tuple, Optional
 import logging
+from detector_backends import DetectorBackend, Detections, create_backend
+from perf_stats import LatencyHistogram, StageTimer
+from iou_tracker import IoUTracker
+from detection_cache import DetectionCache
+from track_timeline import StopLineMonitor, TrackTimeline
+from progress import CancellationToken, ProgressReporter
+from preview import LatestFrameBuffer, PreviewPublisher
+from batching import BatchScheduler
+from stream_ingest import LatestFrameReader, is_live_source
+from pacing import PacingController, build_ladder
+from cascade import CascadeRefiner
+from evidence import extract_evidence
+from rules import RulesEngine
+from dwell import DwellMonitor, DwellSampler
 
 def tensor_to_list(obj):
     try:
@@ -34,22 +47,42 @@ class RedLightViolationDetector:
     Enhanced Red Light Violation Detection System - FIXED VERSION
     """
     
-    def __init__(self, model_path: str = 'yolov8n.pt', config: Dict = None):
+    def __init__(self, model_path: str = 'yolov8n.pt', config: Dict = None,
+                 batch_scheduler: Optional[BatchScheduler] = None):
         """
         Initialize the detector with model and configuration
         
         Args:
             model_path: Path to YOLO model weights
             config: Configuration dictionary
+            batch_scheduler: Shared scheduler that batches this detector's model
+                calls with other streams (see batching.create_detection_scheduler)
         """
         self.config = config or self._get_default_config()
-        self.model = self._load_model(model_path)
+        self.model_path = model_path
+        self._backend = None  # Created on first inference
+        self.batch_scheduler = batch_scheduler
+        self.model_load_time = None
+        self.warmup_time = None
         self.violations = []
         self.violation_timers = {}
-        self.object_y_hist = defaultdict(list)
-        self.saved_ids = set()
+        self.stop_line = StopLineMonitor()
+        self.object_y_hist = self.stop_line.object_y_hist
+        self.saved_ids = self.stop_line.saved_ids
+        self.rules = RulesEngine.from_config(self.config, self.stop_line)
+        self.track_timeline = None
         self.frame_count = 0
         self.start_time = time.time()
+        self.stage_timer = StageTimer(log_interval=self.config.get('timing_log_interval'))
+        self._snapshot_ns = 0
+        self._evidence_detect_ns = 0
+        self._tracker = None
+        self._tracking_mode = None
+        self._tracking_resolved = False
+        self._detection_cache = None
+        self._quality = {}  # Overrides from the pacing controller
+        self._cascade = None
+        self._dwell_sampler = None
         
         # Check if tracking is available
         try:
@@ -58,8 +91,8 @@ class RedLightViolationDetector:
             logger.info("✅ Tracking module (lap) available - full functionality enabled")
         except ImportError:
             self.tracking_available = False
-            logger.warning("⚠️ Tracking module (lap) not available - using detection-only mode")
-            logger.info("💡 Install lap>=0.5.12 for full tracking functionality")
+            logger.warning("⚠️ Tracking module (lap) not available - ByteTrack disabled")
+            logger.info("💡 Install lap>=0.5.12 for ByteTrack, or the built-in IoU tracker will be used")
         
     def _get_default_config(self) -> Dict:
         """Get default configuration"""
@@ -71,23 +104,267 @@ class RedLightViolationDetector:
             'confidence_threshold': 0.5,
             'classes_to_detect': [0, 1, 2, 3, 4, 5, 7, 8, 9, 10, 11, 12],
             'output_resolution': (854, 480),
-            'violation_save_path': 'violations'
+            'violation_save_path': 'violations',
+            'warmup_iterations': 2,
+            'tracker': 'bytetrack'
         }
     
-    def _load_model(self, model_path: str) -> YOLO:
-        """Load YOLO model with error handling"""
+    @property
+    def backend(self) -> DetectorBackend:
+        """Detector backend, created on first inference"""
+        if self._backend is None:
+            load_start = time.perf_counter()
+            self._backend = self._load_backend(self._quality.get('model_path', self.model_path))
+            self.model_load_time = time.perf_counter() - load_start
+            logger.info(f"Model ready in {self.model_load_time:.2f}s")
+        return self._backend
+    
+    @property
+    def model(self):
+        """Underlying model of the active backend (the YOLO model by default)"""
+        return self.backend.model
+    
+    @staticmethod
+    def _resolve_model_path(backend_name: str, model_path: str) -> str:
+        """Fall back to the default YOLOv8n weights when the model file is missing"""
+        if backend_name == 'ultralytics' and not os.path.exists(model_path):
+            logger.warning(f"Model {model_path} not found, using default YOLOv8n")
+            return 'yolov8n.pt'
+        return model_path
+    
+    def _load_backend(self, model_path: str) -> DetectorBackend:
+        """Create the configured detector backend with error handling"""
+        backend_name = self.config.get('backend', 'ultralytics')
         try:
-            if not os.path.exists(model_path):
-                logger.warning(f"Model {model_path} not found, using default YOLOv8n")
-                model_path = 'yolov8n.pt'
+            model_path = self._resolve_model_path(backend_name, model_path)
             
-            model = YOLO(model_path)
-            logger.info(f"Model loaded successfully: {model_path}")
-            return model
+            # model.track keeps tracker state on the model, so ByteTrack
+            # detectors get a private copy instead of the shared instance
+            uses_bytetrack = self.tracking_available and self.config.get('tracker', 'bytetrack') == 'bytetrack'
+            return create_backend(backend_name, model_path, self.config, shared=not uses_bytetrack)
         except Exception as e:
             logger.error(f"Error loading model: {e}")
             raise
     
+    @property
+    def tracking_mode(self) -> Optional[str]:
+        """
+        How track IDs are produced: 'backend' (ByteTrack through model.track),
+        'builtin' (IoUTracker over plain detections) or None (detection-only)
+        """
+        if not self._tracking_resolved:
+            self._tracking_mode = self._resolve_tracking_mode()
+            self._tracking_resolved = True
+        return self._tracking_mode
+    
+    def _resolve_tracking_mode(self) -> Optional[str]:
+        """Pick the tracking mode from config 'tracker' and what is installed"""
+        tracker = self.config.get('tracker', 'bytetrack')
+        if tracker == 'none':
+            return None
+        if tracker == 'bytetrack':
+            if self.batch_scheduler is not None:
+                # model.track keeps one stream's state on the model, so it cannot be batched
+                logger.info("Batched detection - using built-in IoU tracker instead of ByteTrack")
+                return 'builtin'
+            if self.tracking_available and self.backend.supports_tracking:
+                return 'backend'
+            logger.info("ByteTrack unavailable for this backend - using built-in IoU tracker")
+        elif tracker != 'iou':
+            raise ValueError(f"Unknown tracker: {tracker}")
+        return 'builtin'
+    
+    @property
+    def tracker(self) -> IoUTracker:
+        """Built-in tracker, created on first use"""
+        if self._tracker is None:
+            self._tracker = IoUTracker(
+                iou_threshold=self.config.get('tracker_iou_threshold', 0.2),
+                max_age=self.config.get('tracker_max_age', 10),
+                solver=self.config.get('tracker_solver', 'greedy')
+            )
+        return self._tracker
+    
+    @property
+    def cascade(self) -> Optional[CascadeRefiner]:
+        """Larger-model refiner from config 'cascade_model_path', created on first use"""
+        cascade_model_path = self.config.get('cascade_model_path')
+        if self._cascade is None and cascade_model_path:
+            backend_name = self.config.get('backend', 'ultralytics')
+            self._cascade = CascadeRefiner(
+                lambda: create_backend(backend_name, cascade_model_path, self.config),
+                margin=self.config.get('cascade_margin_px', 60),
+                mode=self.config.get('cascade_mode', 'crop'),
+                padding=self.config.get('cascade_padding', 32)
+            )
+        return self._cascade
+    
+    def _inference_kwargs(self) -> Dict:
+        """Keyword arguments shared by every model call"""
+        return {
+            'classes': self.config.get('classes_to_detect', [0, 1, 2, 3, 4, 5, 7, 8, 9, 10, 11, 12]),
+            'conf': self.config.get('confidence_threshold', 0.5),
+            'imgsz': self._quality.get('inference_size', self.config.get('inference_size'))
+        }
+    
+    def _run_model(self, frame: np.ndarray, persist: bool = True, is_red: bool = False) -> Detections:
+        """Run tracking or detection on a frame, depending on availability"""
+        if self.tracking_mode == 'backend':
+            detections = self.backend.track(frame, persist=persist, **self._inference_kwargs())
+            return self._refine(frame, detections, is_red)
+        
+        if self.batch_scheduler is not None:
+            detections = self.batch_scheduler.run(frame)
+        else:
+            detections = self.backend.detect(frame, **self._inference_kwargs())
+        # Refine before tracking so boxes added by the larger model get IDs
+        detections = self._refine(frame, detections, is_red)
+        if self.tracking_mode == 'builtin' and persist:
+            track_start = time.perf_counter()
+            detections.ids = self.tracker.update(detections.xyxy, detections.cls)
+            detections.speed['tracking'] = (time.perf_counter() - track_start) * 1000
+        return detections
+    
+    def detect_batch(self, frames: List[np.ndarray]) -> List[Detections]:
+        """
+        Detection-only inference on independent frames in one backend call
+        
+        No tracker state is read or written, so frames from different
+        callers or cameras can share a batch.
+        
+        Args:
+            frames: BGR frames at the working resolution
+            
+        Returns:
+            List[Detections]: Detections for each frame, in order
+        """
+        return self.backend.detect_batch(frames, **self._inference_kwargs())
+    
+    def _apply_quality(self, settings: Dict):
+        """Apply pacing overrides; a model-size change reloads the backend"""
+        previous_model = self._quality.get('model_path')
+        self._quality = dict(settings)
+        if settings.get('model_path') != previous_model and self.batch_scheduler is None:
+            # Only offered with the built-in tracker, whose IDs survive the swap
+            self._backend = None
+    
+    def _refine(self, frame: np.ndarray, detections: Detections, is_red: bool) -> Detections:
+        """Run the cascade's larger model on imminent stop-line crossings"""
+        cascade = self.cascade
+        if cascade is None:
+            return detections
+        kwargs = dict(self._inference_kwargs(), imgsz=self.config.get('cascade_inference_size'))
+        return cascade.refine(frame, detections, is_red, self.config.get('line_y_threshold', 310), kwargs)
+    
+    def _evidence_detector(self):
+        """Detector for the optional second pass on full-resolution snapshots"""
+        if not self.config.get('snapshot_refine', False):
+            return None
+        kwargs = dict(self._inference_kwargs(), imgsz=self.config.get('snapshot_inference_size'))
+        if self.cascade is not None:
+            run = lambda crop: self.cascade.backend.detect(crop, **kwargs)
+        elif self.batch_scheduler is not None:
+            run = self.batch_scheduler.run
+        else:
+            run = lambda crop: self.backend.detect(crop, **kwargs)
+        
+        def detect(crop):
+            start = time.perf_counter_ns()
+            try:
+                return run(crop)
+            finally:
+                elapsed_ns = time.perf_counter_ns() - start
+                self.stage_timer.record('evidence_detect', elapsed_ns)
+                self._evidence_detect_ns += elapsed_ns
+        return detect
+    
+    def _detect(self, frame: np.ndarray, is_red: bool = False) -> Detections:
+        """Detections for the current frame, replayed from the cache when possible"""
+        cache = self._detection_cache
+        stage_start = time.perf_counter_ns()
+        if cache is not None:
+            cached = cache.get(self.frame_count)
+            if cached is not None:
+                self.stage_timer.record('inference', time.perf_counter_ns() - stage_start)
+                return cached
+        
+        detections = self._run_model(frame, is_red=is_red)
+        self._record_model_timing(detections, time.perf_counter_ns() - stage_start)
+        if cache is not None:
+            cache.put(self.frame_count, detections)
+        return detections
+    
+    def _open_detection_cache(self, video_path: str) -> Optional[DetectionCache]:
+        """Open the detection cache for a video when 'detection_cache_dir' is set"""
+        cache_dir = self.config.get('detection_cache_dir')
+        if not cache_dir:
+            return None
+        try:
+            cache = DetectionCache.for_video(cache_dir, video_path, self.model_path, self.config,
+                                             self.tracking_available)
+        except Exception as e:
+            logger.warning(f"Detection cache disabled: {e}")
+            return None
+        if cache.complete:
+            logger.info("⚡ Replaying cached detections - inference skipped")
+        elif len(cache):
+            # Track IDs restart with the tracker, so a partial cache cannot be
+            # continued; detection runs from the first frame again
+            logger.info("Discarding partial detection cache")
+            cache.clear()
+        return cache
+    
+    def warmup(self, iterations: int = None) -> float:
+        """
+        Run the model on blank frames so graph setup, allocator growth and
+        the tracker import happen before the first real frame
+        
+        Args:
+            iterations: Number of warm-up passes (defaults to config 'warmup_iterations')
+            
+        Returns:
+            float: Warm-up time in seconds, excluding model load
+        """
+        if iterations is None:
+            iterations = self.config.get('warmup_iterations', 2)
+        
+        # Load the model first so its cost is reported separately
+        if self.batch_scheduler is None:
+            self.backend
+        
+        width, height = self.config.get('output_resolution', (854, 480))
+        dummy_frame = np.zeros((height, width, 3), dtype=np.uint8)
+        
+        warmup_start = time.perf_counter()
+        for _ in range(iterations):
+            # persist=False so warm-up frames leave no tracker state behind
+            self._run_model(dummy_frame, persist=False)
+        self.warmup_time = time.perf_counter() - warmup_start
+        
+        logger.info(f"Model warm-up: {iterations} pass(es) in {self.warmup_time:.2f}s")
+        return self.warmup_time
+    
+    def _record_model_timing(self, detections: Detections, elapsed_ns: int):
+        """Split a model call into inference and tracking time"""
+        speed = detections.speed
+        tracking_ns = int(speed['tracking'] * 1e6) if 'tracking' in speed else None
+        model_ns = int(sum(speed.get(k) or 0 for k in ('preprocess', 'inference', 'postprocess')) * 1e6)
+        if not model_ns or model_ns > elapsed_ns:
+            model_ns = elapsed_ns - (tracking_ns or 0)
+        self.stage_timer.record('inference', model_ns)
+        if tracking_ns is not None:
+            self.stage_timer.record('tracking', tracking_ns)
+        elif self.tracking_mode == 'backend':
+            # Whatever the predictor did not account for is tracker update time
+            self.stage_timer.record('tracking', elapsed_ns - model_ns)
+    
+    def get_startup_latency(self) -> Dict:
+        """Get cold-start costs, kept apart from steady-state throughput"""
+        return {
+            'model_load_time': self.model_load_time,
+            'warmup_time': self.warmup_time
+        }
+    
     def is_red_light(self, cap: cv.VideoCapture) -> bool:
         """
         Check if traffic light is red based on video timestamp
@@ -100,13 +377,38 @@ class RedLightViolationDetector:
         """
         try:
             current_pos_ms = cap.get(cv.CAP_PROP_POS_MSEC)
-            current_pos_seconds = current_pos_ms / 1000.0
-            red_light_start_time = self.config.get('red_light_start_time', 12)
-            return current_pos_seconds > red_light_start_time
+            return self.is_red_light_at(current_pos_ms / 1000.0)
         except Exception as e:
             logger.error(f"Error checking red light status: {e}")
             return False
     
+    def is_red_light_at(self, seconds: float) -> bool:
+        """Check if traffic light is red at a time in seconds from the start of the source"""
+        return seconds > self.config.get('red_light_start_time', 12)
+    
+    def _stream_signal(self, source, signal_state: Optional[Callable[[float], bool]] = None
+                       ) -> Callable[[float, float], bool]:
+        """
+        Signal state for stream frames, from (wall-clock time, seconds since the first frame)
+        
+        A camera needs a real signal input: a callback, or a fixed-time plan in
+        config 'signal_cycle' ({'red_s', 'green_s', 'offset_s'}, with cycles
+        counted from the Unix epoch so the phase survives restarts). Only a file
+        standing in for a camera may fall back to 'red_light_start_time'.
+        """
+        if signal_state is not None:
+            return lambda wall_time, elapsed: bool(signal_state(wall_time))
+        cycle = self.config.get('signal_cycle')
+        if cycle:
+            red_s, green_s = float(cycle['red_s']), float(cycle['green_s'])
+            offset_s = float(cycle.get('offset_s', 0.0))
+            if red_s <= 0 or green_s < 0:
+                raise ValueError("signal_cycle needs red_s > 0 and green_s >= 0")
+            return lambda wall_time, elapsed: (wall_time - offset_s) % (red_s + green_s) < red_s
+        if is_live_source(source):
+            raise ValueError("Live streams need a signal input: pass signal_state or set config 'signal_cycle'")
+        return lambda wall_time, elapsed: self.is_red_light_at(elapsed)
+    
     def draw_traffic_light(self, frame: np.ndarray, is_red: bool) -> np.ndarray:
         """
         Draw traffic light indicator on frame
@@ -145,25 +447,106 @@ class RedLightViolationDetector:
                 del self.violation_timers[vehicle_id]
         return False
     
-    def save_violation_image(self, frame: np.ndarray, bbox: List[float], vehicle_id: int):
-        """Save violation screenshot"""
+    def _open_dwell_sampler(self) -> Optional[DwellSampler]:
+        """Low-rate parking sampler when 'illegal_parking' sets 'sample_interval_s'"""
+        params = (self.config.get('rule_params') or {}).get('illegal_parking', {})
+        if ('illegal_parking' not in self.config.get('violation_rules', ['red_light_violation'])
+                or not params.get('sample_interval_s')):
+            return None
+        monitor = DwellMonitor(
+            self._dwell_detector(),
+            params.get('zones', ()),
+            max_dwell_s=params.get('max_dwell_s', 60.0),
+            iou_threshold=params.get('match_iou', 0.5),
+            max_hash_distance=params.get('max_hash_distance', 12),
+            max_missed=params.get('max_missed', 1)
+        )
+        return DwellSampler(monitor, params['sample_interval_s'])
+    
+    def _dwell_detector(self) -> Callable[[np.ndarray], Detections]:
+        """Detection for parking samples, kept off the tracking model"""
+        if self.batch_scheduler is not None:
+            return self.batch_scheduler.run
+        # The tracking model is not thread-safe, so samples get their own backend
+        backend_name = self.config.get('backend', 'ultralytics')
+        model_path = self._resolve_model_path(backend_name, self.config.get('parking_model_path') or self.model_path)
+        kwargs = self._inference_kwargs()
+        backend = None
+        
+        def detect(image: np.ndarray) -> Detections:
+            nonlocal backend
+            if backend is None:
+                backend = create_backend(backend_name, model_path, self.config, shared=False)
+            return backend.detect(image, **kwargs)
+        return detect
+    
+    def _close_dwell_sampler(self) -> Optional[Dict]:
+        """Finish the last parking sample, record its violations and stop the sampler"""
+        sampler = self._dwell_sampler
+        if sampler is None:
+            return None
+        sampler.flush(timeout=30)
+        for event in sampler.drain():
+            self._save_dwell_violation(event)
+        sampler.close()
+        self._dwell_sampler = None
+        return sampler.stats()
+    
+    def _save_dwell_violation(self, event: Dict):
+        """Save a parking violation found by the sampler, from the frame it sampled"""
+        self.save_violation_image(event['frame'], event['bbox'], event['vehicle_id'], event['source_frame'],
+                                  'illegal_parking', {'dwell_seconds': event['dwell_seconds'],
+                                                      'zone': event['zone'], 'sample_time_s': event['time_s']})
+    
+    def _violations_by_type(self) -> Dict:
+        """Violation counts for each enabled rule"""
+        counts = {violation_type: 0 for violation_type in self.config.get('violation_rules', ['red_light_violation'])}
+        for violation in self.violations:
+            counts[violation['violation_type']] = counts.get(violation['violation_type'], 0) + 1
+        return counts
+    
+    def save_violation_image(self, frame: np.ndarray, bbox: List[float], vehicle_id: int,
+                             source_frame: np.ndarray = None, violation_type: str = 'red_light_violation',
+                             details: Dict = None):
+        """
+        Save violation screenshot
+        
+        Args:
+            frame: Working-resolution frame the box was detected on
+            bbox: [x1, y1, x2, y2] in working-resolution pixels
+            vehicle_id: Violating vehicle
+            source_frame: Decoded frame before resizing; the snapshot is cut
+                from it when 'full_resolution_snapshots' is on
+            violation_type: Key in config.VIOLATION_TYPES
+            details: Rule-specific measurements for the record
+        """
         try:
             # Create violations directory if it doesn't exist
             violations_dir = self.config.get('violation_save_path', 'violations')
             os.makedirs(violations_dir, exist_ok=True)
             
-            # Extract bounding box coordinates
-            x1, y1, x2, y2 = map(int, bbox)
-            
-            # Add padding to the bounding box
-            padding = 20
-            x1 = max(0, x1 - padding)
-            y1 = max(0, y1 - padding)
-            x2 = min(frame.shape[1], x2 + padding)
-            y2 = min(frame.shape[0], y2 + padding)
-            
-            # Crop the violation area
-            violation_img = frame[y1:y2, x1:x2]
+            stage_start = time.perf_counter_ns()
+            detect_ns_before = self._evidence_detect_ns
+            source_bbox = None
+            # Only a source larger than the working frame adds detail to the snapshot
+            if (source_frame is not None and self.config.get('full_resolution_snapshots', True)
+                    and source_frame.shape[1] > frame.shape[1]):
+                # Crop the violation area from the source frame
+                violation_img, source_bbox = extract_evidence(
+                    source_frame, bbox, (frame.shape[1], frame.shape[0]), detect=self._evidence_detector())
+            else:
+                # Extract bounding box coordinates
+                x1, y1, x2, y2 = map(int, bbox)
+                
+                # Add padding to the bounding box
+                padding = 20
+                x1 = max(0, x1 - padding)
+                y1 = max(0, y1 - padding)
+                x2 = min(frame.shape[1], x2 + padding)
+                y2 = min(frame.shape[0], y2 + padding)
+                
+                # Crop the violation area
+                violation_img = frame[y1:y2, x1:x2]
             
             # Save the image
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
@@ -171,119 +554,138 @@ class RedLightViolationDetector:
             filepath = os.path.join(violations_dir, filename)
             
             cv.imwrite(filepath, violation_img)
+            # Evidence re-detection is timed as its own stage
+            elapsed_ns = time.perf_counter_ns() - stage_start
+            self.stage_timer.record('snapshot_io', elapsed_ns - (self._evidence_detect_ns - detect_ns_before))
+            self._snapshot_ns += elapsed_ns
             logger.info(f"Violation screenshot saved: {filepath}")
             
             # Add to violations list
             self.violations.append({
                 'vehicle_id': vehicle_id,
+                'violation_type': violation_type,
+                'details': details or {},
                 'timestamp': timestamp,
+                'frame_number': self.frame_count,
                 'bbox': bbox,
+                'source_bbox': source_bbox,
                 'image_path': filepath
             })
             
         except Exception as e:
             logger.error(f"Error saving violation image: {e}")
     
-    def process_frame(self, frame: np.ndarray, cap: cv.VideoCapture) -> Tuple[np.ndarray, Dict]:
+    def process_frame(self, frame: np.ndarray, cap: cv.VideoCapture = None,
+                      timestamp: float = None, is_red: Optional[bool] = None) -> Tuple[np.ndarray, Dict]:
         """
         Process a single frame for vehicle detection and violation analysis
         
         Args:
             frame: Input frame
-            cap: Video capture object
+            cap: Video capture object; its position gives the frame time
+            timestamp: Frame time in seconds from the start of the source, used
+                instead of the capture position (live streams). One of cap and
+                timestamp is required.
+            is_red: Signal state from a live signal input, instead of the
+                'red_light_start_time' offset
             
         Returns:
             Tuple[np.ndarray, Dict]: Processed frame and statistics
         """
+        if cap is None and timestamp is None:
+            raise ValueError("process_frame needs either a capture or a frame timestamp")
+        timer = self.stage_timer
+        
         # Resize frame for processing
+        stage_start = time.perf_counter_ns()
         output_resolution = self.config.get('output_resolution', (854, 480))
         frame_resized = cv.resize(frame, output_resolution)
+        timer.record('resize', time.perf_counter_ns() - stage_start)
         
-        # Run detection with fallback for configuration
-        classes_to_detect = self.config.get('classes_to_detect', [0, 1, 2, 3, 4, 5, 7, 8, 9, 10, 11, 12])
-        confidence_threshold = self.config.get('confidence_threshold', 0.5)
-        
-        if self.tracking_available:
-            # Use tracking if available
-            results = self.model.track(
-                frame_resized, 
-                persist=True, 
-                classes=classes_to_detect,
-                conf=confidence_threshold
-            )
-        else:
-            # Use detection-only mode
-            results = self.model(
-                frame_resized,
-                classes=classes_to_detect,
-                conf=confidence_threshold
-            )
+        # The signal state also gates the cascade's larger model
+        if timestamp is None:
+            timestamp = cap.get(cv.CAP_PROP_POS_MSEC) / 1000.0
+        if is_red is None:
+            is_red = self.is_red_light_at(timestamp)
+        
+        # Run tracking, or detection-only mode when lap is missing
+        detections = self._detect(frame_resized, is_red)
         
-        # Get annotated frame
-        annotated_frame = results[0].plot()
+        # Parking zones are sampled at a low rate on their own thread
+        if self._dwell_sampler is not None:
+            self._dwell_sampler.offer(frame_resized, timestamp, frame)
+        
+        # Get annotated frame, unless pacing turned annotation off
+        stage_start = time.perf_counter_ns()
+        annotate = self._quality.get('annotate', True)
+        annotated_frame = detections.plot(frame_resized) if annotate else frame_resized
         
         # Draw detection zone
-        cv.line(annotated_frame, (10, 300), (844, 315), (0, 0, 255), thickness=2)
-        cv.line(annotated_frame, (844, 0), (844, 315), (0, 0, 255), thickness=2)
-        cv.line(annotated_frame, (10, 0), (10, 300), (0, 0, 255), thickness=2)
+        if annotate:
+            cv.line(annotated_frame, (10, 300), (844, 315), (0, 0, 255), thickness=2)
+            cv.line(annotated_frame, (844, 0), (844, 315), (0, 0, 255), thickness=2)
+            cv.line(annotated_frame, (10, 0), (10, 300), (0, 0, 255), thickness=2)
+        plotting_ns = time.perf_counter_ns() - stage_start
         
         # Check for violations
-        is_red = self.is_red_light(cap)
+        stage_start = time.perf_counter_ns()
+        self._snapshot_ns = 0
         active_vehicles = 0
+        if self.track_timeline is not None:
+            self.track_timeline.append(self.frame_count, timestamp, is_red, detections)
+        
+        # Tracking mode - every enabled rule reads the same per-frame track state
+        for event in self.rules.update(timestamp, is_red, detections):
+            vehicle_id = event['vehicle_id']
+            self.violation_timers[vehicle_id] = 0
+            self.save_violation_image(frame_resized, detections.xyxy[event['index']].tolist(), vehicle_id, frame,
+                                      event['violation_type'], event['details'])
+        if self._dwell_sampler is not None:
+            for event in self._dwell_sampler.drain():
+                self._save_dwell_violation(event)
         
         # Handle both tracking and detection modes
-        if is_red and hasattr(results[0].boxes, 'id') and results[0].boxes.id is not None:
-            # Tracking mode - use vehicle IDs
-            for box in results[0].boxes:
-                vehicle_id = int(box.id)
-                active_vehicles += 1
-                
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                start_y = y2 - 20
-                
-                self.object_y_hist[vehicle_id].append(start_y)
-                
-                if len(self.object_y_hist[vehicle_id]) >= 2:
-                    prev_y = self.object_y_hist[vehicle_id][-2]
-                    curr_y = self.object_y_hist[vehicle_id][-1]
-                    
-                    # Check if line crossed
-                    line_y_threshold = self.config.get('line_y_threshold', 310)
-                    if (prev_y < line_y_threshold and 
-                        curr_y >= line_y_threshold and 
-                        vehicle_id not in self.saved_ids):
-                        
-                        self.violation_timers[vehicle_id] = 0
-                        self.save_violation_image(frame_resized, box.xyxy[0], vehicle_id)
-                        self.saved_ids.add(vehicle_id)
+        if detections.ids is not None:
+            for bbox, vehicle_id in zip(detections.xyxy, detections.ids):
+                vehicle_id = int(vehicle_id)
+                if is_red:
+                    active_vehicles += 1
+                x1, y1, x2, y2 = map(int, bbox)
                 
-                # Flash violation indicator
-                if self.should_flash_vehicle(vehicle_id):
+                # Flash violation indicator; parking and speeding violations happen on green too
+                if self.should_flash_vehicle(vehicle_id) and annotate:
                     cv.rectangle(annotated_frame, (x1, y1), (x2, y2), (0, 0, 255), 4)
                     cv.putText(annotated_frame, "VIOLATION!", (x2-80, y2+25), 
                               cv.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-        else:
+        elif is_red:
             # Detection-only mode - count all detected vehicles
-            if is_red and results[0].boxes is not None:
-                for box in results[0].boxes:
-                    active_vehicles += 1
-                    # Draw bounding box for all detected vehicles
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    cv.rectangle(annotated_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-        
-        # Draw traffic light and stats
-        annotated_frame = self.draw_traffic_light(annotated_frame, is_red)
+            for bbox in detections.xyxy:
+                active_vehicles += 1
+                if not annotate:
+                    continue
+                # Draw bounding box for all detected vehicles
+                x1, y1, x2, y2 = map(int, bbox)
+                cv.rectangle(annotated_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
         
-        # Draw stats box
-        cv.rectangle(annotated_frame, (5, 4), (275, 65), (0, 0, 0), 2)
-        cv.rectangle(annotated_frame, (5, 4), (275, 65), (255, 255, 255), -1)
+        # Snapshot writes are reported as their own stage
+        timer.record('violation_logic', time.perf_counter_ns() - stage_start - self._snapshot_ns)
         
-        cv.putText(annotated_frame, f"Active Vehicles: {active_vehicles}", 
-                  (25, 20), cv.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
-        cv.putText(annotated_frame, f"Violations: {len(self.violations)}", 
-                  (25, 40), cv.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
-        cv.putText(annotated_frame, f"Light: {'RED' if is_red else 'GREEN'}", 
-                  (25, 60), cv.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255) if is_red else (0, 255, 0), 2)
+        # Draw traffic light and stats
+        stage_start = time.perf_counter_ns()
+        if annotate:
+            annotated_frame = self.draw_traffic_light(annotated_frame, is_red)
+            
+            # Draw stats box
+            cv.rectangle(annotated_frame, (5, 4), (275, 65), (0, 0, 0), 2)
+            cv.rectangle(annotated_frame, (5, 4), (275, 65), (255, 255, 255), -1)
+            
+            cv.putText(annotated_frame, f"Active Vehicles: {active_vehicles}", 
+                      (25, 20), cv.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
+            cv.putText(annotated_frame, f"Violations: {len(self.violations)}", 
+                      (25, 40), cv.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
+            cv.putText(annotated_frame, f"Light: {'RED' if is_red else 'GREEN'}", 
+                      (25, 60), cv.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255) if is_red else (0, 255, 0), 2)
+        timer.record('plotting', plotting_ns + time.perf_counter_ns() - stage_start)
         
         return annotated_frame, {
             'active_vehicles': active_vehicles,
@@ -292,17 +694,86 @@ class RedLightViolationDetector:
             'frame_count': self.frame_count
         }
     
-    def process_video(self, video_path: str, output_path: str = None) -> Dict:
+    def _open_video_writer(self, output_path: str, output_fps: float,
+                           output_resolution: Tuple[int, int]) -> Tuple[cv.VideoWriter, str]:
+        """
+        Open a video writer, preferring browser-friendly codecs
+        
+        Args:
+            output_path: Output video path
+            output_fps: Output frame rate
+            output_resolution: Output (width, height)
+            
+        Returns:
+            Tuple of (video writer, codec name)
+        """
+        # specific codec selection strategy
+        codecs_to_try = [
+            {'name': 'avc1', 'ext': 'mp4'}, 
+            {'name': 'h264', 'ext': 'mp4'},
+            {'name': 'vp09', 'ext': 'webm'},
+            {'name': 'vp80', 'ext': 'webm'}
+        ]
+        
+        out = None
+        used_codec = None
+        
+        for codec in codecs_to_try:
+            try:
+                logger.info(f"Trying codec: {codec['name']}")
+                fourcc = cv.VideoWriter_fourcc(*codec['name'])
+                temp_out = cv.VideoWriter(output_path, fourcc, output_fps, output_resolution)
+                
+                if temp_out.isOpened():
+                    out = temp_out
+                    used_codec = codec['name']
+                    logger.info(f"✅ Successfully initialized {codec['name']} codec")
+                    break
+            except Exception as e:
+                logger.warning(f"Codec {codec['name']} failed: {e}")
+                continue
+
+        # Fallback to mp4v if all browser-friendly codecs fail
+        if out is None:
+            logger.warning("All browser-friendly codecs failed. Falling back to specific mp4v")
+            fourcc = cv.VideoWriter_fourcc(*'mp4v')
+            out = cv.VideoWriter(output_path, fourcc, output_fps, output_resolution)
+            used_codec = 'mp4v'
+        
+        # Verify video writer is initialized
+        if not out.isOpened():
+            logger.error(f"Failed to initialize video writer for: {output_path}")
+            raise RuntimeError(f"Could not create output video: {output_path}")
+        else:
+            logger.info(f"✅ Video writer initialized successfully: {output_path} with codec {used_codec}")
+        
+        return out, used_codec
+    
+    def process_video(self, video_path: str, output_path: str = None,
+                      progress_callback: Optional[Callable[[Dict], None]] = None,
+                      cancel_token: Optional[CancellationToken] = None,
+                      preview_buffer: Optional[LatestFrameBuffer] = None) -> Dict:
         """
         Process entire video file - FIXED VERSION
         
         Args:
-            video_path: Path to input video
+            video_path: Path to input video; stream URLs and device indexes are
+                handed to process_stream
             output_path: Path for output video (optional)
+            progress_callback: Receives progress reports (frames done, fps, ETA and
+                latest violations), at most once per config 'progress_interval' seconds
+            cancel_token: Checked on every frame; when cancelled, processing stops and
+                the partial results are returned with 'cancelled' set
+            preview_buffer: Receives downscaled JPEG annotated frames at up to
+                config 'preview_fps' per second, latest frame winning
             
         Returns:
             Dict: Processing results and statistics
         """
+        if is_live_source(video_path):
+            return self.process_stream(video_path, output_path, progress_callback=progress_callback,
+                                       cancel_token=cancel_token, preview_buffer=preview_buffer)
+        
         if not os.path.exists(video_path):
             raise FileNotFoundError(f"Video file not found: {video_path}")
         
@@ -320,6 +791,7 @@ class RedLightViolationDetector:
         
         # Setup output video - FIXED VERSION
         out = None
+        used_codec = None
         processed_frame_count = 0
         
         if output_path:
@@ -336,48 +808,46 @@ class RedLightViolationDetector:
             logger.info(f"Creating output video: {output_path}")
             logger.info(f"Output settings: {output_fps:.1f} FPS, {output_resolution}")
 
-            # specific codec selection strategy
-            codecs_to_try = [
-                {'name': 'avc1', 'ext': 'mp4'}, 
-                {'name': 'h264', 'ext': 'mp4'},
-                {'name': 'vp09', 'ext': 'webm'},
-                {'name': 'vp80', 'ext': 'webm'}
-            ]
-            
-            out = None
-            used_codec = None
-            
-            for codec in codecs_to_try:
-                try:
-                    logger.info(f"Trying codec: {codec['name']}")
-                    fourcc = cv.VideoWriter_fourcc(*codec['name'])
-                    temp_out = cv.VideoWriter(output_path, fourcc, output_fps, output_resolution)
-                    
-                    if temp_out.isOpened():
-                        out = temp_out
-                        used_codec = codec['name']
-                        logger.info(f"✅ Successfully initialized {codec['name']} codec")
-                        break
-                except Exception as e:
-                    logger.warning(f"Codec {codec['name']} failed: {e}")
-                    continue
-
-            # Fallback to mp4v if all browser-friendly codecs fail
-            if out is None:
-                logger.warning("All browser-friendly codecs failed. Falling back to specific mp4v")
-                fourcc = cv.VideoWriter_fourcc(*'mp4v')
-                out = cv.VideoWriter(output_path, fourcc, output_fps, output_resolution)
-                used_codec = 'mp4v'
-            
-            # Verify video writer is initialized
-            if not out.isOpened():
-                logger.error(f"Failed to initialize video writer for: {output_path}")
-                raise RuntimeError(f"Could not create output video: {output_path}")
-            else:
-                logger.info(f"✅ Video writer initialized successfully: {output_path} with codec {used_codec}")
+            out, used_codec = self._open_video_writer(output_path, output_fps, output_resolution)
         
         self.frame_count = 0
         processing_stats = []
+        frame_latencies = []
+        if self._tracker is not None:
+            self._tracker.reset()
+        
+        self.track_timeline = TrackTimeline({
+            'video_path': video_path,
+            'model_path': self.model_path,
+            'fps': fps,
+            'frame_skip': self.config.get('frame_skip', 5),
+            'output_resolution': self.config.get('output_resolution', (854, 480)),
+            'line_y_threshold': self.config.get('line_y_threshold', 310),
+            'red_light_start_time': self.config.get('red_light_start_time', 12)
+        })
+        cache = self._detection_cache = self._open_detection_cache(video_path)
+        replaying = cache is not None and cache.complete
+        finished = False
+        
+        # Pay cold-start costs before the first real frame
+        if not replaying and self.warmup_time is None and self.config.get('warmup_iterations', 2) > 0:
+            self.warmup()
+        
+        # Time this run only, not model load or idle time since __init__
+        self.start_time = time.time()
+        processing_start = time.perf_counter()
+        self.stage_timer.reset()
+        self._dwell_sampler = self._open_dwell_sampler()
+        timer = self.stage_timer
+        reporter = ProgressReporter(progress_callback, total_frames,
+                                    interval=self.config.get('progress_interval', 0.5))
+        previewer = None
+        if preview_buffer is not None:
+            previewer = PreviewPublisher(preview_buffer,
+                                         max_fps=self.config.get('preview_fps', 4.0),
+                                         max_width=self.config.get('preview_width', 480),
+                                         jpeg_quality=self.config.get('preview_jpeg_quality', 70))
+        cancelled = False
         
         logger.info(f"Starting video processing: {video_path}")
         
@@ -385,7 +855,14 @@ class RedLightViolationDetector:
             frame_count = int(cap.get(cv.CAP_PROP_FRAME_COUNT))
             frame_number = 0
             while cap.isOpened() and frame_number < frame_count:
+                if cancel_token is not None and cancel_token.cancelled:
+                    cancelled = True
+                    logger.info(f"⏹ Processing cancelled at frame {self.frame_count}/{total_frames}")
+                    break
+                
+                stage_start = time.perf_counter_ns()
                 ret, frame = cap.read()
+                timer.record('decode', time.perf_counter_ns() - stage_start)
                 if not ret:
                     break
                 # ... your processing ...
@@ -399,7 +876,9 @@ class RedLightViolationDetector:
                     continue
                 
                 # Process frame
+                frame_start = time.perf_counter()
                 processed_frame, stats = self.process_frame(frame, cap)
+                frame_latencies.append(time.perf_counter() - frame_start)
                 processing_stats.append(stats)
                 processed_frame_count += 1
                 
@@ -411,38 +890,305 @@ class RedLightViolationDetector:
                     
                     # Ensure frame is in BGR format
                     if len(processed_frame.shape) == 3 and processed_frame.shape[2] == 3:
+                        stage_start = time.perf_counter_ns()
                         out.write(processed_frame)
+                        timer.record('encoding', time.perf_counter_ns() - stage_start)
                         if processed_frame_count % 10 == 0:  # Log every 10 frames
                             logger.debug(f"Wrote frame {processed_frame_count} to output video")
                     else:
                         logger.warning(f"Invalid frame format at frame {processed_frame_count}")
                 
+                timer.maybe_log()
+                
+                if previewer is not None and processed_frame is not None:
+                    previewer.publish(processed_frame, {'frame_number': self.frame_count,
+                                                        'violations': len(self.violations)})
+                
+                reporter.report(self.frame_count, processed_frame_count, self.violations)
+                
                 # Log progress
                 if self.frame_count % (frame_skip * 10) == 0:
                     progress = (self.frame_count / total_frames) * 100
                     logger.info(f"Processing progress: {progress:.1f}% ({self.frame_count}/{total_frames} frames)")
+            
+            finished = not cancelled
                     
         except Exception as e:
             logger.error(f"Error during video processing: {e}")
             raise
         finally:
             cap.release()
+            dwell = self._close_dwell_sampler()
+            if cache is not None:
+                # Only a full pass is worth keeping; see _open_detection_cache
+                if finished:
+                    cache.save(complete=True)
+                self._detection_cache = None
             if out:
                 out.release()
                 logger.info(f"✅ Video writer released. Processed {processed_frame_count} frames.")
                 logger.info(f"✅ Output video saved: {output_path}")
         
+        reporter.report(self.frame_count, processed_frame_count, self.violations, force=True,
+                        status='cancelled' if cancelled else 'completed')
+        
         # Save results
-        self.save_results()
+        self.save_results(self.config.get('results_path', 'detection_results.json'))
+        timeline_path = self.config.get('track_timeline_path')
+        if timeline_path:
+            self.track_timeline.save(timeline_path)
         
         return {
             'total_frames': self.frame_count,
             'processed_frames': processed_frame_count,
             'total_violations': len(self.violations),
-            'processing_time': time.time() - self.start_time,
+            'cancelled': cancelled,
+            'processing_time': time.perf_counter() - processing_start,
             'stats': processing_stats,
             'output_path': output_path,
-            'used_codec': used_codec
+            'used_codec': used_codec,
+            'startup': self.get_startup_latency(),
+            'steady_state_frame_latency': self._summarize_latencies(frame_latencies),
+            'stage_timings': timer.summary(),
+            'detection_cache': cache.stats() if cache is not None else None,
+            'cascade': self._cascade.stats() if self._cascade is not None else None,
+            'violations_by_type': self._violations_by_type(),
+            'dwell': dwell,
+            'track_timeline_path': timeline_path
+        }
+    
+    def process_stream(self, source, output_path: str = None,
+                       progress_callback: Optional[Callable[[Dict], None]] = None,
+                       cancel_token: Optional[CancellationToken] = None,
+                       preview_buffer: Optional[LatestFrameBuffer] = None,
+                       max_frames: Optional[int] = None, max_seconds: Optional[float] = None,
+                       realtime: Optional[bool] = None,
+                       signal_state: Optional[Callable[[float], bool]] = None) -> Dict:
+        """
+        Process a live stream, always working on the newest frame
+        
+        A reader thread decodes the source and keeps only the latest frame;
+        frames that arrive while a frame is being processed are dropped, so
+        processing never falls behind the camera. Frame times are wall-clock
+        seconds since the first frame. The red-light state comes from
+        signal_state or config 'signal_cycle'; without either, a camera is
+        refused and a file source falls back to 'red_light_start_time'.
+        The stream is reopened with backoff when it fails.
+        
+        Memory stays bounded however long the stream runs: only the latest
+        'stream_stats_window' frame stats and 'stream_timeline_frames' timeline
+        frames are kept, and the rules forget tracks once they end.
+        
+        With config 'latency_slo_ms' set, a PacingController keeps end-to-end
+        frame latency within the SLO by stepping inference size, frame rate,
+        annotation and model size down and back up (see pacing.py).
+        
+        Args:
+            source: RTSP/HTTP URL, device index, or a video file played back
+                at its native rate as a stand-in for a live camera
+            output_path: Path for the annotated output video (optional)
+            progress_callback: Receives progress reports (no total or ETA for streams)
+            cancel_token: Stops processing when cancelled
+            preview_buffer: Receives downscaled JPEG annotated frames
+            max_frames: Stop after processing this many frames
+            max_seconds: Stop after this many seconds
+            realtime: Pace file sources at their frame rate (default: config
+                'stream_realtime', True)
+            signal_state: Called with each frame's wall-clock time (time.time());
+                returns whether the light is red, e.g. from a signal controller feed
+            
+        Returns:
+            Dict: Processing results, ingest counters and statistics
+        """
+        is_red_at = self._stream_signal(source, signal_state)
+        reader = LatestFrameReader(
+            source,
+            realtime=self.config.get('stream_realtime', True) if realtime is None else realtime,
+            backoff_initial=self.config.get('stream_backoff_initial', 0.5),
+            backoff_max=self.config.get('stream_backoff_max', 30.0),
+            max_reconnects=self.config.get('stream_max_reconnects')
+        )
+        output_resolution = self.config.get('output_resolution', (854, 480))
+        out = None
+        used_codec = None
+        processed_frame_count = 0
+        # A stream may run for days, so only recent per-frame stats are kept
+        processing_stats = deque(maxlen=self.config.get('stream_stats_window', 1000))
+        frame_latency = LatencyHistogram()
+        if self._tracker is not None:
+            self._tracker.reset()
+        
+        stream_start = None
+        self.frame_count = 0
+        self.track_timeline = TrackTimeline({
+            'video_path': str(source),
+            'model_path': self.model_path,
+            'live': True,
+            'started_at': time.time(),
+            'output_resolution': output_resolution,
+            'line_y_threshold': self.config.get('line_y_threshold', 310),
+            'red_light_start_time': self.config.get('red_light_start_time', 12),
+            'signal_cycle': self.config.get('signal_cycle'),
+            'signal_callback': signal_state is not None
+        }, max_frames=self.config.get('stream_timeline_frames', 9000))
+        
+        if self.warmup_time is None and self.config.get('warmup_iterations', 2) > 0:
+            self.warmup()
+        
+        self.start_time = time.time()
+        processing_start = time.perf_counter()
+        self.stage_timer.reset()
+        self._dwell_sampler = self._open_dwell_sampler()
+        timer = self.stage_timer
+        reporter = ProgressReporter(progress_callback, 0, interval=self.config.get('progress_interval', 0.5))
+        previewer = None
+        if preview_buffer is not None:
+            previewer = PreviewPublisher(preview_buffer,
+                                         max_fps=self.config.get('preview_fps', 4.0),
+                                         max_width=self.config.get('preview_width', 480),
+                                         jpeg_quality=self.config.get('preview_jpeg_quality', 70))
+        cancelled = False
+        pacing = None
+        if self.config.get('latency_slo_ms'):
+            # A shared batch scheduler owns the model and its input size, an
+            # exported model has a fixed input size, and ByteTrack keeps its IDs
+            # in the model, so a swap would restart them mid-stream and the
+            # stop-line history would mix two ID spaces
+            own_model = self.batch_scheduler is None
+            ladder = build_ladder(self.config, self.model_path, resize=own_model and self.backend.supports_resize,
+                                  swap_models=own_model and self.tracking_mode != 'backend')
+            pacing = PacingController(self.config['latency_slo_ms'], ladder,
+                                      window=self.config.get('slo_window', 20),
+                                      headroom=self.config.get('slo_headroom', 0.6))
+        last_processed = 0
+        
+        logger.info(f"📡 Starting stream processing: {source}")
+        reader.start()
+        try:
+            while True:
+                if cancel_token is not None and cancel_token.cancelled:
+                    cancelled = True
+                    logger.info(f"⏹ Stream processing cancelled after {processed_frame_count} frames")
+                    break
+                if max_seconds is not None and time.perf_counter() - processing_start >= max_seconds:
+                    break
+                
+                # Waiting for the reader thread is reported as decode time
+                stage_start = time.perf_counter_ns()
+                item = reader.read(timeout=0.5)
+                timer.record('decode', time.perf_counter_ns() - stage_start)
+                if item is None:
+                    if reader.ended:
+                        break
+                    continue
+                
+                # Source frame numbers keep counting over dropped frames
+                frame_number, frame, wall_time = item
+                if stream_start is None:
+                    stream_start = wall_time
+                if frame_number - last_processed < self._quality.get('frame_stride', 1):
+                    continue
+                last_processed = frame_number
+                self.frame_count = frame_number
+                
+                frame_start = time.perf_counter_ns()
+                elapsed = wall_time - stream_start
+                processed_frame, stats = self.process_frame(frame, timestamp=elapsed,
+                                                            is_red=is_red_at(wall_time, elapsed))
+                frame_latency.record(time.perf_counter_ns() - frame_start)
+                stats['wall_time'] = wall_time
+                processing_stats.append(stats)
+                processed_frame_count += 1
+                
+                if output_path:
+                    if out is None:
+                        output_dir = os.path.dirname(output_path)
+                        if output_dir:
+                            os.makedirs(output_dir, exist_ok=True)
+                        output_fps = self.config.get('output_fps') or reader.fps or 30
+                        out, used_codec = self._open_video_writer(output_path, output_fps, output_resolution)
+                    stage_start = time.perf_counter_ns()
+                    out.write(processed_frame)
+                    timer.record('encoding', time.perf_counter_ns() - stage_start)
+                
+                timer.maybe_log()
+                
+                if previewer is not None:
+                    previewer.publish(processed_frame, {'frame_number': self.frame_count,
+                                                        'violations': len(self.violations)})
+                
+                reporter.report(self.frame_count, processed_frame_count, self.violations)
+                
+                # End-to-end latency: from decode to a finished result
+                if pacing is not None and pacing.record((time.time() - wall_time) * 1000):
+                    self._apply_quality(pacing.settings())
+                
+                if max_frames is not None and processed_frame_count >= max_frames:
+                    break
+        finally:
+            reader.stop()
+            dwell = self._close_dwell_sampler()
+            if self._quality:
+                self._apply_quality({})
+            if out:
+                out.release()
+                logger.info(f"✅ Output video saved: {output_path}")
+        
+        ingest = reader.stats()
+        logger.info(f"📡 Stream finished: {processed_frame_count} frames processed, "
+                    f"{ingest['frames_dropped']} dropped, {ingest['reconnects']} reconnect(s)")
+        reporter.report(self.frame_count, processed_frame_count, self.violations, force=True,
+                        status='cancelled' if cancelled else 'completed')
+        
+        self.save_results(self.config.get('results_path', 'detection_results.json'))
+        timeline_path = self.config.get('track_timeline_path')
+        if timeline_path:
+            self.track_timeline.save(timeline_path)
+        
+        return {
+            'source': str(source),
+            'total_frames': self.frame_count,
+            'processed_frames': processed_frame_count,
+            'total_violations': len(self.violations),
+            'cancelled': cancelled,
+            'processing_time': time.perf_counter() - processing_start,
+            'stats': list(processing_stats),
+            'output_path': output_path if out is not None else None,
+            'used_codec': used_codec,
+            'ingest': ingest,
+            'pacing': pacing.summary() if pacing is not None else None,
+            'cascade': self._cascade.stats() if self._cascade is not None else None,
+            'violations_by_type': self._violations_by_type(),
+            'dwell': dwell,
+            'startup': self.get_startup_latency(),
+            'steady_state_frame_latency': self._summarize_histogram(frame_latency),
+            'stage_timings': timer.summary(),
+            'track_timeline_path': timeline_path
+        }
+    
+    @staticmethod
+    def _summarize_histogram(histogram: LatencyHistogram) -> Dict:
+        """Summarize per-frame latencies like _summarize_latencies, from a histogram"""
+        summary = histogram.summary()
+        return {
+            'frames': summary['count'],
+            'mean_ms': summary['mean_ms'],
+            'median_ms': summary['p50_ms'],
+            'p95_ms': summary['p95_ms'],
+            'max_ms': summary['max_ms']
+        }
+    
+    @staticmethod
+    def _summarize_latencies(latencies: List[float]) -> Dict:
+        """Summarize per-frame latencies in milliseconds"""
+        if not latencies:
+            return {'frames': 0, 'mean_ms': 0.0, 'median_ms': 0.0, 'max_ms': 0.0}
+        latencies_ms = np.asarray(latencies) * 1000.0
+        return {
+            'frames': len(latencies),
+            'mean_ms': float(latencies_ms.mean()),
+            'median_ms': float(np.median(latencies_ms)),
+            'max_ms': float(latencies_ms.max())
         }
     
     def save_results(self, output_file: str = 'detection_results.json'):
@@ -470,7 +1216,9 @@ class RedLightViolationDetector:
             'total_violations': len(self.violations),
             'active_vehicles': len(self.object_y_hist),
             'processing_time': time.time() - self.start_time,
-            'frame_count': self.frame_count
+            'frame_count': self.frame_count,
+            'model_load_time': self.model_load_time,
+            'warmup_time': self.warmup_time
         }
     
     def _get_class_name(self, class_id: int) -> str:
@@ -0,0 +1,110 @@
+"""
+Full-resolution violation evidence
+
+Detection runs on frames downscaled to the working resolution, so a crop
+taken from that frame is small and blurry. The decoded source frame is
+still in hand while its violations are checked, so the violating box is
+mapped back into it and the snapshot is cut at source resolution instead.
+Optionally a detector runs once more on the full-resolution region alone,
+to tighten a box that was drawn at low resolution. Nothing is kept beyond
+the current frame, and the extra work happens only on violations.
+"""
+
+import logging
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from detector_backends import Detections
+from iou_tracker import iou_matrix
+
+logger = logging.getLogger(__name__)
+
+
+def map_bbox(bbox: List[float], working_resolution: Tuple[int, int],
+             source_shape: Tuple[int, ...]) -> np.ndarray:
+    """
+    Map a working-resolution box into source frame pixels
+
+    Args:
+        bbox: [x1, y1, x2, y2] in working-resolution pixels
+        working_resolution: (width, height) the box was detected at
+        source_shape: Shape of the decoded source frame
+
+    Returns:
+        np.ndarray: [x1, y1, x2, y2] in source pixels
+    """
+    width, height = working_resolution
+    scale_x = source_shape[1] / width
+    scale_y = source_shape[0] / height
+    return np.asarray(bbox, dtype=np.float32) * np.array([scale_x, scale_y, scale_x, scale_y], dtype=np.float32)
+
+
+def padded_region(bbox: np.ndarray, frame_shape: Tuple[int, ...], padding: int) -> Tuple[int, int, int, int]:
+    """
+    Integer crop region around a box with padding, clipped to the frame
+
+    Returns:
+        Tuple of (x1, y1, x2, y2) pixel coordinates
+    """
+    x1, y1, x2, y2 = map(int, bbox)
+    return (max(0, x1 - padding), max(0, y1 - padding),
+            min(frame_shape[1], x2 + padding), min(frame_shape[0], y2 + padding))
+
+
+def refine_bbox(detect: Callable[[np.ndarray], Detections], frame: np.ndarray, bbox: np.ndarray,
+                context: float = 0.5, min_iou: float = 0.3) -> Optional[np.ndarray]:
+    """
+    Re-detect one vehicle on a full-resolution region around its box
+
+    Args:
+        detect: Runs a detector on an image and returns Detections
+        frame: Source frame
+        bbox: Mapped box in source pixels
+        context: Extra region around the box, as a fraction of its size
+        min_iou: Least overlap for a re-detected box to stand for the vehicle
+
+    Returns:
+        np.ndarray: Refined box in source pixels, or None when nothing matched
+    """
+    margin = int(max(bbox[2] - bbox[0], bbox[3] - bbox[1]) * context)
+    x1, y1, x2, y2 = padded_region(bbox, frame.shape, margin)
+    detections = detect(frame[y1:y2, x1:x2])
+    if len(detections) == 0:
+        return None
+    candidates = detections.xyxy + np.array([x1, y1, x1, y1], dtype=np.float32)
+    overlaps = iou_matrix(bbox[None, :], candidates)[0]
+    best = int(np.argmax(overlaps))
+    if overlaps[best] < min_iou:
+        return None
+    return candidates[best]
+
+
+def extract_evidence(source_frame: np.ndarray, bbox: List[float], working_resolution: Tuple[int, int],
+                     padding: int = 20,
+                     detect: Optional[Callable[[np.ndarray], Detections]] = None) -> Tuple[np.ndarray, List[float]]:
+    """
+    Cut a violation snapshot from the source frame
+
+    Args:
+        source_frame: Decoded frame before resizing
+        bbox: [x1, y1, x2, y2] in working-resolution pixels
+        working_resolution: (width, height) the box was detected at
+        padding: Context pixels at working resolution; scaled to the source
+        detect: Optional detector for a second pass on the crop
+
+    Returns:
+        Tuple of (crop, source-pixel box the crop was cut around)
+    """
+    source_bbox = map_bbox(bbox, working_resolution, source_frame.shape)
+    if detect is not None:
+        try:
+            refined = refine_bbox(detect, source_frame, source_bbox)
+            if refined is not None:
+                source_bbox = refined
+        except Exception as e:
+            logger.warning(f"⚠️ Evidence re-detection failed, using the mapped box: {e}")
+
+    scale = source_frame.shape[1] / working_resolution[0]
+    x1, y1, x2, y2 = padded_region(source_bbox, source_frame.shape, int(round(padding * scale)))
+    return source_frame[y1:y2, x1:x2], [float(v) for v in source_bbox]
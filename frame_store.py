@@ -0,0 +1,180 @@
+"""
+Memory-mapped frame store
+
+Decodes a video once, resizes the sampled frames to the working resolution
+and writes them into a uint8 (N, H, W, 3) array on disk. Later passes over
+the same clip, such as re-processing with new settings, saving the
+annotated video or previewing frames, slice the memory map instead of
+decoding again. Frames are returned as read-only views, with no copy.
+"""
+
+import os
+import json
+import shutil
+import logging
+from typing import Dict, Iterator, Optional, Tuple
+
+import cv2 as cv
+import numpy as np
+
+from detection_cache import file_hash
+
+logger = logging.getLogger(__name__)
+
+
+class FrameStore:
+    """
+    Decoded frames of one video at a fixed resolution and sampling stride
+    """
+
+    def __init__(self, frames_path: str):
+        """
+        Open an existing store
+
+        Args:
+            frames_path: Path to the store's .npy frame array
+        """
+        self.path = frames_path
+        with open(self._meta_path(frames_path)) as f:
+            self.metadata = json.load(f)
+        # Containers can over-report their frame count; only decoded rows count
+        self.frames = np.load(frames_path, mmap_mode='r')[:self.metadata['frames']]
+
+    @staticmethod
+    def _meta_path(frames_path: str) -> str:
+        return frames_path[:-len('.npy')] + '.json'
+
+    @classmethod
+    def build(cls, video_path: str, store_dir: str, resolution: Tuple[int, int] = (854, 480),
+              stride: int = 1, reserve_bytes: int = 1 << 30) -> 'FrameStore':
+        """
+        Open the store for a video, decoding it first if needed
+
+        Stores are keyed by the video's content hash, the resolution and the
+        stride, so re-uploads of the same clip reuse the decoded frames.
+
+        Args:
+            video_path: Video to decode
+            store_dir: Directory holding frame stores
+            resolution: Working (width, height)
+            stride: Keep every stride-th frame (the detector's frame_skip)
+            reserve_bytes: Free disk space to leave after writing the store
+
+        Returns:
+            FrameStore: Store for this video
+        """
+        width, height = resolution
+        key = f"{file_hash(video_path)[:16]}_{width}x{height}_s{stride}"
+        frames_path = os.path.join(store_dir, f"{key}.npy")
+        if os.path.exists(frames_path) and os.path.exists(cls._meta_path(frames_path)):
+            logger.info(f"📼 Reusing decoded frames: {frames_path}")
+            return cls(frames_path)
+
+        cap = cv.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video: {video_path}")
+        fps = cap.get(cv.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv.CAP_PROP_FRAME_COUNT))
+        capacity = total_frames // stride
+
+        os.makedirs(store_dir, exist_ok=True)
+        needed = capacity * height * width * 3
+        free = shutil.disk_usage(store_dir).free
+        if needed + reserve_bytes > free:
+            cap.release()
+            raise OSError(f"Frame store needs {needed / 1e9:.1f} GB, only {free / 1e9:.1f} GB free")
+
+        tmp_path = frames_path + '.tmp.npy'
+        frames = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.uint8,
+                                           shape=(capacity, height, width, 3))
+        count = 0
+        frame_number = 0
+        try:
+            while count < capacity:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frame_number += 1
+                if frame_number % stride != 0:
+                    continue
+                # Resize straight into the mapped array
+                cv.resize(frame, (width, height), dst=frames[count])
+                count += 1
+        finally:
+            cap.release()
+            frames.flush()
+            del frames
+
+        metadata = {
+            'video_path': video_path,
+            'fps': fps,
+            'source_frames': frame_number,
+            'stride': stride,
+            'resolution': [width, height],
+            'frames': count,
+        }
+        with open(cls._meta_path(frames_path), 'w') as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(tmp_path, frames_path)
+        logger.info(f"📼 Decoded {count} frames into {frames_path}")
+        return cls(frames_path)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __getitem__(self, index):
+        return self.frames[index]
+
+    @property
+    def fps(self) -> float:
+        """Frame rate of the source video"""
+        return self.metadata['fps']
+
+    @property
+    def stride(self) -> int:
+        """Source frames per stored frame"""
+        return self.metadata['stride']
+
+    def frame_number(self, index: int) -> int:
+        """1-based source frame number of a stored frame"""
+        return (index + 1) * self.stride
+
+    def iter_frames(self, step: int = 1) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Yield (source frame number, frame) pairs
+
+        Args:
+            step: Yield every step-th stored frame
+
+        Returns:
+            Iterator of (frame_number, read-only frame view)
+        """
+        for index in range(step - 1, len(self.frames), step):
+            yield self.frame_number(index), self.frames[index]
+
+    def info(self) -> Dict:
+        """Store metadata with its size on disk"""
+        return dict(self.metadata, path=self.path, bytes=os.path.getsize(self.path))
+
+
+def open_frame_store(video_path: str, config: Dict) -> Optional[FrameStore]:
+    """
+    Frame store for a video when 'frame_store_dir' is configured
+
+    Args:
+        video_path: Video to decode
+        config: Detector configuration
+
+    Returns:
+        Optional[FrameStore]: The store, or None when disabled or unavailable
+    """
+    store_dir = config.get('frame_store_dir')
+    if not store_dir:
+        return None
+    try:
+        return FrameStore.build(video_path, store_dir,
+                                tuple(config.get('output_resolution', (854, 480))),
+                                stride=config.get('frame_skip', 5))
+    except (OSError, ValueError) as e:
+        logger.warning(f"Frame store disabled: {e}")
+        return None
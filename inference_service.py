@@ -0,0 +1,638 @@
+#!/usr/bin/env python3
+"""
+Headless HTTP inference service
+
+A small asyncio HTTP/1.1 server for machine-to-machine use, built on the
+standard library only:
+
+    GET  /health               Liveness and model status
+    GET  /metrics              Prometheus text metrics
+    POST /detect               One encoded image (JPEG/PNG body) -> detections
+    POST /detect/batch         {"images": [base64, ...]} -> detections per image
+    POST /jobs                 {"video_path": ...} or a raw video body -> job ID
+                               (JSON may add "model" from MODEL_CONFIGS and a
+                               "config" with JOB_CONFIG_KEYS)
+    GET  /jobs                 Recent jobs
+    GET  /jobs/<id>            Job status and progress
+    GET  /jobs/<id>/results    Results and violations of a completed job
+    POST /jobs/<id>/cancel     Cancel a queued or running job
+
+Frames are resized to the working resolution, so boxes and the stop line
+use the same coordinates as process_video. Passing ?stream=<camera> to
+/detect tracks that camera's frames with the built-in IoU tracker and
+reports violations from the camera's rules; ?red=1 marks the signal red,
+and ?rules=red_light_violation,illegal_parking on a stream's first frame
+picks its rules (default config 'violation_rules'). Frames of one stream
+should be sent in order.
+
+Concurrent frame requests are collected into micro-batches by a
+BatchScheduler and run as one model call on its worker thread, so the event
+loop only parses requests and never blocks on the model. Batch limits come
+from config 'batch_max_size' and 'batch_max_wait_ms'. Video jobs run on the
+JobManager.
+"""
+
+import os
+import json
+import time
+import base64
+import asyncio
+import logging
+import argparse
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import cv2 as cv
+import numpy as np
+
+from batching import BatchScheduler
+from config import DEFAULT_CONFIG, MODEL_CONFIGS, validate_config
+from detector_backends import Detections
+from iou_tracker import IoUTracker
+from jobs import JobManager, get_job_manager
+from perf_stats import LatencyHistogram
+from rules import RulesEngine
+from upload_storage import CHUNK_SIZE, UPLOAD_DIR, remove_file
+
+logger = logging.getLogger(__name__)
+
+# Largest image request body accepted, in bytes
+MAX_BODY_BYTES = 32 * 1024 * 1024
+# Largest raw video upload accepted by POST /jobs, in bytes
+MAX_UPLOAD_BYTES = 4 * 1024 * 1024 * 1024
+# Streams with no frames for this many seconds lose their tracker state
+STREAM_TTL_SECONDS = 300
+# Config keys a client may set for a job; paths, backends and resource
+# settings always come from the service configuration
+JOB_CONFIG_KEYS = (
+    'confidence_threshold',
+    'frame_skip',
+    'line_y_threshold',
+    'red_light_start_time',
+    'violation_rules',
+    'rule_params',
+    'speed_calibration',
+    'speed_window',
+    'max_violations_per_vehicle',
+    'save_violation_images',
+)
+
+STATUS_TEXT = {
+    200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 409: 'Conflict', 411: 'Length Required',
+    413: 'Payload Too Large', 431: 'Request Header Fields Too Large',
+    500: 'Internal Server Error', 503: 'Service Unavailable'
+}
+
+
+class HttpError(Exception):
+    """Error returned to the client with an HTTP status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    """
+    Parsed request head; the body is read on demand from the connection
+    """
+
+    def __init__(self, method: str, target: str, headers: Dict[str, str], reader: asyncio.StreamReader):
+        url = urlsplit(target)
+        self.method = method
+        self.path = url.path.rstrip('/') or '/'
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self.headers = headers
+        self.reader = reader
+        self.content_length = int(headers.get('content-length', 0) or 0)
+        self.body_consumed = self.content_length == 0
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get('content-type', '').split(';')[0].strip().lower()
+
+    async def body(self, limit: int = MAX_BODY_BYTES) -> bytes:
+        """Read the whole body"""
+        if self.content_length > limit:
+            raise HttpError(413, f"Body exceeds {limit} bytes")
+        data = await self.reader.readexactly(self.content_length) if self.content_length else b''
+        self.body_consumed = True
+        return data
+
+    async def json(self) -> Dict:
+        """Read the body as a JSON object"""
+        try:
+            data = json.loads(await self.body() or b'{}')
+        except ValueError:
+            raise HttpError(400, "Body is not valid JSON")
+        if not isinstance(data, dict):
+            raise HttpError(400, "Body must be a JSON object")
+        return data
+
+    async def save_body(self, path: str, limit: int = MAX_UPLOAD_BYTES, chunk_size: int = CHUNK_SIZE):
+        """Stream the body to a file chunk by chunk"""
+        if self.content_length > limit:
+            raise HttpError(413, f"Upload exceeds {limit} bytes")
+        remaining = self.content_length
+        with open(path, 'wb') as f:
+            while remaining:
+                chunk = await self.reader.read(min(chunk_size, remaining))
+                if not chunk:
+                    raise asyncio.IncompleteReadError(b'', remaining)
+                f.write(chunk)
+                remaining -= len(chunk)
+        self.body_consumed = True
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    """
+    Read one request head from a connection
+
+    Returns:
+        Optional[Request]: The request, or None when the client closed the connection
+    """
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise HttpError(431, "Request head too large")
+
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, _ = lines[0].split(' ', 2)
+    except ValueError:
+        raise HttpError(400, "Malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        raise HttpError(411, "Chunked bodies are not supported; send Content-Length")
+    return Request(method.upper(), target, headers, reader)
+
+
+class StreamState:
+    """
+    Tracker and rules state for one camera sending frames to /detect
+    """
+
+    def __init__(self, config: Dict):
+        self.tracker = IoUTracker(
+            iou_threshold=config.get('tracker_iou_threshold', 0.2),
+            max_age=config.get('tracker_max_age', 10),
+            solver=config.get('tracker_solver', 'greedy')
+        )
+        self.rules = RulesEngine.from_config(config)
+        self.frames = 0
+        self.violations = 0
+        self.last_seen = time.time()
+
+
+def detections_to_json(detections: Detections) -> List[Dict]:
+    """Detections as JSON-ready dicts"""
+    items = []
+    for i, bbox in enumerate(detections.xyxy):
+        class_id = int(detections.cls[i])
+        item = {
+            'bbox': [round(float(v), 1) for v in bbox],
+            'confidence': round(float(detections.conf[i]), 4),
+            'class_id': class_id,
+            'class_name': detections.names.get(class_id, str(class_id)),
+        }
+        if detections.ids is not None:
+            item['track_id'] = int(detections.ids[i])
+        items.append(item)
+    return items
+
+
+class ServiceMetrics:
+    """
+    Request counters and latencies, rendered in the Prometheus text format
+    """
+
+    def __init__(self):
+        self.requests = Counter()
+        self.latency = {}
+        self.frames = 0
+        self.violations = 0
+        self.started = time.time()
+
+    def record(self, method: str, route: str, status: int, elapsed_ns: int):
+        """Count a finished request"""
+        self.requests[(method, route, status)] += 1
+        self.latency.setdefault(route, LatencyHistogram()).record(elapsed_ns)
+
+    @staticmethod
+    def _summary(lines: List[str], name: str, histogram: LatencyHistogram, labels: str = ''):
+        summary = histogram.summary()
+        sep = ',' if labels else ''
+        for quantile, key in (('0.5', 'p50_ms'), ('0.95', 'p95_ms'), ('0.99', 'p99_ms')):
+            lines.append(f'{name}{{{labels}{sep}quantile="{quantile}"}} {summary[key]:.3f}')
+        suffix = f'{{{labels}}}' if labels else ''
+        lines.append(f'{name}_sum{suffix} {summary["total_ms"]:.3f}')
+        lines.append(f'{name}_count{suffix} {summary["count"]}')
+
+    def render(self, scheduler: BatchScheduler, streams: int, jobs: List[Dict]) -> str:
+        """Metrics text for GET /metrics"""
+        lines = [
+            '# TYPE rlvd_uptime_seconds gauge',
+            f'rlvd_uptime_seconds {time.time() - self.started:.1f}',
+            '# TYPE rlvd_requests_total counter',
+        ]
+        for (method, route, status), count in sorted(self.requests.items()):
+            lines.append(f'rlvd_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+        lines.append('# TYPE rlvd_request_duration_ms summary')
+        for route, histogram in sorted(self.latency.items()):
+            self._summary(lines, 'rlvd_request_duration_ms', histogram, f'route="{route}"')
+
+        lines.append('# TYPE rlvd_inference_batch_duration_ms summary')
+        self._summary(lines, 'rlvd_inference_batch_duration_ms', scheduler.batch_latency)
+        lines.append('# TYPE rlvd_batch_queue_wait_ms summary')
+        self._summary(lines, 'rlvd_batch_queue_wait_ms', scheduler.queue_wait)
+        lines.append('# TYPE rlvd_inference_batches_total counter')
+        for size, count in sorted(scheduler.batch_sizes.items()):
+            lines.append(f'rlvd_inference_batches_total{{size="{size}"}} {count}')
+        lines += [
+            '# TYPE rlvd_frames_total counter',
+            f'rlvd_frames_total {self.frames}',
+            '# TYPE rlvd_stream_violations_total counter',
+            f'rlvd_stream_violations_total {self.violations}',
+            '# TYPE rlvd_queue_depth gauge',
+            f'rlvd_queue_depth {scheduler.queue_depth}',
+            '# TYPE rlvd_streams gauge',
+            f'rlvd_streams {streams}',
+            '# TYPE rlvd_jobs gauge',
+        ]
+        for status, count in sorted(Counter(job['status'] for job in jobs).items()):
+            lines.append(f'rlvd_jobs{{status="{status}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+class InferenceService:
+    """
+    HTTP front end for frame detection and video jobs
+    """
+
+    def __init__(self, model_path: str = 'yolov8n.pt', config: Dict = None,
+                 job_manager: Optional[JobManager] = None, max_batch_size: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None):
+        """
+        Initialize the service
+
+        Args:
+            model_path: Model weights for frame requests and jobs
+            config: Detector configuration
+            job_manager: Runs video jobs (defaults to the process-wide manager)
+            max_batch_size: Largest micro-batch sent to the model (config 'batch_max_size')
+            max_wait_ms: Longest a frame waits for its micro-batch (config 'batch_max_wait_ms')
+        """
+        from enhanced_detector_fixed import RedLightViolationDetector
+
+        self.model_path = model_path
+        self.config = dict(DEFAULT_CONFIG, **(config or {}))
+        self.detector = RedLightViolationDetector(model_path, self.config)
+        self._job_manager = job_manager
+        self.metrics = ServiceMetrics()
+        self.streams: Dict[str, StreamState] = {}
+        self.model_ready = False
+        self.model_error = None
+        self._decode_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='decode')
+        # Frame requests reach this detector only through the scheduler's worker;
+        # job workers run their own detectors on their own model copies
+        self.scheduler = BatchScheduler(
+            self.detector.detect_batch,
+            max_batch_size=max_batch_size or self.config.get('batch_max_size', 8),
+            max_wait_ms=self.config.get('batch_max_wait_ms', 5.0) if max_wait_ms is None else max_wait_ms,
+            name='inference'
+        )
+        self._server = None
+
+    @property
+    def jobs(self) -> JobManager:
+        """Job manager, created on first use"""
+        if self._job_manager is None:
+            self._job_manager = get_job_manager()
+        return self._job_manager
+
+    @property
+    def port(self) -> int:
+        """Port the server is listening on"""
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8080):
+        """Load the model in the background and start listening"""
+        asyncio.get_running_loop().create_task(self._load_model())
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        logger.info(f"🌐 Inference service listening on http://{host}:{self.port}")
+
+    async def close(self):
+        """Stop listening and stop the scheduler"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self.scheduler.close(wait=False)
+        self._decode_executor.shutdown(wait=False)
+
+    async def _load_model(self):
+        width, height = self.config.get('output_resolution', (854, 480))
+        dummy_frame = np.zeros((height, width, 3), dtype=np.uint8)
+        try:
+            # One warm-up batch also loads the backend on the scheduler's thread
+            await asyncio.wrap_future(self.scheduler.submit(dummy_frame))
+            self.model_ready = True
+            logger.info("✅ Model ready for frame requests")
+        except Exception as e:
+            self.model_error = str(e)
+            logger.error(f"❌ Model failed to load: {e}")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                start = time.perf_counter_ns()
+                request = None
+                try:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+                    status, payload, content_type = await self._dispatch(request)
+                except HttpError as e:
+                    status, payload, content_type = e.status, {'error': e.message}, 'application/json'
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    break
+                except Exception as e:
+                    logger.exception(f"Unhandled error: {e}")
+                    status, payload, content_type = 500, {'error': str(e)}, 'application/json'
+
+                # An unread body would be parsed as the next request
+                keep_alive = (request is not None and request.body_consumed
+                              and request.headers.get('connection', '').lower() != 'close')
+                self._write_response(writer, status, payload, content_type, keep_alive)
+                await writer.drain()
+                if request is not None:
+                    self.metrics.record(request.method, self._route(request.path), status,
+                                        time.perf_counter_ns() - start)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _route(path: str) -> str:
+        """Path with job IDs replaced, for metric labels"""
+        parts = path.split('/')
+        if len(parts) >= 3 and parts[1] == 'jobs':
+            parts[2] = '{id}'
+        return '/'.join(parts)
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: int, payload, content_type: str,
+                        keep_alive: bool):
+        if isinstance(payload, (bytes, str)):
+            body = payload.encode() if isinstance(payload, str) else payload
+        else:
+            body = json.dumps(payload, default=str).encode()
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'Unknown')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+
+    async def _dispatch(self, request: Request) -> Tuple[int, object, str]:
+        method, path = request.method, request.path
+        if path == '/health' and method == 'GET':
+            return 200, self.health(), 'application/json'
+        if path == '/metrics' and method == 'GET':
+            text = self.metrics.render(self.scheduler, len(self.streams), self.jobs.list(limit=1000))
+            return 200, text, 'text/plain; version=0.0.4'
+        if path == '/detect' and method == 'POST':
+            return 200, await self.detect(request), 'application/json'
+        if path == '/detect/batch' and method == 'POST':
+            return 200, await self.detect_batch(request), 'application/json'
+        if path == '/jobs':
+            if method == 'POST':
+                return 202, await self.submit_job(request), 'application/json'
+            if method == 'GET':
+                return 200, {'jobs': self.jobs.list(self._limit(request))}, 'application/json'
+        parts = path.split('/')
+        if len(parts) in (3, 4) and parts[1] == 'jobs':
+            return self.job_action(method, parts[2], parts[3] if len(parts) == 4 else None)
+        if path in ('/health', '/metrics', '/detect', '/detect/batch', '/jobs'):
+            raise HttpError(405, f"{method} not allowed on {path}")
+        raise HttpError(404, f"No route for {path}")
+
+    @staticmethod
+    def _limit(request: Request, default: int = 50, maximum: int = 1000) -> int:
+        """The ?limit= query parameter, checked"""
+        try:
+            limit = int(request.query.get('limit', default))
+        except ValueError:
+            raise HttpError(400, "limit must be an integer")
+        if not 1 <= limit <= maximum:
+            raise HttpError(400, f"limit must be between 1 and {maximum}")
+        return limit
+
+    def health(self) -> Dict:
+        """Service status for GET /health"""
+        return {
+            'status': 'error' if self.model_error else ('ok' if self.model_ready else 'loading'),
+            'model_path': self.model_path,
+            'model_ready': self.model_ready,
+            'model_error': self.model_error,
+            'queue_depth': self.scheduler.queue_depth,
+            'streams': len(self.streams),
+        }
+
+    def _decode_frame(self, data: bytes) -> np.ndarray:
+        """Decode an encoded image and resize it to the working resolution"""
+        frame = cv.imdecode(np.frombuffer(data, np.uint8), cv.IMREAD_COLOR)
+        if frame is None:
+            raise HttpError(400, "Could not decode image")
+        return cv.resize(frame, tuple(self.config.get('output_resolution', (854, 480))))
+
+    async def _infer(self, data: bytes) -> Detections:
+        if self.model_error:
+            raise HttpError(503, f"Model unavailable: {self.model_error}")
+        # Decoding runs on its own pool so the event loop stays free
+        frame = await asyncio.get_running_loop().run_in_executor(self._decode_executor, self._decode_frame, data)
+        detections = await asyncio.wrap_future(self.scheduler.submit(frame))
+        self.metrics.frames += 1
+        return detections
+
+    async def detect(self, request: Request) -> Dict:
+        """Handle POST /detect"""
+        detections = await self._infer(await request.body())
+        response = {'resolution': list(self.config.get('output_resolution', (854, 480)))}
+        stream_id = request.query.get('stream')
+        if stream_id:
+            response.update(self._track_stream(stream_id, detections, request.query.get('red') in ('1', 'true'),
+                                               request.query.get('rules')))
+        response['detections'] = detections_to_json(detections)
+        return response
+
+    def _track_stream(self, stream_id: str, detections: Detections, is_red: bool,
+                      rules: Optional[str] = None) -> Dict:
+        """Advance a stream's tracker and rules with one frame"""
+        now = time.time()
+        for stale_id in [key for key, state in self.streams.items()
+                         if now - state.last_seen > STREAM_TTL_SECONDS]:
+            del self.streams[stale_id]
+        state = self.streams.get(stream_id)
+        if state is None:
+            config = self.config
+            if rules:
+                config = dict(config, violation_rules=[name.strip() for name in rules.split(',') if name.strip()])
+            try:
+                state = StreamState(config)
+            except ValueError as e:
+                raise HttpError(400, str(e))
+            self.streams[stream_id] = state
+        state.frames += 1
+        state.last_seen = now
+
+        detections.ids = state.tracker.update(detections.xyxy, detections.cls)
+        violations = [{
+            'vehicle_id': event['vehicle_id'],
+            'violation_type': event['violation_type'],
+            'frame_number': state.frames,
+            'timestamp': now,
+            'bbox': [round(float(v), 1) for v in detections.xyxy[event['index']]],
+            'class_id': int(detections.cls[event['index']]),
+            'details': event['details'],
+        } for event in state.rules.update(now, is_red, detections)]
+        state.violations += len(violations)
+        self.metrics.violations += len(violations)
+        return {'stream': stream_id, 'frame_number': state.frames, 'is_red_light': is_red,
+                'violations': violations, 'total_violations': state.violations}
+
+    async def detect_batch(self, request: Request) -> Dict:
+        """Handle POST /detect/batch"""
+        images = (await request.json()).get('images')
+        if not isinstance(images, list) or not images:
+            raise HttpError(400, "Expected a non-empty 'images' list of base64 strings")
+        try:
+            blobs = [base64.b64decode(image, validate=True) for image in images]
+        except (TypeError, ValueError):
+            raise HttpError(400, "Images must be base64 encoded")
+        results = await asyncio.gather(*(self._infer(blob) for blob in blobs))
+        return {
+            'resolution': list(self.config.get('output_resolution', (854, 480))),
+            'results': [{'detections': detections_to_json(detections)} for detections in results],
+        }
+
+    def _job_config(self) -> Dict:
+        """Service configuration for a job; snapshots go to the job's own directory"""
+        return {key: value for key, value in self.config.items() if key != 'violation_save_path'}
+
+    def _job_model_path(self, model: Optional[str]) -> str:
+        """Model for a job: the service's own, or one of MODEL_CONFIGS by name or path"""
+        if model is None or model == self.model_path:
+            return self.model_path
+        if model in MODEL_CONFIGS:
+            return MODEL_CONFIGS[model]['path']
+        if model in {entry['path'] for entry in MODEL_CONFIGS.values()}:
+            return model
+        raise HttpError(400, f"Unknown model: {model}; choose one of {', '.join(MODEL_CONFIGS)}")
+
+    def _job_request_config(self, overrides) -> Dict:
+        """Job configuration with a client's overrides, limited to JOB_CONFIG_KEYS"""
+        if not isinstance(overrides, dict):
+            raise HttpError(400, "'config' must be a JSON object")
+        rejected = sorted(set(overrides) - set(JOB_CONFIG_KEYS))
+        if rejected:
+            raise HttpError(400, f"Config keys not settable per job: {', '.join(rejected)}")
+        config = dict(self._job_config(), **overrides)
+        try:
+            errors = validate_config(config)
+        except TypeError:
+            errors = ["Config values have the wrong type"]
+        if errors:
+            raise HttpError(400, '; '.join(errors))
+        return config
+
+    async def submit_job(self, request: Request) -> Dict:
+        """Handle POST /jobs with a server-side video path or a raw video body"""
+        if request.content_type == 'application/json':
+            body = await request.json()
+            video_path = body.get('video_path')
+            if not video_path or not os.path.isfile(video_path):
+                raise HttpError(400, f"Video not found: {video_path}")
+            config = self._job_request_config(body.get('config') or {})
+            model_path = self._job_model_path(body.get('model', body.get('model_path')))
+            job_id = self.jobs.submit(video_path, model_path, config, body.get('video_name'))
+        else:
+            if not request.content_length:
+                raise HttpError(400, "Send a video body or a JSON object with 'video_path'")
+            video_name = request.query.get('name', 'upload.mp4')
+            os.makedirs(UPLOAD_DIR, exist_ok=True)
+            fd, upload_path = tempfile.mkstemp(suffix=os.path.splitext(video_name)[1] or '.mp4', dir=UPLOAD_DIR)
+            os.close(fd)
+            try:
+                await request.save_body(upload_path)
+                # The job links or copies its input, so the upload can go
+                job_id = self.jobs.submit(upload_path, self.model_path, self._job_config(), video_name)
+            finally:
+                remove_file(upload_path)
+        return {'id': job_id, 'status': 'queued'}
+
+    def job_action(self, method: str, job_id: str, action: Optional[str]) -> Tuple[int, Dict, str]:
+        """Handle GET /jobs/<id>, GET /jobs/<id>/results and POST /jobs/<id>/cancel"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise HttpError(404, f"Unknown job: {job_id}")
+        if action is None and method == 'GET':
+            return 200, job, 'application/json'
+        if action == 'results' and method == 'GET':
+            results = self.jobs.results(job_id)
+            if results is None:
+                raise HttpError(409, f"Job {job_id} is {job['status']}")
+            return 200, results, 'application/json'
+        if action == 'cancel' and method == 'POST':
+            self.jobs.cancel(job_id)
+            return 202, {'id': job_id, 'status': self.jobs.get(job_id)['status']}, 'application/json'
+        raise HttpError(404, f"No route for {method} /jobs/{job_id}/{action or ''}")
+
+
+async def serve(service: InferenceService, host: str, port: int):
+    """Run the service until cancelled"""
+    await service.start(host, port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.close()
+
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Headless HTTP inference service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--model', default=DEFAULT_CONFIG['model_path'], help="Model weights")
+    parser.add_argument('--config', help="JSON file with detector configuration overrides")
+    parser.add_argument('--max-batch-size', type=int, help="Largest micro-batch (default: config batch_max_size)")
+    parser.add_argument('--max-wait-ms', type=float,
+                        help="Longest wait for a batch to fill (default: config batch_max_wait_ms)")
+    args = parser.parse_args()
+
+    config = {}
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+    service = InferenceService(args.model, config, max_batch_size=args.max_batch_size,
+                               max_wait_ms=args.max_wait_ms)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        print("👋 Inference service stopped")
+
+
+if __name__ == "__main__":
+    main()
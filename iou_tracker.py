@@ -0,0 +1,200 @@
+"""
+Lightweight built-in multi-object tracker
+
+Associates plain detections across frames by IoU, falling back to centroid
+distance for fast or small objects, with a constant-velocity prediction per
+track. The cost matrix is computed for all tracks and detections at once
+with NumPy, and solved greedily or with the Hungarian algorithm. Needs
+neither lap nor the ultralytics tracker pipeline.
+"""
+
+import logging
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Cost assigned to pairs that must never be matched
+INVALID_COST = 1e6
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise IoU between two sets of xyxy boxes
+
+    Args:
+        a: (N, 4) boxes
+        b: (M, 4) boxes
+
+    Returns:
+        np.ndarray: (N, M) IoU values
+    """
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def greedy_assignment(cost: np.ndarray, max_cost: float):
+    """
+    Match rows to columns in order of increasing cost
+
+    Returns:
+        Tuple of (row_indices, col_indices) arrays
+    """
+    if cost.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    order = np.argsort(cost, axis=None)
+    rows, cols = np.unravel_index(order, cost.shape)
+    used_rows = np.zeros(cost.shape[0], dtype=bool)
+    used_cols = np.zeros(cost.shape[1], dtype=bool)
+    matched_rows, matched_cols = [], []
+    for r, c in zip(rows, cols):
+        if cost[r, c] > max_cost:
+            break
+        if used_rows[r] or used_cols[c]:
+            continue
+        used_rows[r] = used_cols[c] = True
+        matched_rows.append(r)
+        matched_cols.append(c)
+    return np.asarray(matched_rows, dtype=np.int64), np.asarray(matched_cols, dtype=np.int64)
+
+
+def hungarian_assignment(cost: np.ndarray, max_cost: float):
+    """
+    Optimal assignment with scipy, falling back to greedy when scipy is missing
+
+    Returns:
+        Tuple of (row_indices, col_indices) arrays
+    """
+    try:
+        from scipy.optimize import linear_sum_assignment
+    except ImportError:
+        return greedy_assignment(cost, max_cost)
+    if cost.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    rows, cols = linear_sum_assignment(cost)
+    keep = cost[rows, cols] <= max_cost
+    return rows[keep].astype(np.int64), cols[keep].astype(np.int64)
+
+
+SOLVERS = {
+    'greedy': greedy_assignment,
+    'hungarian': hungarian_assignment,
+}
+
+
+class IoUTracker:
+    """
+    IoU / centroid tracker over plain xyxy detections
+    """
+
+    def __init__(self, iou_threshold: float = 0.2, max_centroid_distance: float = 1.0,
+                 max_age: int = 10, solver: str = 'greedy'):
+        """
+        Initialize the tracker
+
+        Args:
+            iou_threshold: Minimum IoU for an overlap match
+            max_centroid_distance: Maximum centroid distance for a non-overlapping
+                match, in units of the track's box diagonal
+            max_age: Updates a track survives without a matching detection
+            solver: 'greedy' or 'hungarian'
+        """
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown tracker solver: {solver}")
+        self.iou_threshold = iou_threshold
+        self.max_centroid_distance = max_centroid_distance
+        self.max_age = max_age
+        self.solver = SOLVERS[solver]
+        self.reset()
+
+    def reset(self):
+        """Drop all tracks"""
+        self.boxes = np.zeros((0, 4), dtype=np.float32)
+        self.velocities = np.zeros((0, 4), dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.ages = np.zeros(0, dtype=np.int32)
+        self.classes = np.zeros(0, dtype=np.int32)
+        self._next_id = 1
+
+    def _cost_matrix(self, predicted: np.ndarray, boxes: np.ndarray,
+                     classes: Optional[np.ndarray]) -> np.ndarray:
+        iou = iou_matrix(predicted, boxes)
+        cost = 1.0 - iou
+
+        # Centroid fallback for pairs that do not overlap enough
+        track_centers = (predicted[:, :2] + predicted[:, 2:]) / 2
+        det_centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+        diag = np.hypot(predicted[:, 2] - predicted[:, 0], predicted[:, 3] - predicted[:, 1])
+        distance = np.linalg.norm(track_centers[:, None, :] - det_centers[None, :, :], axis=2)
+        normalized = distance / np.maximum(diag[:, None], 1e-6)
+
+        low_iou = iou < self.iou_threshold
+        # Centroid matches rank after every IoU match
+        cost = np.where(low_iou, 1.0 + normalized, cost)
+        cost[low_iou & (normalized > self.max_centroid_distance)] = INVALID_COST
+
+        if classes is not None and len(self.classes):
+            cost[self.classes[:, None] != classes[None, :]] = INVALID_COST
+        return cost
+
+    def update(self, boxes: np.ndarray, classes: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Associate one frame of detections with the existing tracks
+
+        Args:
+            boxes: (M, 4) xyxy detections
+            classes: (M,) class IDs; tracks never switch class when given
+
+        Returns:
+            np.ndarray: (M,) track IDs, one per detection
+        """
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        if classes is not None:
+            classes = np.asarray(classes, dtype=np.int32).reshape(-1)
+        det_ids = np.zeros(len(boxes), dtype=np.int64)
+
+        predicted = self.boxes + self.velocities
+        if len(predicted) and len(boxes):
+            cost = self._cost_matrix(predicted, boxes, classes)
+            track_idx, det_idx = self.solver(cost, INVALID_COST - 1)
+        else:
+            track_idx = det_idx = np.empty(0, dtype=np.int64)
+
+        # Matched tracks: update velocity and position
+        self.velocities[track_idx] = boxes[det_idx] - self.boxes[track_idx]
+        self.boxes[track_idx] = boxes[det_idx]
+        self.ages += 1
+        self.ages[track_idx] = 0
+        det_ids[det_idx] = self.ids[track_idx]
+
+        # Unmatched detections start new tracks
+        new_det = np.setdiff1d(np.arange(len(boxes)), det_idx)
+        if len(new_det):
+            new_ids = np.arange(self._next_id, self._next_id + len(new_det), dtype=np.int64)
+            self._next_id += len(new_det)
+            det_ids[new_det] = new_ids
+            self.boxes = np.concatenate([self.boxes, boxes[new_det]])
+            self.velocities = np.concatenate([self.velocities, np.zeros((len(new_det), 4), np.float32)])
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.ages = np.concatenate([self.ages, np.zeros(len(new_det), np.int32)])
+            new_classes = classes[new_det] if classes is not None else np.full(len(new_det), -1, np.int32)
+            self.classes = np.concatenate([self.classes, new_classes])
+
+        # Coast unmatched tracks on their velocity, then drop stale ones
+        unmatched = self.ages > 0
+        self.boxes[unmatched] += self.velocities[unmatched]
+        alive = self.ages <= self.max_age
+        self.boxes = self.boxes[alive]
+        self.velocities = self.velocities[alive]
+        self.ids = self.ids[alive]
+        self.ages = self.ages[alive]
+        self.classes = self.classes[alive]
+
+        return det_ids
@@ -0,0 +1,417 @@
+"""
+Background video processing jobs
+
+A JobManager runs process_video on a local worker pool, independent of any
+Streamlit session. Jobs are recorded in a SQLite job table with their
+status and progress, and each job's annotated video, violations and results
+JSON are written to its own directory, so the UI only polls the table and
+reads finished results. Jobs can be cancelled while queued or running;
+running jobs stop at the next frame through a CancellationToken. Running
+jobs also publish a low-rate JPEG preview the UI can poll.
+cleanup_finished() removes jobs that finished long ago, rows and outputs
+alike.
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from preview import LatestFrameBuffer
+from progress import CancellationToken
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = 'jobs'
+
+# Job lifecycle: queued -> running -> completed | failed | cancelled.
+# Jobs left queued or running by a process that has exited are marked
+# interrupted; jobs owned by another live process sharing the table are not.
+ACTIVE_STATES = ('queued', 'running')
+FINAL_STATES = ('completed', 'failed', 'cancelled', 'interrupted')
+
+# Seconds between progress reports written to the job table
+PROGRESS_INTERVAL = 0.5
+
+# Finished jobs and their outputs are kept this long by cleanup_finished()
+JOB_RETENTION_HOURS = 72
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    video_name TEXT,
+    video_path TEXT NOT NULL,
+    model_path TEXT NOT NULL,
+    config TEXT NOT NULL,
+    status TEXT NOT NULL,
+    frames_done INTEGER DEFAULT 0,
+    total_frames INTEGER DEFAULT 0,
+    progress REAL DEFAULT 0,
+    violations INTEGER DEFAULT 0,
+    fps REAL,
+    eta_seconds REAL,
+    output_path TEXT,
+    results_path TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner_pid INTEGER,
+    owner_started_at REAL
+)
+"""
+
+
+def _process_start_time(pid: int) -> Optional[float]:
+    """Start time of a process (seconds since the epoch), or None when it is not running"""
+    try:
+        import psutil
+    except ImportError:
+        return None
+    try:
+        return psutil.Process(pid).create_time()
+    except psutil.Error:
+        return None
+
+
+# Identifies this process in job rows; a recycled pid has a later start time
+PROCESS_STARTED_AT = _process_start_time(os.getpid()) or time.time()
+
+
+def owner_alive(pid: Optional[int], started_at: Optional[float]) -> bool:
+    """
+    Whether the process that owns a job row is still running
+
+    Args:
+        pid: Owner process ID
+        started_at: Owner's PROCESS_STARTED_AT
+
+    Returns:
+        bool: False for rows without an owner or whose owner has exited
+    """
+    if pid is None or started_at is None:
+        return False
+    if pid == os.getpid():
+        return abs(started_at - PROCESS_STARTED_AT) < 1.0
+    process_start = _process_start_time(pid)
+    if process_start is not None:
+        # Without psutil the owner's start time is when it imported this module
+        return process_start <= started_at + 1.0
+    if os.name == 'nt':
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """
+    SQLite job table shared by the workers and the UI
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(_SCHEMA)
+            # Add columns introduced after a table was created
+            existing = {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}
+            for column, column_type in (('fps', 'REAL'), ('eta_seconds', 'REAL'),
+                                        ('owner_pid', 'INTEGER'), ('owner_started_at', 'REAL')):
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def insert(self, job: Dict):
+        """Add a job row"""
+        columns = ', '.join(job)
+        placeholders = ', '.join('?' for _ in job)
+        with self._lock, self._connect() as conn:
+            conn.execute(f"INSERT INTO jobs ({columns}) VALUES ({placeholders})", list(job.values()))
+
+    def update(self, job_id: str, **fields):
+        """Update columns of a job row"""
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self._lock, self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", [*fields.values(), job_id])
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """A job row as a dict, or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, limit: int = 50) -> List[Dict]:
+        """Most recent jobs first"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def mark_interrupted(self) -> int:
+        """Mark jobs left active by processes that have exited as interrupted"""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, owner_pid, owner_started_at FROM jobs "
+                f"WHERE status IN ({', '.join('?' for _ in ACTIVE_STATES)})", ACTIVE_STATES).fetchall()
+            orphaned = [row['id'] for row in rows if not owner_alive(row['owner_pid'], row['owner_started_at'])]
+            conn.executemany(
+                f"UPDATE jobs SET status = 'interrupted', finished_at = ? "
+                f"WHERE id = ? AND status IN ({', '.join('?' for _ in ACTIVE_STATES)})",
+                [(time.time(), job_id, *ACTIVE_STATES) for job_id in orphaned])
+            return len(orphaned)
+
+    def finished_before(self, cutoff: float) -> List[str]:
+        """IDs of jobs that reached a final state before a time"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id FROM jobs WHERE finished_at < ? "
+                f"AND status IN ({', '.join('?' for _ in FINAL_STATES)})", [cutoff, *FINAL_STATES]).fetchall()
+        return [row['id'] for row in rows]
+
+    def delete(self, job_ids: List[str]):
+        """Remove job rows"""
+        with self._lock, self._connect() as conn:
+            conn.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in job_ids])
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job['config'] = json.loads(job['config'])
+        return job
+
+
+class JobManager:
+    """
+    Local worker pool for process_video jobs
+    """
+
+    def __init__(self, jobs_dir: str = JOBS_DIR, max_workers: int = 2):
+        """
+        Initialize the job manager
+
+        Args:
+            jobs_dir: Directory for the job table and per-job outputs
+            max_workers: Number of videos processed concurrently
+        """
+        self.jobs_dir = jobs_dir
+        self.store = JobStore(os.path.join(jobs_dir, 'jobs.db'))
+        interrupted = self.store.mark_interrupted()
+        if interrupted:
+            logger.warning(f"⚠️ Marked {interrupted} job(s) from a previous run as interrupted")
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job-worker')
+        self._tokens = {}
+        self._previews = {}
+        self._lock = threading.Lock()
+
+    def job_dir(self, job_id: str) -> str:
+        """Directory holding a job's input copy and outputs"""
+        return os.path.join(self.jobs_dir, job_id)
+
+    def violations_dir(self, job_id: str) -> str:
+        """Directory a job saves its violation snapshots to"""
+        return os.path.join(self.job_dir(job_id), 'violations')
+
+    def submit(self, video_path: str, model_path: str, config: Dict, video_name: str = None) -> str:
+        """
+        Queue a video for processing
+
+        The input is linked (or copied) into the job directory, so the job
+        does not depend on the session's upload staying on disk.
+
+        Args:
+            video_path: Video to process
+            model_path: Model weights
+            config: Detector configuration
+            video_name: Display name for the video
+
+        Returns:
+            str: Job ID
+        """
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = self.job_dir(job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        input_path = os.path.join(job_dir, 'input' + (os.path.splitext(video_path)[1] or '.mp4'))
+        try:
+            os.link(video_path, input_path)
+        except OSError:
+            shutil.copyfile(video_path, input_path)
+
+        self.store.insert({
+            'id': job_id,
+            'video_name': video_name or os.path.basename(video_path),
+            'video_path': input_path,
+            'model_path': model_path,
+            'config': json.dumps(config, default=list),
+            'status': 'queued',
+            'created_at': time.time(),
+            'owner_pid': os.getpid(),
+            'owner_started_at': PROCESS_STARTED_AT,
+        })
+        with self._lock:
+            self._tokens[job_id] = CancellationToken()
+        self._executor.submit(self._run, job_id)
+        logger.info(f"📥 Job {job_id} queued: {video_name or video_path}")
+        return job_id
+
+    def _token(self, job_id: str) -> Optional[CancellationToken]:
+        """Cancellation token of a job queued or running in this process"""
+        with self._lock:
+            return self._tokens.get(job_id)
+
+    def cancel(self, job_id: str):
+        """Cancel a queued or running job"""
+        token = self._token(job_id)
+        if token is not None:
+            token.cancel()
+        job = self.store.get(job_id)
+        if job and job['status'] == 'queued':
+            self.store.update(job_id, status='cancelled', finished_at=time.time())
+
+    def preview(self, job_id: str) -> Tuple[int, Optional[bytes], Dict]:
+        """
+        Latest preview frame of a job
+
+        Returns:
+            Tuple of (sequence number, JPEG bytes or None, frame info)
+        """
+        with self._lock:
+            buffer = self._previews.get(job_id)
+        return buffer.get() if buffer is not None else (0, None, {})
+
+    def is_cancelled(self, job_id: str) -> bool:
+        """Whether cancellation was requested for a job"""
+        token = self._token(job_id)
+        if token is not None:
+            return token.cancelled
+        job = self.store.get(job_id)
+        return job is not None and job['status'] == 'cancelled'
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Current job row"""
+        return self.store.get(job_id)
+
+    def list(self, limit: int = 50) -> List[Dict]:
+        """Most recent jobs first"""
+        return self.store.list(limit)
+
+    def results(self, job_id: str) -> Optional[Dict]:
+        """Results of a completed job, read from the results store"""
+        job = self.store.get(job_id)
+        if not job or job['status'] != 'completed' or not job['results_path']:
+            return None
+        with open(job['results_path']) as f:
+            return json.load(f)
+
+    def cleanup_finished(self, max_age_hours: float = JOB_RETENTION_HOURS) -> int:
+        """
+        Delete jobs that finished more than max_age_hours ago, with their outputs
+
+        Args:
+            max_age_hours: Age after which finished jobs are removed
+
+        Returns:
+            int: Number of jobs removed
+        """
+        job_ids = self.store.finished_before(time.time() - max_age_hours * 3600)
+        for job_id in job_ids:
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+        self.store.delete(job_ids)
+        if job_ids:
+            logger.info(f"🧹 Removed {len(job_ids)} finished job(s) from {self.jobs_dir}")
+        return len(job_ids)
+
+    def _run(self, job_id: str):
+        try:
+            self._process(job_id)
+        finally:
+            with self._lock:
+                self._tokens.pop(job_id, None)
+                self._previews.pop(job_id, None)
+
+    def _process(self, job_id: str):
+        from enhanced_detector_fixed import RedLightViolationDetector, recursive_convert
+
+        job = self.store.get(job_id)
+        token = self._token(job_id)
+        if job is None or job['status'] != 'queued' or token is None or token.cancelled:
+            return
+
+        job_dir = self.job_dir(job_id)
+        output_path = os.path.join(job_dir, 'output.mp4')
+        results_path = os.path.join(job_dir, 'results.json')
+        config = dict(job['config'], results_path=os.path.join(job_dir, 'detection_results.json'))
+        # Submitted configs carry the app's shared snapshot folder; every job writes its own
+        config['violation_save_path'] = self.violations_dir(job_id)
+        if 'output_resolution' in config:
+            # JSON turned the (width, height) tuple into a list
+            config['output_resolution'] = tuple(config['output_resolution'])
+        config.setdefault('progress_interval', PROGRESS_INTERVAL)
+        self.store.update(job_id, status='running', started_at=time.time(), output_path=output_path)
+
+        def on_progress(report: Dict):
+            self.store.update(job_id, frames_done=report['frames_done'], total_frames=report['total_frames'],
+                              progress=report['progress'], violations=report['violations'],
+                              fps=report['fps'], eta_seconds=report['eta_seconds'])
+
+        preview_buffer = LatestFrameBuffer()
+        with self._lock:
+            self._previews[job_id] = preview_buffer
+
+        try:
+            detector = RedLightViolationDetector(job['model_path'], config)
+            results = detector.process_video(job['video_path'], output_path, progress_callback=on_progress,
+                                             cancel_token=token, preview_buffer=preview_buffer)
+            if results['cancelled']:
+                self.store.update(job_id, status='cancelled', finished_at=time.time())
+                logger.info(f"⏹ Job {job_id} cancelled")
+                return
+
+            results['violations'] = detector.violations
+            with open(results_path, 'w') as f:
+                json.dump(recursive_convert(results), f, indent=2, default=str)
+            self.store.update(job_id, status='completed', progress=1.0, frames_done=results['total_frames'],
+                              violations=results['total_violations'], results_path=results_path,
+                              eta_seconds=0.0, finished_at=time.time())
+            logger.info(f"✅ Job {job_id} completed: {results['total_violations']} violations")
+        except Exception as e:
+            self.store.update(job_id, status='failed', error=str(e), finished_at=time.time())
+            logger.error(f"❌ Job {job_id} failed: {e}")
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager(jobs_dir: str = JOBS_DIR, max_workers: int = None) -> JobManager:
+    """
+    Process-wide job manager, shared by every Streamlit session
+
+    Args:
+        jobs_dir: Directory for the job table and outputs
+        max_workers: Worker count (JOB_WORKERS env var, default 2), used on first call
+
+    Returns:
+        JobManager: The shared manager
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            workers = max_workers or int(os.environ.get('JOB_WORKERS', 2))
+            _manager = JobManager(jobs_dir, workers)
+        return _manager
@@ -1,6 +1,6 @@
 import os
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
-from ultralytics import YOLO
+from model_registry import get_model
 import cv2 as cv
 from datetime import datetime
 from collections import defaultdict
@@ -43,14 +43,14 @@ def load_model():
         # Try to load best.pt first
         if os.path.exists('best.pt'):
             print("Loading custom model: best.pt")
-            return YOLO('best.pt')
+            return get_model('best.pt', shared=False)
         else:
             print("Custom model not found, loading default: yolov8n.pt")
-            return YOLO('yolov8n.pt')
+            return get_model('yolov8n.pt', shared=False)
     except Exception as e:
         print(f"Error loading model: {e}")
         print("Falling back to yolov8n.pt")
-        return YOLO('yolov8n.pt')
+        return get_model('yolov8n.pt', shared=False)
 
 def check_video_file(video_path):
     """Check if video file exists and can be opened"""
@@ -0,0 +1,106 @@
+"""
+Process-wide YOLO model registry
+
+Loaded models are cached by (path, device, task) for the life of the
+process, so detectors created on every Streamlit rerun reuse the weights
+instead of reading them from disk again. YOLO models are not safe to run
+from several threads at once, so the shared instance is per thread: every
+thread gets its own copy of the cached weights, and concurrent Streamlit
+sessions, job workers and the inference service never run the same model.
+"""
+
+import copy
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Thread-safe cache of loaded models
+    """
+
+    def __init__(self):
+        # Pristine copies that never run inference, used as templates for
+        # private copies (a model that has run carries an unpicklable predictor)
+        self._templates: Dict[Tuple[str, Optional[str], Optional[str]], object] = {}
+        # Shared instances, one per thread
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model_path: str, device: Optional[str], task: Optional[str]) -> Tuple:
+        return (model_path, device, task)
+
+    def _thread_models(self) -> Dict[Tuple[str, Optional[str], Optional[str]], object]:
+        models = getattr(self._local, 'models', None)
+        if models is None:
+            models = self._local.models = {}
+        return models
+
+    def _load(self, model_path: str, device: Optional[str], task: Optional[str]):
+        from ultralytics import YOLO
+
+        model = YOLO(model_path, task=task) if task else YOLO(model_path)
+        if device:
+            model.to(device)
+        logger.info(f"Model loaded successfully: {model_path}")
+        return model
+
+    def get(self, model_path: str, device: Optional[str] = None,
+            task: Optional[str] = None, shared: bool = True):
+        """
+        Get a model, loading it on first use
+
+        Args:
+            model_path: Path to YOLO model weights
+            device: Torch device string, or None for the default device
+            task: YOLO task name, or None to infer it from the weights
+            shared: Return the calling thread's cached instance. Pass False for
+                a private copy, e.g. when the caller keeps tracker state on the model.
+
+        Returns:
+            The loaded model
+        """
+        key = self._key(model_path, device, task)
+        with self._lock:
+            template = self._templates.get(key)
+            if template is None:
+                template = self._load(model_path, device, task)
+                self._templates[key] = template
+            else:
+                logger.debug(f"Reusing cached model: {model_path}")
+
+        if not shared:
+            return copy.deepcopy(template)
+
+        models = self._thread_models()
+        model = models.get(key)
+        if model is None:
+            model = copy.deepcopy(template)
+            models[key] = model
+        return model
+
+    def is_loaded(self, model_path: str, device: Optional[str] = None,
+                  task: Optional[str] = None) -> bool:
+        """Check whether a model is already cached"""
+        return self._key(model_path, device, task) in self._templates
+
+    def clear(self):
+        """Drop all cached models"""
+        with self._lock:
+            self._templates.clear()
+        # Other threads drop their copies on their next get()
+        self._local = threading.local()
+
+
+# Default registry shared by the whole process
+registry = ModelRegistry()
+
+
+def get_model(model_path: str, device: Optional[str] = None,
+              task: Optional[str] = None, shared: bool = True):
+    """Get a model from the process-wide registry"""
+    return registry.get(model_path, device=device, task=task, shared=shared)
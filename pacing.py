@@ -0,0 +1,171 @@
+"""
+Real-time pacing against a latency SLO
+
+A PacingController watches end-to-end frame latency (from the moment a
+frame is decoded to the moment its result is ready) and moves along a
+degradation ladder to stay within the SLO. It steps down, one rung at a
+time, in this order:
+
+    1. inference size   (smaller model input, e.g. 640 -> 480 -> 320)
+    2. frame rate       (process every 2nd, then 3rd, source frame)
+    3. annotation       (skip plotting and overlays)
+    4. model size       (faster models from config.MODEL_CONFIGS)
+
+and steps back up in reverse order once latency has comfortable headroom.
+Each decision needs a full window of measurements at the current rung, so
+the controller does not oscillate. Every change is logged and recorded.
+"""
+
+import os
+import time
+import logging
+from collections import deque
+from typing import Dict, List
+
+import numpy as np
+
+from config import MODEL_CONFIGS
+from perf_stats import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Fastest first, used to order the model-size rungs
+MODEL_SPEED_ORDER = {'fast': 0, 'medium': 1, 'slow': 2}
+
+
+def build_ladder(config: Dict, model_path: str, resize: bool = True, swap_models: bool = True) -> List[Dict]:
+    """
+    Degradation steps for a configuration, mildest first
+
+    Args:
+        config: Detector configuration; 'slo_inference_sizes' and
+            'slo_frame_strides' override the default rungs
+        model_path: Model the detector starts with
+        resize: Include inference-size rungs. Pass False when a shared batch
+            scheduler runs the model, which ignores per-stream settings, or
+            when the backend is an exported model with a fixed input size.
+        swap_models: Include model-size rungs. Pass False when track IDs live
+            in the model (ByteTrack), since a new model restarts them.
+
+    Returns:
+        List[Dict]: Steps as {'setting', 'value', 'label'}
+    """
+    steps = []
+    base_size = config.get('inference_size') or 640
+    for size in config.get('slo_inference_sizes', [480, 320]) if resize else []:
+        if size < base_size:
+            steps.append({'setting': 'inference_size', 'value': size, 'label': f"inference size {size}"})
+    for stride in config.get('slo_frame_strides', [2, 3]):
+        if stride > 1:
+            steps.append({'setting': 'frame_stride', 'value': stride, 'label': f"every {stride} frames"})
+    steps.append({'setting': 'annotate', 'value': False, 'label': "annotation off"})
+    if not swap_models:
+        return steps
+
+    # Custom weights detect different classes, so only stock models are rungs
+    stock = [model for name, model in MODEL_CONFIGS.items() if name != 'custom']
+    current = next((model for model in stock
+                    if os.path.basename(model['path']) == os.path.basename(model_path)), None)
+    if current is not None:
+        current_speed = MODEL_SPEED_ORDER.get(current['speed'], 1)
+        faster = sorted((model for model in stock
+                         if MODEL_SPEED_ORDER.get(model['speed'], 1) < current_speed),
+                        key=lambda model: -MODEL_SPEED_ORDER.get(model['speed'], 1))
+        for model in faster:
+            steps.append({'setting': 'model_path', 'value': model['path'], 'label': f"model {model['path']}"})
+    return steps
+
+
+class PacingController:
+    """
+    Steps quality down and up to keep frame latency within an SLO
+    """
+
+    def __init__(self, slo_ms: float, ladder: List[Dict], window: int = 20,
+                 percentile: float = 90, headroom: float = 0.6):
+        """
+        Initialize the controller
+
+        Args:
+            slo_ms: End-to-end latency target in milliseconds
+            ladder: Degradation steps from build_ladder()
+            window: Frames measured at a rung before deciding
+            percentile: Latency percentile compared with the SLO
+            headroom: Step back up when the percentile is below headroom * slo_ms
+        """
+        self.slo_ms = slo_ms
+        self.ladder = ladder
+        self.window = window
+        self.percentile = percentile
+        self.headroom = headroom
+        self.level = 0
+        self.changes = []
+        self._latencies = deque(maxlen=window)
+        # Whole-run latency in constant memory, however long the stream runs
+        self._histogram = LatencyHistogram()
+        self._within_slo = 0
+        self._started = time.perf_counter()
+
+    def settings(self) -> Dict:
+        """Overrides for the current rung (empty at full quality)"""
+        settings = {}
+        for step in self.ladder[:self.level]:
+            settings[step['setting']] = step['value']
+        return settings
+
+    def record(self, latency_ms: float) -> bool:
+        """
+        Record one frame's end-to-end latency
+
+        Args:
+            latency_ms: Decode-to-result latency in milliseconds
+
+        Returns:
+            bool: Whether the rung changed, so settings() must be re-applied
+        """
+        self._latencies.append(latency_ms)
+        self._histogram.record(int(latency_ms * 1e6))
+        if latency_ms <= self.slo_ms:
+            self._within_slo += 1
+        if len(self._latencies) < self.window:
+            return False
+
+        observed = float(np.percentile(self._latencies, self.percentile))
+        if observed > self.slo_ms and self.level < len(self.ladder):
+            step = self.ladder[self.level]
+            self._change(self.level + 1, observed, f"⬇️ p{self.percentile:.0f} latency {observed:.0f} ms > "
+                                                   f"SLO {self.slo_ms:.0f} ms - stepping down to {step['label']}")
+            return True
+        if observed < self.slo_ms * self.headroom and self.level > 0:
+            step = self.ladder[self.level - 1]
+            self._change(self.level - 1, observed, f"⬆️ p{self.percentile:.0f} latency {observed:.0f} ms has "
+                                                   f"headroom - restoring from {step['label']}")
+            return True
+        return False
+
+    def _change(self, level: int, observed_ms: float, message: str):
+        logger.info(message)
+        self.changes.append({
+            'elapsed_seconds': time.perf_counter() - self._started,
+            'from_level': self.level,
+            'to_level': level,
+            'latency_ms': observed_ms,
+            'step': self.ladder[max(level, self.level) - 1]['label'],
+        })
+        self.level = level
+        # Measure the new rung from scratch
+        self._latencies.clear()
+
+    def summary(self) -> Dict:
+        """SLO, final rung, changes and overall latency"""
+        histogram = self._histogram
+        return {
+            'slo_ms': self.slo_ms,
+            'level': self.level,
+            'settings': self.settings(),
+            'ladder': [step['label'] for step in self.ladder],
+            'changes': self.changes,
+            'p50_ms': histogram.percentile(50) / 1e6,
+            'p95_ms': histogram.percentile(95) / 1e6,
+            'within_slo': self._within_slo / histogram.count if histogram.count else 1.0,
+        }
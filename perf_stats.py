@@ -0,0 +1,146 @@
+"""
+Low-overhead per-stage latency histograms for the processing pipeline
+"""
+
+import math
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Pipeline stages timed by RedLightViolationDetector.process_video
+PIPELINE_STAGES = ['decode', 'resize', 'inference', 'tracking', 'violation_logic',
+                   'plotting', 'encoding', 'snapshot_io', 'evidence_detect']
+
+# Histogram resolution: buckets per power of two (~19% relative bucket width)
+BUCKETS_PER_OCTAVE = 4
+# 2**40 ns is about 18 minutes, far beyond any single stage
+MAX_OCTAVES = 40
+
+
+class LatencyHistogram:
+    """
+    Fixed-size log-bucketed histogram of nanosecond durations
+
+    Recording is O(1) with no allocation, so it can run on every frame.
+    Percentiles are estimated from bucket upper bounds.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (BUCKETS_PER_OCTAVE * MAX_OCTAVES + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, elapsed_ns: int):
+        """Record one duration in nanoseconds"""
+        if elapsed_ns < 1:
+            elapsed_ns = 1
+        index = min(int(math.log2(elapsed_ns) * BUCKETS_PER_OCTAVE), len(self.counts) - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def percentile(self, pct: float) -> float:
+        """
+        Estimate a percentile
+
+        Args:
+            pct: Percentile in [0, 100]
+
+        Returns:
+            float: Estimated duration in nanoseconds
+        """
+        if self.count == 0:
+            return 0.0
+        target = max(1, math.ceil(self.count * pct / 100.0))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                upper = 2.0 ** ((index + 1) / BUCKETS_PER_OCTAVE)
+                return min(upper, float(self.max_ns))
+        return float(self.max_ns)
+
+    def summary(self) -> Dict:
+        """Summary statistics in milliseconds"""
+        if self.count == 0:
+            return {'count': 0, 'total_ms': 0.0, 'mean_ms': 0.0, 'p50_ms': 0.0,
+                    'p95_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+        return {
+            'count': self.count,
+            'total_ms': self.total_ns / 1e6,
+            'mean_ms': self.total_ns / self.count / 1e6,
+            'p50_ms': self.percentile(50) / 1e6,
+            'p95_ms': self.percentile(95) / 1e6,
+            'p99_ms': self.percentile(99) / 1e6,
+            'max_ms': self.max_ns / 1e6
+        }
+
+
+class StageTimer:
+    """
+    Collects per-stage latency histograms with periodic log output
+    """
+
+    def __init__(self, stages: List[str] = None, log_interval: float = None):
+        """
+        Initialize the timer
+
+        Args:
+            stages: Stage names reported even when never recorded
+            log_interval: Seconds between summary log lines (None disables logging)
+        """
+        self.stages = list(stages or PIPELINE_STAGES)
+        self.log_interval = log_interval
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.reset()
+
+    def reset(self):
+        """Clear all recorded timings"""
+        self.histograms = {stage: LatencyHistogram() for stage in self.stages}
+        self._last_log = time.perf_counter()
+
+    def record(self, stage: str, elapsed_ns: int):
+        """Record a duration, measured with time.perf_counter_ns, for a stage"""
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = LatencyHistogram()
+        histogram.record(elapsed_ns)
+
+    @contextmanager
+    def time(self, stage: str):
+        """Context manager that records the duration of its block"""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter_ns() - start)
+
+    def summary(self) -> Dict[str, Dict]:
+        """Per-stage summary statistics in milliseconds"""
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+    def format_summary(self) -> str:
+        """One-line p50/p95/p99 summary of every recorded stage"""
+        parts = []
+        for stage, histogram in self.histograms.items():
+            if histogram.count == 0:
+                continue
+            stats = histogram.summary()
+            parts.append(f"{stage} p50={stats['p50_ms']:.1f} p95={stats['p95_ms']:.1f} "
+                         f"p99={stats['p99_ms']:.1f}ms")
+        return ' | '.join(parts)
+
+    def maybe_log(self):
+        """Log a summary line if the log interval has elapsed"""
+        if not self.log_interval:
+            return
+        now = time.perf_counter()
+        if now - self._last_log >= self.log_interval:
+            self._last_log = now
+            logger.info(f"Stage timings: {self.format_summary()}")
@@ -0,0 +1,93 @@
+"""
+Live preview frames for running jobs
+
+The processing loop publishes downscaled, JPEG-encoded frames into a
+single-slot buffer at a limited rate. Publishing is lossy: a new frame
+replaces the previous one whether or not anyone read it, so a slow viewer
+never holds back the detector.
+"""
+
+import time
+import threading
+from typing import Dict, Optional, Tuple
+
+import cv2 as cv
+import numpy as np
+
+
+class LatestFrameBuffer:
+    """
+    Thread-safe single slot holding the most recent preview frame
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jpeg = None
+        self._info = {}
+        self._sequence = 0
+
+    def put(self, jpeg: bytes, info: Dict = None):
+        """Replace the current frame"""
+        with self._lock:
+            self._jpeg = jpeg
+            self._info = info or {}
+            self._sequence += 1
+
+    def get(self) -> Tuple[int, Optional[bytes], Dict]:
+        """
+        Most recent frame
+
+        Returns:
+            Tuple of (sequence number, JPEG bytes or None, frame info)
+        """
+        with self._lock:
+            return self._sequence, self._jpeg, self._info
+
+
+class PreviewPublisher:
+    """
+    Downscales, encodes and publishes frames at a limited rate
+    """
+
+    def __init__(self, buffer: LatestFrameBuffer, max_fps: float = 4.0,
+                 max_width: int = 480, jpeg_quality: int = 70):
+        """
+        Initialize the publisher
+
+        Args:
+            buffer: Slot to publish into
+            max_fps: Maximum preview frames per second
+            max_width: Preview width; larger frames are downscaled
+            jpeg_quality: JPEG quality (0-100)
+        """
+        self.buffer = buffer
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.max_width = max_width
+        self.encode_params = [int(cv.IMWRITE_JPEG_QUALITY), int(jpeg_quality)]
+        self._last_publish = None
+
+    def publish(self, frame: np.ndarray, info: Dict = None) -> bool:
+        """
+        Publish a frame unless one was published too recently
+
+        Args:
+            frame: BGR frame
+            info: Details shown with the frame (frame number, violations, ...)
+
+        Returns:
+            bool: Whether the frame was published
+        """
+        now = time.perf_counter()
+        if self._last_publish is not None and now - self._last_publish < self.min_interval:
+            return False
+        self._last_publish = now
+
+        height, width = frame.shape[:2]
+        if width > self.max_width:
+            frame = cv.resize(frame, (self.max_width, int(height * self.max_width / width)),
+                              interpolation=cv.INTER_AREA)
+        ok, jpeg = cv.imencode('.jpg', frame, self.encode_params)
+        if not ok:
+            return False
+        self.buffer.put(jpeg.tobytes(), info)
+        return True
@@ -0,0 +1,93 @@
+"""
+Progress reporting and cooperative cancellation for long-running processing
+
+process_video reports progress through a ProgressReporter, which throttles
+callbacks to a configurable rate, and checks a CancellationToken on every
+frame so frontends and schedulers can stop a run and reclaim the worker.
+"""
+
+import time
+import threading
+from typing import Callable, Dict, List, Optional
+
+
+class CancellationToken:
+    """
+    Thread-safe flag a caller sets to ask a running job to stop
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Request cancellation"""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancellation was requested"""
+        return self._event.is_set()
+
+
+class ProgressReporter:
+    """
+    Builds progress reports and forwards them to a callback at a limited rate
+    """
+
+    def __init__(self, callback: Optional[Callable[[Dict], None]], total_frames: int,
+                 interval: float = 0.5, latest_violations: int = 5):
+        """
+        Initialize the reporter
+
+        Args:
+            callback: Receives each progress report; None disables reporting
+            total_frames: Frames in the video, for progress and ETA (0 when unknown)
+            interval: Minimum seconds between reports
+            latest_violations: Number of most recent violations included
+        """
+        self.callback = callback
+        self.total_frames = total_frames
+        self.interval = interval
+        self.latest_violations = latest_violations
+        self.start = time.perf_counter()
+        self._last_report = None
+
+    def report(self, frames_done: int, processed_frames: int, violations: List[Dict],
+               force: bool = False, status: str = 'running') -> Optional[Dict]:
+        """
+        Send a progress report if the interval has passed
+
+        Args:
+            frames_done: Frames read so far
+            processed_frames: Frames run through detection so far
+            violations: All violations so far
+            force: Report even if the interval has not passed
+            status: 'running', 'completed' or 'cancelled'
+
+        Returns:
+            Optional[Dict]: The report sent, or None when throttled
+        """
+        if self.callback is None:
+            return None
+        now = time.perf_counter()
+        if not force and self._last_report is not None and now - self._last_report < self.interval:
+            return None
+        self._last_report = now
+
+        elapsed = now - self.start
+        fps = frames_done / elapsed if elapsed > 0 else 0.0
+        remaining = max(0, self.total_frames - frames_done)
+        report = {
+            'status': status,
+            'frames_done': frames_done,
+            'total_frames': self.total_frames,
+            'processed_frames': processed_frames,
+            'progress': min(1.0, frames_done / self.total_frames) if self.total_frames else 0.0,
+            'fps': fps,
+            'elapsed_seconds': elapsed,
+            'eta_seconds': remaining / fps if fps > 0 and self.total_frames else None,
+            'violations': len(violations),
+            'latest_violations': violations[-self.latest_violations:] if self.latest_violations else [],
+        }
+        self.callback(report)
+        return report
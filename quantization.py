@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+INT8 quantization for CPU inference
+
+Calibrates an INT8 copy of yolov8n / yolov8s on frames sampled from our own
+footage, for use with the 'openvino' or 'onnxruntime' detector backends,
+and checks its accuracy against the FP32 model on a validation clip.
+"""
+
+import os
+import sys
+import argparse
+import logging
+from typing import Dict, List
+
+import cv2 as cv
+import numpy as np
+
+from config import DEFAULT_CONFIG, MODEL_CONFIGS
+from detector_backends import create_backend, export_onnx, letterbox
+from iou_tracker import greedy_assignment, iou_matrix
+
+logger = logging.getLogger(__name__)
+
+# Models that support the quantized execution mode
+QUANTIZABLE_MODELS = [name for name, cfg in MODEL_CONFIGS.items() if cfg.get('quantizable')]
+
+QUANTIZATION_ENGINES = ('openvino', 'onnxruntime')
+
+
+def sample_calibration_frames(video_paths: List[str], num_frames: int = 300,
+                              output_resolution: tuple = (854, 480),
+                              imgsz: int = 640) -> List[np.ndarray]:
+    """
+    Sample evenly spaced frames from footage and preprocess them like inference
+
+    Frames go through the same resize and letterbox as live inference, so
+    the calibrated activation ranges match what the model will see.
+
+    Args:
+        video_paths: Videos to sample from
+        num_frames: Total number of calibration frames
+        output_resolution: Detector working resolution
+        imgsz: Model input size
+
+    Returns:
+        List[np.ndarray]: (1, 3, imgsz, imgsz) float32 blobs
+    """
+    per_video = max(1, num_frames // max(1, len(video_paths)))
+    blobs = []
+    for video_path in video_paths:
+        cap = cv.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video: {video_path}")
+        total_frames = int(cap.get(cv.CAP_PROP_FRAME_COUNT))
+        for index in np.linspace(0, max(0, total_frames - 1), per_video).astype(int):
+            cap.set(cv.CAP_PROP_POS_FRAMES, int(index))
+            ret, frame = cap.read()
+            if not ret:
+                continue
+            blob, _, _, _ = letterbox(cv.resize(frame, output_resolution), imgsz)
+            blobs.append(blob)
+        cap.release()
+
+    if not blobs:
+        raise ValueError("No calibration frames could be read")
+    logger.info(f"Sampled {len(blobs)} calibration frames from {len(video_paths)} video(s)")
+    return blobs
+
+
+def quantize_openvino(model_path: str, calibration_blobs: List[np.ndarray], output_path: str) -> str:
+    """
+    Post-training INT8 quantization with OpenVINO NNCF
+
+    Args:
+        model_path: FP32 ONNX or OpenVINO IR model
+        calibration_blobs: Preprocessed calibration frames
+        output_path: Output IR path (.xml)
+
+    Returns:
+        str: Path to the INT8 IR model
+    """
+    import nncf
+    import openvino as ov
+
+    model = ov.Core().read_model(model_path)
+    quantized = nncf.quantize(
+        model,
+        nncf.Dataset(calibration_blobs),
+        preset=nncf.QuantizationPreset.MIXED,
+        subset_size=len(calibration_blobs)
+    )
+    ov.save_model(quantized, output_path)
+    logger.info(f"INT8 OpenVINO model saved: {output_path}")
+    return output_path
+
+
+def quantize_onnxruntime(model_path: str, calibration_blobs: List[np.ndarray], output_path: str) -> str:
+    """
+    Static INT8 quantization with ONNX Runtime (QDQ format, per-channel weights)
+
+    Args:
+        model_path: FP32 ONNX model
+        calibration_blobs: Preprocessed calibration frames
+        output_path: Output ONNX path
+
+    Returns:
+        str: Path to the INT8 ONNX model
+    """
+    import onnxruntime as ort
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                          quantize_static)
+
+    input_name = ort.InferenceSession(model_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+
+    class _FrameReader(CalibrationDataReader):
+        def __init__(self):
+            self._blobs = iter(calibration_blobs)
+
+        def get_next(self):
+            blob = next(self._blobs, None)
+            return None if blob is None else {input_name: blob}
+
+    quantize_static(model_path, output_path, _FrameReader(),
+                    quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8,
+                    weight_type=QuantType.QInt8,
+                    per_channel=True)
+    logger.info(f"INT8 ONNX model saved: {output_path}")
+    return output_path
+
+
+def quantize_model(model_name: str, calibration_videos: List[str], engine: str = 'openvino',
+                   num_frames: int = 300, imgsz: int = 640, output_dir: str = 'models') -> Dict:
+    """
+    Export and quantize one of the quantizable MODEL_CONFIGS entries
+
+    Args:
+        model_name: Key in MODEL_CONFIGS ('yolov8n' or 'yolov8s')
+        calibration_videos: Footage to calibrate on
+        engine: 'openvino' or 'onnxruntime'
+        num_frames: Number of calibration frames
+        imgsz: Model input size
+        output_dir: Directory for the exported models
+
+    Returns:
+        Dict: Paths to the FP32 and INT8 models and the backend to run them with
+    """
+    if model_name not in QUANTIZABLE_MODELS:
+        raise ValueError(f"Quantization supports {QUANTIZABLE_MODELS}, not {model_name}")
+    if engine not in QUANTIZATION_ENGINES:
+        raise ValueError(f"Unknown quantization engine: {engine}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = export_onnx(MODEL_CONFIGS[model_name]['path'], imgsz=imgsz, output_dir=output_dir)
+    blobs = sample_calibration_frames(calibration_videos, num_frames, imgsz=imgsz)
+
+    if engine == 'openvino':
+        int8_path = quantize_openvino(fp32_path, blobs, os.path.join(output_dir, f"{model_name}_int8.xml"))
+    else:
+        int8_path = quantize_onnxruntime(fp32_path, blobs, os.path.join(output_dir, f"{model_name}_int8.onnx"))
+
+    return {'model': model_name, 'backend': engine, 'fp32_model': fp32_path, 'int8_model': int8_path}
+
+
+def check_accuracy(video_path: str, fp32_model: str, int8_model: str, backend: str = 'openvino',
+                   config: Dict = None, max_count_delta: float = 0.1,
+                   min_box_agreement: float = 0.9) -> Dict:
+    """
+    Compare an INT8 model with its FP32 source on a validation clip
+
+    Runs the full detector once per model and compares violation counts,
+    and compares per-frame detections by greedy IoU >= 0.5 matching.
+
+    Args:
+        video_path: Validation clip
+        fp32_model: FP32 model path
+        int8_model: INT8 model path
+        backend: Backend used to run both models
+        config: Detector configuration overrides
+        max_count_delta: Allowed relative difference in violation count
+        min_box_agreement: Required fraction of FP32 boxes matched by INT8
+
+    Returns:
+        Dict: Violation counts, box agreement and a pass/fail verdict
+    """
+    from enhanced_detector_fixed import RedLightViolationDetector
+
+    base_config = {**DEFAULT_CONFIG, **(config or {}), 'backend': backend}
+
+    counts = {}
+    for label, model_path in (('fp32', fp32_model), ('int8', int8_model)):
+        run_config = dict(base_config, violation_save_path=os.path.join('violations', f'accuracy_{label}'))
+        detector = RedLightViolationDetector(model_path, run_config)
+        results = detector.process_video(video_path)
+        counts[label] = results['total_violations']
+
+    # Per-frame detection agreement on the same sampled frames
+    fp32_backend = create_backend(backend, fp32_model, base_config)
+    int8_backend = create_backend(backend, int8_model, base_config)
+    frame_skip = base_config['frame_skip']
+    matched = total = 0
+    cap = cv.VideoCapture(video_path)
+    frame_number = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame_number += 1
+        if frame_number % frame_skip != 0:
+            continue
+        frame = cv.resize(frame, base_config['output_resolution'])
+        kwargs = {'classes': base_config['classes_to_detect'], 'conf': base_config['confidence_threshold']}
+        reference = fp32_backend.detect(frame, **kwargs)
+        candidate = int8_backend.detect(frame, **kwargs)
+        total += len(reference)
+        if len(reference) and len(candidate):
+            iou = iou_matrix(reference.xyxy, candidate.xyxy)
+            same_class = reference.cls[:, None] == candidate.cls[None, :]
+            rows, _ = greedy_assignment(np.where(same_class, 1.0 - iou, 1.0), 0.5)
+            matched += len(rows)
+    cap.release()
+
+    box_agreement = matched / total if total else 1.0
+    count_delta = abs(counts['int8'] - counts['fp32']) / max(counts['fp32'], 1)
+    return {
+        'fp32_violations': counts['fp32'],
+        'int8_violations': counts['int8'],
+        'violation_count_delta': count_delta,
+        'box_agreement': box_agreement,
+        'passed': count_delta <= max_count_delta and box_agreement >= min_box_agreement
+    }
+
+
+def main():
+    """Command-line entry point"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Build and validate INT8 CPU models")
+    parser.add_argument('model', choices=QUANTIZABLE_MODELS)
+    parser.add_argument('--calibration-video', action='append', required=True,
+                        help="Footage to calibrate on (repeatable)")
+    parser.add_argument('--validation-video', help="Clip for the FP32 vs INT8 accuracy check")
+    parser.add_argument('--engine', choices=QUANTIZATION_ENGINES, default='openvino')
+    parser.add_argument('--num-frames', type=int, default=300)
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--output-dir', default='models')
+    args = parser.parse_args()
+
+    result = quantize_model(args.model, args.calibration_video, args.engine,
+                            args.num_frames, args.imgsz, args.output_dir)
+    print(f"✅ INT8 model: {result['int8_model']} (backend '{result['backend']}')")
+
+    if args.validation_video:
+        report = check_accuracy(args.validation_video, result['fp32_model'], result['int8_model'],
+                                backend=result['backend'])
+        print(f"📊 Violations FP32/INT8: {report['fp32_violations']}/{report['int8_violations']}, "
+              f"box agreement {report['box_agreement']:.1%}")
+        if not report['passed']:
+            print("❌ INT8 model failed the accuracy check")
+            sys.exit(1)
+        print("✅ INT8 model passed the accuracy check")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+"""
+Violation rules engine
+
+A TrackStore keeps one row of kinematic state per active track: ground
+anchor (box bottom centre), smoothed velocity, first/last seen times and
+how long the vehicle has been stationary. It is updated once per frame with
+array operations over the tracked detections, and every enabled rule reads
+the resulting TrackState instead of walking the boxes again, so the cost
+per frame stays O(tracks) however many rules a camera enables. Tracks unseen for
+'track_store_max_age_s' are expired from the store and from every rule,
+so state stays bounded on a camera that runs for days.
+
+With a road-plane calibration ('speed_calibration', see calibration.py)
+the store also projects anchors into metres and keeps a short window of
+road positions per track, from which speeds for all tracks are fitted in
+one vectorized step.
+
+Rules are keyed by the violation types in config.VIOLATION_TYPES and are
+enabled per camera with the 'violation_rules' config key; each rule's
+parameters come from 'rule_params'[<type>]. Setting 'sample_interval_s' for
+illegal_parking hands it to the low-rate sampler in dwell.py instead.
+"""
+
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from calibration import homography_from_config, project_points, window_speeds
+from config import VIOLATION_TYPES
+from detector_backends import Detections
+from track_timeline import StopLineMonitor
+
+logger = logging.getLogger(__name__)
+
+
+def points_in_polygon(points: np.ndarray, polygon: Sequence[Tuple[float, float]]) -> np.ndarray:
+    """
+    Even-odd point-in-polygon test for many points at once
+
+    Args:
+        points: (N, 2) x, y coordinates
+        polygon: Polygon vertices in order
+
+    Returns:
+        np.ndarray: (N,) bool mask of points inside the polygon
+    """
+    vertices = np.asarray(polygon, dtype=np.float64)
+    x, y = points[:, 0:1], points[:, 1:2]
+    x1, y1 = vertices[:, 0], vertices[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    straddles = (y1 > y) != (y2 > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crossing_x = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    return ((straddles & (x < crossing_x)).sum(axis=1) % 2) == 1
+
+
+class TrackState:
+    """
+    Kinematic state of the tracks seen in one frame, aligned with its detections
+    """
+
+    def __init__(self, time_s: float, is_red: bool, detections: Detections, anchors: np.ndarray,
+                 velocity: np.ndarray, age_s: np.ndarray, dwell_s: np.ndarray,
+                 world: Optional[np.ndarray] = None, speed_mps: Optional[np.ndarray] = None,
+                 speed_samples: Optional[np.ndarray] = None):
+        self.time_s = time_s
+        self.is_red = is_red
+        self.detections = detections
+        self.xyxy = detections.xyxy
+        self.ids = detections.ids
+        self.cls = detections.cls
+        self.anchors = anchors  # (N, 2) box bottom centres in pixels
+        self.velocity = velocity  # (N, 2) smoothed pixels per second
+        self.speed = np.linalg.norm(velocity, axis=1)
+        self.age_s = age_s  # Seconds since each track was first seen
+        self.dwell_s = dwell_s  # Seconds each track has been stationary
+        # Road-plane values, None without a speed calibration
+        self.world = world  # (N, 2) anchors in metres
+        self.speed_mps = speed_mps  # (N,) windowed speed in metres per second
+        self.speed_samples = speed_samples  # (N,) road positions behind each speed
+
+    def __len__(self) -> int:
+        return len(self.xyxy)
+
+
+class TrackStore:
+    """
+    Per-track kinematic state shared by all rules, stored as arrays
+    """
+
+    def __init__(self, smoothing: float = 0.5, stationary_speed: float = 5.0, max_age_s: float = 5.0,
+                 homography: Optional[np.ndarray] = None, speed_window: int = 5):
+        """
+        Initialize the store
+
+        Args:
+            smoothing: Weight of the newest velocity measurement (exponential smoothing)
+            stationary_speed: Smoothed speed, in pixels per second, below which a
+                vehicle counts as stationary
+            max_age_s: Forget tracks not seen for this many seconds
+            homography: Image-to-road homography; enables road positions and speeds
+            speed_window: Road positions per track used to fit its speed
+        """
+        self.smoothing = smoothing
+        self.stationary_speed = stationary_speed
+        self.max_age_s = max_age_s
+        self._rows = {}
+        self._free = []
+        self._anchor = np.zeros((0, 2))
+        self._velocity = np.zeros((0, 2))
+        self._first_seen = np.zeros(0)
+        self._last_seen = np.zeros(0)
+        self._stationary_since = np.zeros(0)
+        self.homography = homography
+        self.speed_window = speed_window
+        self._sample_t = np.zeros((0, speed_window))
+        self._sample_p = np.zeros((0, speed_window, 2))
+        self._samples = np.zeros(0, dtype=np.int64)
+        # Track IDs forgotten by the latest update
+        self.expired = []
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _grow(self, capacity: int):
+        extra = capacity - len(self._first_seen)
+        self._free.extend(range(capacity - 1, len(self._first_seen) - 1, -1))
+        self._anchor = np.concatenate([self._anchor, np.zeros((extra, 2))])
+        self._velocity = np.concatenate([self._velocity, np.zeros((extra, 2))])
+        self._first_seen = np.concatenate([self._first_seen, np.zeros(extra)])
+        self._last_seen = np.concatenate([self._last_seen, np.zeros(extra)])
+        self._stationary_since = np.concatenate([self._stationary_since, np.zeros(extra)])
+        self._sample_t = np.concatenate([self._sample_t, np.zeros((extra, self.speed_window))])
+        self._sample_p = np.concatenate([self._sample_p, np.zeros((extra, self.speed_window, 2))])
+        self._samples = np.concatenate([self._samples, np.zeros(extra, dtype=np.int64)])
+
+    def _lookup(self, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows for track IDs, allocating rows for new tracks"""
+        rows = np.empty(len(ids), dtype=np.int64)
+        new = np.zeros(len(ids), dtype=bool)
+        for i, track_id in enumerate(ids.tolist()):
+            row = self._rows.get(track_id)
+            if row is None:
+                if not self._free:
+                    self._grow(max(16, 2 * len(self._first_seen)))
+                row = self._rows[track_id] = self._free.pop()
+                new[i] = True
+            rows[i] = row
+        return rows, new
+
+    def update(self, time_s: float, is_red: bool, detections: Detections) -> TrackState:
+        """
+        Advance the store with one frame of tracked detections
+
+        Args:
+            time_s: Frame time in seconds
+            is_red: Signal state in this frame
+            detections: Detections with track IDs
+
+        Returns:
+            TrackState: State of this frame's tracks, in detection order
+        """
+        xyxy = detections.xyxy.astype(np.float64)
+        anchors = np.stack([(xyxy[:, 0] + xyxy[:, 2]) / 2, xyxy[:, 3]], axis=1)
+        rows, new = self._lookup(detections.ids)
+
+        elapsed = time_s - self._last_seen[rows]
+        measured = ~new & (elapsed > 0)
+        instant = np.zeros_like(anchors)
+        instant[measured] = (anchors[measured] - self._anchor[rows[measured]]) / elapsed[measured, None]
+        velocity = np.where(measured[:, None],
+                            self.smoothing * instant + (1 - self.smoothing) * self._velocity[rows],
+                            np.where(new[:, None], 0.0, self._velocity[rows]))
+
+        moving = np.linalg.norm(velocity, axis=1) > self.stationary_speed
+        self._first_seen[rows[new]] = time_s
+        self._stationary_since[rows] = np.where(new | moving, time_s, self._stationary_since[rows])
+        self._anchor[rows] = anchors
+        self._velocity[rows] = velocity
+        self._last_seen[rows] = time_s
+        world = speed_mps = speed_samples = None
+        if self.homography is not None:
+            world, speed_mps, speed_samples = self._update_speeds(rows, new, time_s, anchors)
+        self._expire(time_s)
+
+        return TrackState(time_s, is_red, detections, anchors, velocity,
+                          time_s - self._first_seen[rows], time_s - self._stationary_since[rows],
+                          world, speed_mps, speed_samples)
+
+    def _update_speeds(self, rows: np.ndarray, new: np.ndarray, time_s: float,
+                       anchors: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Push road positions into each track's window and fit all speeds at once"""
+        world = project_points(self.homography, anchors)
+        self._samples[rows[new]] = 0
+        slots = self._samples[rows] % self.speed_window
+        self._sample_t[rows, slots] = time_s
+        self._sample_p[rows, slots] = world
+        self._samples[rows] += 1
+
+        samples = np.minimum(self._samples[rows], self.speed_window)
+        valid = np.arange(self.speed_window) < samples[:, None]
+        return world, window_speeds(self._sample_t[rows], self._sample_p[rows], valid), samples
+
+    def _expire(self, time_s: float):
+        stale = [track_id for track_id, row in self._rows.items()
+                 if time_s - self._last_seen[row] > self.max_age_s]
+        for track_id in stale:
+            self._free.append(self._rows.pop(track_id))
+        self.expired = stale
+
+
+class ViolationRule:
+    """
+    One violation type evaluated on the shared track state
+
+    Subclasses set violation_type and implement evaluate().
+    """
+
+    violation_type = None
+
+    def evaluate(self, state: TrackState) -> List[Tuple[int, Dict]]:
+        """
+        Check one frame
+
+        Args:
+            state: Track state from the shared store
+
+        Returns:
+            List of (detection index, details) for vehicles that just violated
+        """
+        raise NotImplementedError
+
+    def forget(self, track_ids: List[int]):
+        """Drop per-track state for tracks the store has expired"""
+
+
+class RedLightRule(ViolationRule):
+    """
+    Stop-line crossing during red, using the same logic as offline re-scoring
+    """
+
+    violation_type = 'red_light_violation'
+
+    def __init__(self, line_y_threshold: float = 310, monitor: Optional[StopLineMonitor] = None):
+        self.line_y_threshold = line_y_threshold
+        self.monitor = monitor if monitor is not None else StopLineMonitor()
+
+    def evaluate(self, state: TrackState) -> List[Tuple[int, Dict]]:
+        violators = self.monitor.update(state.is_red, state.xyxy, state.ids, self.line_y_threshold)
+        return [(i, {'line_y_threshold': self.line_y_threshold}) for i in violators]
+
+    def forget(self, track_ids: List[int]):
+        self.monitor.forget(track_ids)
+
+
+class IllegalParkingRule(ViolationRule):
+    """
+    Vehicle stationary inside a restricted zone for longer than allowed
+    """
+
+    violation_type = 'illegal_parking'
+
+    def __init__(self, zones: Sequence[Sequence[Tuple[float, float]]] = (), max_dwell_s: float = 60.0):
+        """
+        Initialize the rule
+
+        Args:
+            zones: Restricted-zone polygons in working-resolution pixels
+            max_dwell_s: Longest a vehicle may stand still in a zone
+        """
+        self.zones = [np.asarray(zone, dtype=np.float64) for zone in zones]
+        self.max_dwell_s = max_dwell_s
+        self.reported = set()
+        if not self.zones:
+            logger.warning("⚠️ illegal_parking is enabled without restricted zones")
+
+    def evaluate(self, state: TrackState) -> List[Tuple[int, Dict]]:
+        due = np.flatnonzero(state.dwell_s >= self.max_dwell_s)
+        if len(due) == 0 or not self.zones:
+            return []
+        inside = np.zeros(len(due), dtype=bool)
+        for zone in self.zones:
+            inside |= points_in_polygon(state.anchors[due], zone)
+        events = []
+        for i in due[inside]:
+            track_id = int(state.ids[i])
+            if track_id not in self.reported:
+                self.reported.add(track_id)
+                events.append((int(i), {'dwell_seconds': round(float(state.dwell_s[i]), 1)}))
+        return events
+
+    def forget(self, track_ids: List[int]):
+        self.reported.difference_update(track_ids)
+
+
+class SpeedingRule(ViolationRule):
+    """
+    Vehicle whose windowed road speed exceeds the limit
+    """
+
+    violation_type = 'speeding'
+
+    def __init__(self, speed_limit_kmh: float = 50.0, tolerance_kmh: float = 0.0,
+                 min_samples: int = 3):
+        """
+        Initialize the rule
+
+        Args:
+            speed_limit_kmh: Posted limit
+            tolerance_kmh: Margin above the limit before a violation
+            min_samples: Road positions a speed must be fitted on before it is
+                trusted (at most the store's 'speed_window')
+        """
+        self.speed_limit_kmh = speed_limit_kmh
+        self.tolerance_kmh = tolerance_kmh
+        self.min_samples = min_samples
+        self.reported = set()
+
+    def evaluate(self, state: TrackState) -> List[Tuple[int, Dict]]:
+        if state.speed_mps is None:
+            return []
+        speed_kmh = state.speed_mps * 3.6
+        due = np.flatnonzero((state.speed_samples >= max(self.min_samples, 2))
+                             & (speed_kmh > self.speed_limit_kmh + self.tolerance_kmh))
+        events = []
+        for i in due:
+            track_id = int(state.ids[i])
+            if track_id not in self.reported:
+                self.reported.add(track_id)
+                events.append((int(i), {'speed_kmh': round(float(speed_kmh[i]), 1),
+                                        'speed_limit_kmh': self.speed_limit_kmh}))
+        return events
+
+    def forget(self, track_ids: List[int]):
+        self.reported.difference_update(track_ids)
+
+
+RULES = {
+    'red_light_violation': RedLightRule,
+    'speeding': SpeedingRule,
+    'illegal_parking': IllegalParkingRule,
+}
+
+
+def create_rules(config: Dict, stop_line: Optional[StopLineMonitor] = None) -> List[ViolationRule]:
+    """
+    Rules enabled for one camera
+
+    Args:
+        config: Camera configuration; 'violation_rules' lists violation types
+            and 'rule_params' maps a type to its rule's keyword arguments
+        stop_line: Existing stop-line state for the red-light rule
+
+    Returns:
+        List[ViolationRule]: Rule instances in configured order
+    """
+    rules = []
+    params = config.get('rule_params') or {}
+    for violation_type in config.get('violation_rules', ['red_light_violation']):
+        if violation_type not in VIOLATION_TYPES:
+            raise ValueError(f"Unknown violation type: {violation_type}")
+        if violation_type not in RULES:
+            logger.warning(f"⚠️ No rule implements {violation_type} yet - skipped")
+            continue
+        kwargs = dict(params.get(violation_type, {}))
+        if violation_type == 'illegal_parking' and kwargs.get('sample_interval_s'):
+            # Sampled at a low rate by dwell.DwellSampler instead of every frame
+            continue
+        if violation_type == 'speeding' and not config.get('speed_calibration'):
+            raise ValueError("speeding needs a road-plane calibration in 'speed_calibration'")
+        if violation_type == 'red_light_violation':
+            kwargs.setdefault('line_y_threshold', config.get('line_y_threshold', 310))
+            kwargs.setdefault('monitor', stop_line)
+        rules.append(RULES[violation_type](**kwargs))
+    return rules
+
+
+class RulesEngine:
+    """
+    Updates the shared track store once per frame and runs every enabled rule on it
+    """
+
+    def __init__(self, rules: List[ViolationRule], store: Optional[TrackStore] = None):
+        self.rules = rules
+        self.store = store if store is not None else TrackStore()
+        self.counts = {rule.violation_type: 0 for rule in rules}
+
+    @classmethod
+    def from_config(cls, config: Dict, stop_line: Optional[StopLineMonitor] = None) -> 'RulesEngine':
+        """Engine with the camera's enabled rules and store settings"""
+        store = TrackStore(
+            smoothing=config.get('track_velocity_smoothing', 0.5),
+            stationary_speed=config.get('stationary_speed_px', 5.0),
+            max_age_s=config.get('track_store_max_age_s', 5.0),
+            homography=homography_from_config(config),
+            speed_window=config.get('speed_window', 5)
+        )
+        return cls(create_rules(config, stop_line), store)
+
+    def update(self, time_s: float, is_red: bool, detections: Detections) -> List[Dict]:
+        """
+        Evaluate one frame of tracked detections
+
+        Args:
+            time_s: Frame time in seconds
+            is_red: Signal state in this frame
+            detections: Detections; untracked frames are skipped
+
+        Returns:
+            List[Dict]: Violations as {'violation_type', 'index', 'vehicle_id', 'details'}
+        """
+        if detections.ids is None or not self.rules:
+            return []
+        state = self.store.update(time_s, is_red, detections)
+        if self.store.expired:
+            for rule in self.rules:
+                rule.forget(self.store.expired)
+        events = []
+        for rule in self.rules:
+            for index, details in rule.evaluate(state):
+                self.counts[rule.violation_type] += 1
+                events.append({
+                    'violation_type': rule.violation_type,
+                    'index': index,
+                    'vehicle_id': int(state.ids[index]),
+                    'details': details,
+                })
+        return events
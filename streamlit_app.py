@@ -9,7 +9,8 @@ from datetime import datetime, timedelta
 import json
 import time
 from PIL import Image
-import tempfile
+from upload_storage import (STATIC_DIR, UPLOAD_DIR, cleanup_stale_files, download_link, replace_session_file,
+                            servable_inline, session_upload, too_large_notice, write_json_file)
 from enhanced_detector_fixed import RedLightViolationDetector
 import threading
 import queue
@@ -140,6 +141,12 @@ def main():
     
     app = st.session_state.app
     
+    # Sweep uploads and results left behind by ended sessions
+    if 'stale_files_cleaned' not in st.session_state:
+        cleanup_stale_files()
+        cleanup_stale_files(STATIC_DIR, keep_linked=True)
+        st.session_state.stale_files_cleaned = True
+    
     # Header
     st.markdown('<h1 class="main-header">🚦 Red Light Violation Detection System</h1>', unsafe_allow_html=True)
     
@@ -201,14 +208,9 @@ def main():
         )
         
         if uploaded_file is not None:
-            # Save uploaded file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                video_path = tmp_file.name
-            
-            # Save original video for comparison
-            st.session_state.original_video_path = video_path
-            st.session_state.uploaded_file = uploaded_file
+            # Save uploaded file to disk in chunks, once per upload; the copy
+            # is also the original video shown for comparison
+            video_path = session_upload(st.session_state, uploaded_file)
             
             # Display video info
             cap = cv2.VideoCapture(video_path)
@@ -231,7 +233,7 @@ def main():
                         # Clear previous results
                         st.session_state.results = None
                         st.session_state.processing = True
-                        st.session_state.output_path = output_path
+                        replace_session_file(st.session_state, 'output_path', output_path)
                         
                         # Start processing thread
                         thread = threading.Thread(
@@ -384,8 +386,11 @@ def main():
             
             with col_original:
                 st.markdown("**🎬 Original Video**")
-                if st.session_state.get('uploaded_file') is not None:
-                    st.video(st.session_state.uploaded_file, start_time=0)
+                original_video_path = st.session_state.get('original_video_path') or ''
+                if servable_inline(original_video_path):
+                    st.video(original_video_path, start_time=0)
+                elif os.path.exists(original_video_path):
+                    st.info(too_large_notice(original_video_path))
                 else:
                     st.info("Original video not available")
             
@@ -394,10 +399,11 @@ def main():
                 # Video player container with styling
                 st.markdown('<div class="video-player-container">', unsafe_allow_html=True)
                 
-                # Video player with controls
-                with open(output_path, 'rb') as video_file:
-                    video_bytes = video_file.read()
-                    st.video(video_bytes, start_time=0)
+                # Video player with controls, served from the file on disk
+                if servable_inline(output_path):
+                    st.video(output_path, start_time=0)
+                else:
+                    st.info(too_large_notice(output_path))
                 
                 st.markdown('</div>', unsafe_allow_html=True)
             
@@ -417,13 +423,18 @@ def main():
                     st.rerun()
             
             with col_video2:
-                st.download_button(
-                    label="📥 Download Video",
-                    data=video_bytes,
-                    file_name=f"annotated_video_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4",
-                    mime="video/mp4",
-                    help="Download the processed video with detection results"
-                )
+                if servable_inline(output_path):
+                    with open(output_path, 'rb') as video_file:
+                        st.download_button(
+                            label="📥 Download Video",
+                            data=video_file,
+                            file_name=f"annotated_video_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4",
+                            mime="video/mp4",
+                            help="Download the processed video with detection results"
+                        )
+                elif os.path.exists(output_path):
+                    st.markdown(download_link(output_path, "📥 Download Video", "annotated_video.mp4"),
+                                unsafe_allow_html=True)
             
             with col_video3:
                 if st.button("📊 Show Statistics", help="Show detailed video statistics"):
@@ -485,25 +496,32 @@ def main():
         col_download1, col_download2 = st.columns(2)
         
         with col_download1:
-            if os.path.exists(st.session_state.get('output_path', '')):
+            if servable_inline(st.session_state.get('output_path', '')):
                 with open(st.session_state.output_path, 'rb') as f:
                     st.download_button(
                         label="📹 Download Annotated Video",
-                        data=f.read(),
+                        data=f,
                         file_name="annotated_video.mp4",
                         mime="video/mp4"
                     )
+            elif os.path.exists(st.session_state.get('output_path', '')):
+                st.markdown(download_link(st.session_state.output_path, "📹 Download Annotated Video",
+                                          "annotated_video.mp4"), unsafe_allow_html=True)
         
         with col_download2:
-            # Create results JSON
-            serializable_results = recursive_convert(results)
-            results_json = json.dumps(serializable_results, indent=2)
-            st.download_button(
-                label="📄 Download Results JSON",
-                data=results_json,
-                file_name="detection_results.json",
-                mime="application/json"
-            )
+            # Write results JSON to disk once per result set
+            if st.session_state.get('results_json_for') is not results:
+                results_json_path = os.path.join(UPLOAD_DIR, f"results_{datetime.now():%Y%m%d_%H%M%S_%f}.json")
+                write_json_file(recursive_convert(results), results_json_path)
+                replace_session_file(st.session_state, 'results_json_path', results_json_path)
+                st.session_state.results_json_for = results
+            with open(st.session_state.results_json_path, 'rb') as f:
+                st.download_button(
+                    label="📄 Download Results JSON",
+                    data=f,
+                    file_name="detection_results.json",
+                    mime="application/json"
+                )
     
     # Violations gallery - Enhanced
     if st.session_state.get('show_violations', False) or (app.detector and app.detector.violations):
@@ -9,10 +9,10 @@ from datetime import datetime, timedelta
 import json
 import time
 from PIL import Image
-import tempfile
+from upload_storage import (STATIC_DIR, UPLOAD_DIR, cleanup_stale_files, download_link, replace_session_file,
+                            servable_inline, session_upload, too_large_notice, write_json_file)
 from enhanced_detector_fixed import RedLightViolationDetector
-import threading
-import queue
+from jobs import ACTIVE_STATES, get_job_manager
 
 def tensor_to_list(obj):
     try:
@@ -113,8 +113,6 @@ st.markdown("""
 class StreamlitApp:
     def __init__(self):
         self.detector = None
-        self.processing_queue = queue.Queue()
-        self.results_queue = queue.Queue()
         
     def initialize_detector(self, model_path, config):
         """Initialize the detector with given parameters"""
@@ -124,14 +122,45 @@ class StreamlitApp:
         except Exception as e:
             st.error(f"Error initializing detector: {e}")
             return False
-    
-    def process_video_thread(self, video_path, output_path):
-        """Process video in a separate thread"""
-        try:
-            results = self.detector.process_video(video_path, output_path)
-            self.results_queue.put(('success', results))
-        except Exception as e:
-            self.results_queue.put(('error', str(e)))
+
+def show_jobs(jobs, job_ids):
+    """Show this session's jobs with live progress and cancel buttons"""
+    st.markdown("### 📋 Processing Jobs")
+    for job_id in job_ids:
+        job = jobs.get(job_id)
+        if job is None:
+            continue
+        
+        col_job, col_action = st.columns([4, 1])
+        with col_job:
+            label = f"**{job['video_name']}** · `{job['id']}` · {job['status']}"
+            if job['status'] == 'running' and job['total_frames']:
+                label += f" · {job['frames_done']}/{job['total_frames']} frames · {job['violations']} violations"
+                if job['fps']:
+                    label += f" · {job['fps']:.1f} FPS"
+                if job['eta_seconds'] is not None:
+                    label += f" · ETA {job['eta_seconds']:.0f}s"
+            elif job['status'] == 'completed':
+                label += f" · {job['violations']} violations"
+            elif job['status'] == 'failed':
+                label += f" · {job['error']}"
+            st.markdown(label)
+            st.progress(min(1.0, job['progress'] or 0.0))
+            if job['status'] == 'running':
+                _, preview_jpeg, preview_info = jobs.preview(job_id)
+                if preview_jpeg is not None:
+                    st.image(preview_jpeg, width=320,
+                             caption=f"Live preview · frame {preview_info.get('frame_number', '?')}")
+        with col_action:
+            if job['status'] in ACTIVE_STATES:
+                if st.button("⏹ Cancel", key=f"cancel_{job_id}"):
+                    jobs.cancel(job_id)
+                    st.rerun()
+            elif job['status'] == 'completed':
+                if st.button("📈 Show", key=f"show_{job_id}"):
+                    st.session_state.active_job = job_id
+                    st.session_state.loaded_job = None
+                    st.rerun()
 
 def main():
     # Initialize app
@@ -139,6 +168,14 @@ def main():
         st.session_state.app = StreamlitApp()
     
     app = st.session_state.app
+    jobs = get_job_manager()
+    
+    # Sweep uploads and results left behind by ended sessions, and old jobs
+    if 'stale_files_cleaned' not in st.session_state:
+        cleanup_stale_files()
+        cleanup_stale_files(STATIC_DIR, keep_linked=True)
+        jobs.cleanup_finished()
+        st.session_state.stale_files_cleaned = True
     
     # Header
     st.markdown('<h1 class="main-header">🚦 Red Light Violation Detection System</h1>', unsafe_allow_html=True)
@@ -176,7 +213,9 @@ def main():
             'line_y_threshold': line_y_threshold,
             'flash_duration_frames': flash_duration,
             'output_resolution': (output_width, output_height),
-            'violation_save_path': 'violations'
+            'violation_save_path': 'violations',
+            # Re-running with new stop-line or timing settings replays cached detections
+            'detection_cache_dir': 'cache/detections'
         }
         
         # Initialize detector
@@ -201,14 +240,9 @@ def main():
         )
         
         if uploaded_file is not None:
-            # Save uploaded file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                video_path = tmp_file.name
-            
-            # Save original video for comparison
-            st.session_state.original_video_path = video_path
-            st.session_state.uploaded_file = uploaded_file
+            # Save uploaded file to disk in chunks, once per upload; the copy
+            # is also the original video shown for comparison
+            video_path = session_upload(st.session_state, uploaded_file)
             
             # Display video info
             cap = cv2.VideoCapture(video_path)
@@ -225,97 +259,60 @@ def main():
             with col_process1:
                 if st.button("🎬 Start Processing", type="primary", disabled=app.detector is None):
                     if app.detector:
-                        # Start processing in thread
-                        output_path = f"output_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
+                        # Queue the video on the background worker pool
+                        job_id = jobs.submit(video_path, app.detector.model_path, app.detector.config,
+                                             video_name=uploaded_file.name)
+                        st.session_state.setdefault('job_ids', []).insert(0, job_id)
+                        st.session_state.active_job = job_id
                         
                         # Clear previous results
                         st.session_state.results = None
-                        st.session_state.processing = True
-                        st.session_state.output_path = output_path
-                        
-                        # Start processing thread
-                        thread = threading.Thread(
-                            target=app.process_video_thread,
-                            args=(video_path, output_path)
-                        )
-                        thread.start()
-                        
-                        st.success(f"🎬 Processing started! Output will be saved to: {output_path}")
+                        st.success(f"🎬 Job {job_id} queued!")
                         st.rerun()
             
             with col_process2:
-                if st.button("⏹ Stop Processing", disabled=not st.session_state.get('processing', False)):
-                    st.session_state.processing = False
+                active_job = jobs.get(st.session_state.get('active_job') or '')
+                if st.button("⏹ Stop Processing", disabled=not (active_job and active_job['status'] in ACTIVE_STATES)):
+                    jobs.cancel(active_job['id'])
                     st.rerun()
             
-            # Processing progress with live preview
-            if st.session_state.get('processing', False):
-                st.markdown("### 🔄 Processing Video...")
-                
-                # Progress section
-                progress_col1, progress_col2 = st.columns([3, 1])
-                
-                with progress_col1:
-                    progress_bar = st.progress(0)
-                    status_text = st.empty()
-                
-                with progress_col2:
-                    st.markdown("**Live Preview:**")
-                    preview_placeholder = st.empty()
-                
-                # Processing status
-                status_container = st.container()
-                
-                # Simulate progress with live updates
-                for i in range(100):
-                    time.sleep(0.1)
-                    progress_bar.progress(i + 1)
-                    status_text.text(f"Processing... {i+1}%")
-                    
-                    # Update live preview (simulate frame processing)
-                    if i % 10 == 0:
-                        with status_container:
-                            st.info(f"📹 Processing frame {i*10} of {frame_count}...")
-                    
-                    # Check for results
-                    try:
-                        result_type, result_data = app.results_queue.get_nowait()
-                        if result_type == 'success':
-                            st.session_state.results = result_data
-                            st.session_state.processing = False
-                            st.success("✅ **Video Processing Completed Successfully!**")
-                            st.balloons()
-                            
-                            # Auto-refresh to show video output
-                            st.rerun()
-                            break
-                        elif result_type == 'error':
-                            st.error(f"❌ **Processing failed:** {result_data}")
-                            st.session_state.processing = False
-                            break
-                    except queue.Empty:
-                        pass
-                
-                if st.session_state.get('processing', False):
-                    st.session_state.processing = False
-                    st.warning("⚠️ Processing was interrupted or timed out.")
+        # Jobs run in the background; this session only polls their progress
+        if st.session_state.get('job_ids'):
+            show_jobs(jobs, st.session_state.job_ids)
+        
+        # Load results of the selected job once it completes
+        active_job = jobs.get(st.session_state.get('active_job') or '')
+        st.session_state.processing = bool(active_job and active_job['status'] in ACTIVE_STATES)
+        if active_job and active_job['status'] == 'completed' and st.session_state.get('loaded_job') != active_job['id']:
+            st.session_state.results = jobs.results(active_job['id'])
+            st.session_state.results_job = active_job['id']
+            st.session_state.output_path = active_job['output_path']
+            st.session_state.loaded_job = active_job['id']
+            st.success("✅ **Video Processing Completed Successfully!**")
+            st.balloons()
+        elif active_job and active_job['status'] == 'failed' and st.session_state.get('loaded_job') != active_job['id']:
+            st.error(f"❌ **Processing failed:** {active_job['error']}")
+            st.session_state.loaded_job = active_job['id']
     
     with col2:
         st.markdown("## 📊 Real-time Statistics")
         
-        if app.detector:
-            stats = app.detector.get_statistics()
+        # Processing runs in job workers, so the statistics come from the selected job
+        stats_job = jobs.get(st.session_state.get('active_job') or '')
+        if stats_job:
+            started_at = stats_job['started_at']
+            processing_time = (stats_job['finished_at'] or time.time()) - started_at if started_at else 0.0
             
             # Display metrics
             col_metric1, col_metric2 = st.columns(2)
             
             with col_metric1:
-                st.metric("🚗 Active Vehicles", stats['active_vehicles'])
-                st.metric("⏱️ Processing Time", f"{stats['processing_time']:.1f}s")
+                st.metric("⚡ Processing FPS", f"{stats_job['fps'] or 0.0:.1f}")
+                st.metric("⏱️ Processing Time", f"{processing_time:.1f}s")
             
             with col_metric2:
-                st.metric("🚨 Violations", stats['total_violations'])
-                st.metric("📹 Frames Processed", stats['frame_count'])
+                st.metric("🚨 Violations", stats_job['violations'])
+                st.metric("📹 Frames Processed", stats_job['frames_done'])
         
         # Traffic light status
         st.markdown("### 🚦 Traffic Light Status")
@@ -379,8 +376,11 @@ def main():
             
             with col_original:
                 st.markdown("**🎬 Original Video**")
-                if st.session_state.get('uploaded_file') is not None:
-                    st.video(st.session_state.uploaded_file, start_time=0)
+                original_video_path = st.session_state.get('original_video_path') or ''
+                if servable_inline(original_video_path):
+                    st.video(original_video_path, start_time=0)
+                elif os.path.exists(original_video_path):
+                    st.info(too_large_notice(original_video_path))
                 else:
                     st.info("Original video not available")
             
@@ -389,10 +389,11 @@ def main():
                 # Video player container with styling
                 st.markdown('<div class="video-player-container">', unsafe_allow_html=True)
                 
-                # Video player with controls
-                with open(output_path, 'rb') as video_file:
-                    video_bytes = video_file.read()
-                    st.video(video_bytes, start_time=0)
+                # Video player with controls, served from the file on disk
+                if servable_inline(output_path):
+                    st.video(output_path, start_time=0)
+                else:
+                    st.info(too_large_notice(output_path))
                 
                 st.markdown('</div>', unsafe_allow_html=True)
             
@@ -401,6 +402,9 @@ def main():
             st.markdown(f"📊 **Video Details:** Processed video with **{results['total_violations']} violations** detected")
             st.markdown(f"⏱️ **Processing Time:** {results['processing_time']:.1f} seconds")
             st.markdown(f"📹 **Total Frames:** {results['total_frames']} frames")
+            cache_stats = results.get('detection_cache')
+            if cache_stats and cache_stats['hits']:
+                st.markdown(f"⚡ **Cached Detections:** {cache_stats['hits']} frames replayed without inference")
             st.markdown(f"📁 **File Size:** {file_size:,} bytes")
             st.markdown('</div>', unsafe_allow_html=True)
             
@@ -412,13 +416,18 @@ def main():
                     st.rerun()
             
             with col_video2:
-                st.download_button(
-                    label="📥 Download Video",
-                    data=video_bytes,
-                    file_name=f"annotated_video_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4",
-                    mime="video/mp4",
-                    help="Download the processed video with detection results"
-                )
+                if servable_inline(output_path):
+                    with open(output_path, 'rb') as video_file:
+                        st.download_button(
+                            label="📥 Download Video",
+                            data=video_file,
+                            file_name=f"annotated_video_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4",
+                            mime="video/mp4",
+                            help="Download the processed video with detection results"
+                        )
+                elif os.path.exists(output_path):
+                    st.markdown(download_link(output_path, "📥 Download Video", "annotated_video.mp4"),
+                                unsafe_allow_html=True)
             
             with col_video3:
                 if st.button("📊 Show Statistics", help="Show detailed video statistics"):
@@ -480,34 +489,43 @@ def main():
         col_download1, col_download2 = st.columns(2)
         
         with col_download1:
-            if os.path.exists(st.session_state.get('output_path', '')):
+            if servable_inline(st.session_state.get('output_path', '')):
                 with open(st.session_state.output_path, 'rb') as f:
                     st.download_button(
                         label="📹 Download Annotated Video",
-                        data=f.read(),
+                        data=f,
                         file_name="annotated_video.mp4",
                         mime="video/mp4"
                     )
+            elif os.path.exists(st.session_state.get('output_path', '')):
+                st.markdown(download_link(st.session_state.output_path, "📹 Download Annotated Video",
+                                          "annotated_video.mp4"), unsafe_allow_html=True)
         
         with col_download2:
-            # Create results JSON
-            serializable_results = recursive_convert(results)
-            results_json = json.dumps(serializable_results, indent=2)
-            st.download_button(
-                label="📄 Download Results JSON",
-                data=results_json,
-                file_name="detection_results.json",
-                mime="application/json"
-            )
+            # Write results JSON to disk once per result set
+            if st.session_state.get('results_json_for') is not results:
+                results_json_path = os.path.join(UPLOAD_DIR, f"results_{datetime.now():%Y%m%d_%H%M%S_%f}.json")
+                write_json_file(recursive_convert(results), results_json_path)
+                replace_session_file(st.session_state, 'results_json_path', results_json_path)
+                st.session_state.results_json_for = results
+            with open(st.session_state.results_json_path, 'rb') as f:
+                st.download_button(
+                    label="📄 Download Results JSON",
+                    data=f,
+                    file_name="detection_results.json",
+                    mime="application/json"
+                )
     
     # Violations gallery - Enhanced
-    if st.session_state.get('show_violations', False) or (app.detector and app.detector.violations):
+    # Snapshots are read from the folder of the job whose results are shown
+    results = st.session_state.get('results')
+    if results and (st.session_state.get('show_violations', False) or results.get('violations')):
         st.markdown("## 🚨 Violations Gallery")
         st.markdown("### 📸 Individual Violation Screenshots")
         
-        violations_dir = app.detector.config['violation_save_path']
+        violations_dir = jobs.violations_dir(st.session_state.results_job)
         if os.path.exists(violations_dir):
-            violation_images = [f for f in os.listdir(violations_dir) if f.endswith(('.jpg', '.png'))]
+            violation_images = sorted(f for f in os.listdir(violations_dir) if f.endswith(('.jpg', '.png')))
             
             if violation_images:
                 st.success(f"📊 **Found {len(violation_images)} violation screenshots**")
@@ -544,6 +562,12 @@ def main():
         <p>Built with Streamlit, YOLO, and OpenCV</p>
     </div>
     """, unsafe_allow_html=True)
+    
+    # Poll the job table while any of this session's jobs is still active
+    session_jobs = [jobs.get(job_id) for job_id in st.session_state.get('job_ids', [])]
+    if any(job and job['status'] in ACTIVE_STATES for job in session_jobs):
+        time.sleep(1)
+        st.rerun()
 
 if __name__ == "__main__":
     main()
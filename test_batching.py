@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for the batch scheduler
+"""
+
+import sys
+import time
+import threading
+
+import pytest
+
+from batching import BatchScheduler
+from enhanced_detector_fixed import RedLightViolationDetector
+
+
+def test_scheduler_batches_and_routes_results():
+    """Items from many threads are batched up to the limit and each caller gets its own result"""
+    calls = []
+
+    def run_batch(items):
+        calls.append(list(items))
+        time.sleep(0.01)
+        return [item * 10 for item in items]
+
+    scheduler = BatchScheduler(run_batch, max_batch_size=4, max_wait_ms=50)
+    results = {}
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, scheduler.run(i))) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    scheduler.close()
+
+    assert results == {i: i * 10 for i in range(10)}
+    assert max(len(batch) for batch in calls) == 4 and len(calls) < 10
+    stats = scheduler.stats()
+    assert stats['items'] == 10 and stats['mean_batch_size'] > 1
+
+
+def test_scheduler_propagates_errors():
+    """A failing batch fails every caller in it and the scheduler keeps running"""
+    def run_batch(items):
+        if 'bad' in items:
+            raise ValueError('bad item')
+        return items
+
+    scheduler = BatchScheduler(run_batch, max_batch_size=2, max_wait_ms=0)
+    try:
+        scheduler.run('bad')
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    assert scheduler.run('good') == 'good'
+    scheduler.close()
+
+
+def test_detectors_share_a_scheduler(make_detector, synthetic_clip):
+    """Detectors on separate threads share batched model calls and find the same violations"""
+    config = {'frame_skip': 2, 'red_light_start_time': 2.0, 'warmup_iterations': 0, 'tracker': 'iou'}
+    expected = make_detector(dict(config)).process_video(synthetic_clip['path'])['total_violations']
+    assert expected > 0
+
+    shared = make_detector(dict(config))
+    scheduler = BatchScheduler(shared.detect_batch, max_batch_size=4, max_wait_ms=20)
+    # ByteTrack cannot be batched, so batched detectors fall back to the IoU tracker
+    detectors = [RedLightViolationDetector('stub.pt', dict(config, tracker='bytetrack'),
+                                           batch_scheduler=scheduler) for _ in range(3)]
+    totals = []
+    threads = [threading.Thread(
+        target=lambda d=d: totals.append(d.process_video(synthetic_clip['path'])['total_violations']))
+        for d in detectors]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    scheduler.close()
+
+    assert totals == [expected] * 3
+    assert all(d.tracking_mode == 'builtin' and d._backend is None for d in detectors)
+    assert scheduler.stats()['mean_batch_size'] > 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
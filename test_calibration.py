@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script for road-plane calibration and speed enforcement
+"""
+
+import numpy as np
+
+import rules
+from calibration import compute_homography, project_points, window_speeds
+from detector_backends import Detections
+from rules import RulesEngine
+
+# 10 px per metre on a square patch of road
+CALIBRATION = {'image_points': [[0, 0], [100, 0], [100, 100], [0, 100]],
+               'world_points': [[0, 0], [10, 0], [10, 10], [0, 10]]}
+
+
+def test_homography_projects_to_metres():
+    """Four reference points give a homography that maps pixels onto the road"""
+    homography = compute_homography(CALIBRATION['image_points'], CALIBRATION['world_points'])
+    assert np.allclose(project_points(homography, np.array([[50.0, 20.0], [300.0, 0.0]])), [[5, 2], [30, 0]])
+
+    # A perspective view: the far edge of a 3.5 m x 20 m lane is narrower in the image
+    homography = compute_homography([[300, 200], [340, 200], [400, 400], [200, 400]],
+                                    [[0, 20], [3.5, 20], [3.5, 0], [0, 0]])
+    assert np.allclose(project_points(homography, np.array([[320.0, 200.0], [300.0, 400.0]])),
+                       [[1.75, 20], [1.75, 0]], atol=1e-4)
+
+    try:
+        compute_homography([[0, 0], [1, 1], [2, 2], [3, 3]], CALIBRATION['world_points'])
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_window_speeds_fit_all_tracks_at_once():
+    """Speeds are least-squares slopes over each track's filled samples"""
+    times = np.tile(np.arange(5) * 0.2, (3, 1))
+    positions = np.zeros((3, 5, 2))
+    positions[0, :, 0] = np.arange(5) * 2.0  # 10 m/s
+    positions[1, :, 1] = np.arange(5) * 0.6 + np.array([0, 0.1, -0.1, 0.1, 0])  # 3 m/s with jitter
+    valid = np.ones((3, 5), dtype=bool)
+    valid[2, 1:] = False  # One sample is not enough for a speed
+    speeds = window_speeds(times, positions, valid)
+    assert np.allclose(speeds[:2], [10, 3], atol=0.2) and speeds[2] == 0
+
+
+def test_speeding_rule_on_shared_store():
+    """Only the fast vehicle is reported, once, after enough road positions"""
+    engine = RulesEngine.from_config({
+        'violation_rules': ['speeding'], 'speed_calibration': CALIBRATION, 'speed_window': 4,
+        'rule_params': {'speeding': {'speed_limit_kmh': 50}}})
+    events = []
+    for step in range(8):
+        boxes = np.array([[50 * step, 0, 50 * step + 40, 30], [10 * step, 100, 10 * step + 40, 130]], dtype=np.float32)
+        detections = Detections(boxes, np.full(2, 0.9), np.full(2, 2), ids=np.array([1, 2]))
+        events += [(step, event['vehicle_id'], event['details']['speed_kmh'])
+                   for event in engine.update(step * 0.2, False, detections)]
+    assert events == [(2, 1, 90.0)]
+    assert engine.counts == {'speeding': 1}
+
+    try:
+        RulesEngine.from_config({'violation_rules': ['speeding']})
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_speed_update_cost_scales_with_arrays():
+    """Hundreds of tracks are projected and fitted in one array call per frame, not one per track"""
+    calls = {'project_points': [], 'window_speeds': []}
+
+    def counted(name, function):
+        def wrapper(*args):
+            calls[name].append(len(args[-1]))
+            return function(*args)
+        return wrapper
+
+    engine = RulesEngine.from_config({'violation_rules': ['red_light_violation', 'speeding'],
+                                      'speed_calibration': CALIBRATION})
+    ids = np.arange(300)
+    base = np.stack([ids * 3.0, ids * 1.0, ids * 3.0 + 20, ids * 1.0 + 20], axis=1).astype(np.float32)
+    rules.project_points = counted('project_points', project_points)
+    rules.window_speeds = counted('window_speeds', window_speeds)
+    try:
+        for step in range(50):
+            engine.update(step * 0.04, True, Detections(base + step, np.full(300, 0.9), np.full(300, 2), ids=ids))
+    finally:
+        rules.project_points, rules.window_speeds = project_points, window_speeds
+    assert calls == {'project_points': [300] * 50, 'window_speeds': [300] * 50}
+
+if __name__ == "__main__":
+    test_homography_projects_to_metres()
+    test_window_speeds_fit_all_tracks_at_once()
+    test_speeding_rule_on_shared_store()
+    test_speed_update_cost_scales_with_arrays()
+    print("✅ Calibration tests passed!")
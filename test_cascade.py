@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for two-stage cascade detection
+"""
+
+import sys
+
+import numpy as np
+import pytest
+
+from cascade import CascadeRefiner, crop_region, gate_indices
+from detector_backends import DetectorBackend, Detections
+
+
+class FixedBackend(DetectorBackend):
+    """Returns the same boxes (in input coordinates) and records the input shapes"""
+
+    def __init__(self, xyxy):
+        self.xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        self.shapes = []
+
+    def detect(self, frame, classes=None, conf=0.5, imgsz=None):
+        self.shapes.append(frame.shape[:2])
+        return Detections(self.xyxy, np.full(len(self.xyxy), 0.9), np.full(len(self.xyxy), 7))
+
+
+def test_gate_and_crop():
+    """Only boxes near the stop line are gated, and the crop covers them with padding"""
+    xyxy = np.array([[0, 0, 50, 100], [100, 300, 200, 340], [300, 330, 400, 380]], dtype=np.float32)
+    assert gate_indices(xyxy, 310, 60).tolist() == [1, 2]
+    assert crop_region(xyxy[[1, 2]], (480, 854, 3), 32) == (68, 268, 432, 412)
+
+
+def test_refiner_replaces_drops_and_adds():
+    """Large-model boxes replace matched candidates, drop unconfirmed ones and add missed vehicles"""
+    frame = np.zeros((480, 854, 3), dtype=np.uint8)
+    small = Detections(np.array([[0, 0, 50, 100], [100, 300, 200, 340], [500, 300, 560, 330]]),
+                       np.full(3, 0.5), np.full(3, 2), ids=np.array([1, 2, 3]))
+    # Crop origin is (68, 268): one box refines candidate 2, one is a vehicle the small model missed
+    large = FixedBackend([[30, 30, 134, 74], [200, 40, 260, 80]])
+    refiner = CascadeRefiner(lambda: large, margin=60, padding=32)
+
+    assert refiner.refine(frame, small, False, 310, {}) is small
+    tracked = refiner.refine(frame, small, True, 310, {})
+    assert tracked.ids.tolist() == [1, 2] and tracked.cls.tolist() == [2, 7]
+    assert np.allclose(tracked.xyxy[1], [98, 298, 202, 342])
+    assert large.shapes == [(104, 524)]
+
+    untracked = Detections(small.xyxy, small.conf, small.cls)
+    merged = refiner.refine(frame, untracked, True, 310, {})
+    assert len(merged) == 3 and merged.ids is None
+    stats = refiner.stats()
+    assert stats['refined_frames'] == 2 and stats['replaced'] == 2 and stats['dropped'] == 2 and stats['added'] == 1
+
+
+def test_detector_cascade_matches_single_model(make_detector, synthetic_clip, stub_backends):
+    """A cascade run finds the same violations while running the larger model on few frames"""
+    config = {'frame_skip': 2, 'red_light_start_time': 2.0, 'warmup_iterations': 0, 'tracker': 'iou'}
+    expected = make_detector(dict(config)).process_video(synthetic_clip['path'])
+    results = make_detector(dict(config, cascade_model_path='large.pt')).process_video(synthetic_clip['path'])
+
+    assert results['total_violations'] == expected['total_violations'] > 0
+    stats = results['cascade']
+    assert 0 < stats['refined_fraction'] < 1 and stats['replaced'] > 0
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
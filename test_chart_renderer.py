@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script for cache-aware, parallel chart rendering
+"""
+
+import os
+import sys
+
+import pytest
+
+import chart_renderer
+from chart_renderer import ChartRenderer
+
+
+def _specs(scale=1):
+    return [
+        {'name': 'hourly', 'kind': 'bar', 'x': [8, 9, 10], 'y': [1 * scale, 3, 2], 'title': 'Hourly'},
+        {'name': 'daily', 'kind': 'line', 'x': ['2024-01-01', '2024-01-02'], 'x_is_date': True,
+         'y': [4, 5 * scale], 'title': 'Daily'},
+    ]
+
+
+def test_unchanged_charts_are_skipped(tmp_path, monkeypatch):
+    """A second render of the same data reuses the files on disk"""
+    renderer = ChartRenderer(save_path=str(tmp_path), dpi='draft', parallel=False)
+    paths = renderer.render(_specs())
+    assert paths == [str(tmp_path / 'hourly.png'), str(tmp_path / 'daily.png')]
+    assert all(os.path.getsize(path) > 0 for path in paths)
+
+    rendered = []
+    monkeypatch.setattr(chart_renderer, '_render_chart', lambda job: rendered.append(job['name']))
+    assert renderer.render(_specs()) == paths
+    assert rendered == []
+
+    # Changed data, or a deleted output, re-renders just that chart
+    os.remove(paths[1])
+    specs = _specs()
+    specs[0]['y'] = [9, 9, 9]
+    renderer.render(specs)
+    assert rendered == ['hourly', 'daily']
+
+
+def test_worker_pool_is_reused(tmp_path):
+    """Parallel renders share one worker pool instead of starting a new one each time"""
+    renderer = ChartRenderer(save_path=str(tmp_path), dpi='draft', max_workers=2)
+    paths = renderer.render(_specs())
+    executor = chart_renderer._executors[2]
+    for path in paths:
+        os.utime(path, (0, 0))
+
+    # A new renderer with changed data redraws both charts on the same pool
+    ChartRenderer(save_path=str(tmp_path), dpi='draft', max_workers=2).render(_specs(scale=2))
+    assert chart_renderer._executors[2] is executor
+    assert all(os.path.getmtime(path) > 0 for path in paths)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-frame detection cache
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from detection_cache import DetectionCache, detection_fingerprint
+from detector_backends import Detections
+from progress import CancellationToken
+from testing_support import StubBackend, LINE_Y_THRESHOLD, WORKING_RESOLUTION
+
+
+def test_round_trip(tmp_path):
+    """Boxes, classes and track IDs survive a save and reload"""
+    path = str(tmp_path / 'cache.npz')
+    cache = DetectionCache(path)
+    cache.put(5, Detections([[1, 2, 3, 4], [5, 6, 7, 8]], [0.5, 0.75], [2, 7], ids=[3, 9]))
+    cache.put(10, Detections.empty())
+    cache.save(complete=True)
+
+    reloaded = DetectionCache(path)
+    assert reloaded.complete
+    frame = reloaded.get(5)
+    assert np.allclose(frame.xyxy, [[1, 2, 3, 4], [5, 6, 7, 8]])
+    assert list(frame.cls) == [2, 7] and list(frame.ids) == [3, 9]
+    assert len(reloaded.get(10)) == 0
+    assert reloaded.get(15) is None
+    assert (reloaded.hits, reloaded.misses) == (2, 1)
+
+
+def test_fingerprint_ignores_violation_settings():
+    """Stop line and signal timing do not invalidate cached detections"""
+    config = {'confidence_threshold': 0.5, 'frame_skip': 2, 'line_y_threshold': 310}
+    retuned = dict(config, line_y_threshold=250, red_light_start_time=5)
+    assert detection_fingerprint('missing.pt', config) == detection_fingerprint('missing.pt', retuned)
+    assert detection_fingerprint('missing.pt', config) != detection_fingerprint(
+        'missing.pt', dict(config, confidence_threshold=0.3))
+
+
+class _CountingBackend(StubBackend):
+    calls = 0
+
+    def track(self, *args, **kwargs):
+        _CountingBackend.calls += 1
+        return super().track(*args, **kwargs)
+
+
+def _run(make_detector, work_dir, clip, line_y_threshold, cache=True, cancel_at=None):
+    config = {
+        'frame_skip': 2,
+        'line_y_threshold': line_y_threshold,
+        'red_light_start_time': 2.0,
+        'confidence_threshold': 0.25,
+        'output_resolution': WORKING_RESOLUTION,
+        'violation_save_path': os.path.join(work_dir, 'violations'),
+        'warmup_iterations': 0,
+        'detection_cache_dir': os.path.join(work_dir, 'cache') if cache else None,
+    }
+    detector = make_detector(config, backend=_CountingBackend())
+    detector.tracking_available = True
+    token = None
+    if cancel_at is not None:
+        token = type('FrameToken', (CancellationToken,), {
+            'cancelled': property(lambda self: detector.frame_count >= cancel_at)})()
+    results = detector.process_video(clip['path'], cancel_token=token)
+    results['vehicle_ids'] = sorted(v['vehicle_id'] for v in detector.violations)
+    return results
+
+
+def test_reanalysis_replays_cached_detections(make_detector, work_dir, synthetic_clip):
+    """Changing the stop line re-scores cached detections without inference"""
+    first = _run(make_detector, work_dir, synthetic_clip, LINE_Y_THRESHOLD)
+    calls = _CountingBackend.calls
+    second = _run(make_detector, work_dir, synthetic_clip, LINE_Y_THRESHOLD)
+    third = _run(make_detector, work_dir, synthetic_clip, 200)
+
+    assert first['detection_cache']['misses'] == first['processed_frames']
+    assert _CountingBackend.calls == calls, "cached runs must not call the backend"
+    assert second['detection_cache']['hits'] == second['processed_frames']
+    assert second['total_violations'] == first['total_violations']
+    assert third['detection_cache']['hits'] == third['processed_frames']
+
+
+def test_cancelled_run_does_not_seed_the_cache(make_detector, work_dir, synthetic_clip):
+    """A run after a cancelled one runs the model from frame 1 and matches a clean run"""
+    clean = _run(make_detector, work_dir, synthetic_clip, LINE_Y_THRESHOLD, cache=False)
+    partial = _run(make_detector, work_dir, synthetic_clip, LINE_Y_THRESHOLD, cancel_at=40)
+    resumed = _run(make_detector, work_dir, synthetic_clip, LINE_Y_THRESHOLD)
+
+    assert partial['cancelled']
+    assert resumed['detection_cache']['hits'] == 0
+    assert resumed['total_violations'] == clean['total_violations'] > 0
+    assert resumed['vehicle_ids'] == clean['vehicle_ids']
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script for the exported-model backend pre- and post-processing
+"""
+
+import sys
+
+import numpy as np
+import pytest
+
+from detector_backends import ExportedYoloBackend, letterbox
+
+IMGSZ = 640
+NUM_CLASSES = 13
+FRAME_SHAPE = (480, 854, 3)
+# Letterbox of an 854x480 frame into 640x640: scaled by 640/854, padded top and bottom
+SCALE = IMGSZ / 854
+PAD_Y = (IMGSZ - round(480 * SCALE)) / 2
+
+
+class FakeExportedBackend(ExportedYoloBackend):
+    """Returns a fixed YOLOv8-shaped output instead of running a model"""
+
+    def __init__(self, model_path, output):
+        super().__init__(model_path, imgsz=IMGSZ)
+        self.output = output
+        self.blobs = []
+
+    def _infer(self, blob):
+        self.blobs.append(blob)
+        return self.output
+
+
+def _output(anchors):
+    """(1, 4 + num_classes, N) tensor from frame-space (x1, y1, x2, y2, class, score) anchors"""
+    output = np.zeros((1, 4 + NUM_CLASSES, len(anchors)), dtype=np.float32)
+    for i, (x1, y1, x2, y2, class_id, score) in enumerate(anchors):
+        x1, x2 = x1 * SCALE, x2 * SCALE
+        y1, y2 = y1 * SCALE + PAD_Y, y2 * SCALE + PAD_Y
+        output[0, :4, i] = [(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1]
+        output[0, 4 + class_id, i] = score
+    return output
+
+
+def test_letterbox_pads_and_normalizes():
+    """The frame is scaled into the centre band, grey-padded, RGB and in [0, 1]"""
+    frame = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+    frame[:, :, 0] = 255  # Blue in BGR
+    blob, scale, pad_x, pad_y = letterbox(frame, IMGSZ)
+
+    assert blob.shape == (1, 3, IMGSZ, IMGSZ) and blob.dtype == np.float32
+    assert scale == pytest.approx(SCALE) and (pad_x, pad_y) == (0, PAD_Y)
+    assert np.allclose(blob[0, :, :int(pad_y)], 114 / 255)
+    assert np.allclose(blob[0, :, IMGSZ - int(pad_y):], 114 / 255)
+    # Channels are swapped to RGB: blue ends up last
+    assert np.allclose(blob[0, :, IMGSZ // 2, IMGSZ // 2], [0, 0, 1])
+
+
+def test_postprocess_maps_filters_and_suppresses(tmp_path):
+    """Boxes map back to the frame; low scores, other classes and same-class overlaps are dropped"""
+    model_path = tmp_path / 'model.onnx'
+    model_path.write_bytes(b'')
+    anchors = [
+        (100, 100, 200, 180, 2, 0.9),   # Car
+        (104, 102, 204, 182, 2, 0.8),   # Same car, lower score: suppressed
+        (100, 100, 200, 180, 7, 0.7),   # Truck on the same box: another class, kept
+        (400, 300, 460, 340, 2, 0.3),   # Below the confidence threshold
+        (600, 200, 640, 300, 0, 0.95),  # Person, not a requested class
+        (800, 400, 900, 500, 2, 0.6),   # Runs off the frame: clipped
+    ]
+    backend = FakeExportedBackend(str(model_path), _output(anchors))
+    detections = backend.detect(np.zeros(FRAME_SHAPE, dtype=np.uint8), classes=[2, 7], conf=0.5)
+
+    assert backend.blobs[0].shape == (1, 3, IMGSZ, IMGSZ)
+    assert detections.cls.tolist() == [2, 7, 2]
+    assert np.allclose(detections.conf, [0.9, 0.7, 0.6])
+    assert np.allclose(detections.xyxy, [[100, 100, 200, 180], [100, 100, 200, 180], [800, 400, 854, 480]],
+                       atol=0.5)
+    assert set(detections.speed) == {'preprocess', 'inference', 'postprocess'}
+
+    # Without a class filter the person is kept; nothing above the threshold gives an empty result
+    assert 0 in backend.detect(np.zeros(FRAME_SHAPE, dtype=np.uint8), conf=0.5).cls.tolist()
+    assert len(backend.detect(np.zeros(FRAME_SHAPE, dtype=np.uint8), conf=0.99)) == 0
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script for low-rate illegal-parking dwell detection
+"""
+
+import os
+import sys
+import time
+
+import cv2 as cv
+import numpy as np
+import pytest
+
+import enhanced_detector_fixed
+import model_registry
+from detector_backends import Detections, create_backend
+from dwell import DwellMonitor, DwellSampler, appearance_hash, hash_distance
+from enhanced_detector_fixed import RedLightViolationDetector
+from model_registry import ModelRegistry
+from testing_support import StubBackend
+
+ZONE = [(500, 200), (800, 200), (800, 420), (500, 420)]
+
+
+def _car(frame, pattern_seed, x1=600, y1=280, x2=720, y2=360):
+    """Draw a saturated textured vehicle the stub backend can find"""
+    rng = np.random.default_rng(pattern_seed)
+    patch = rng.integers(0, 256, size=((y2 - y1) // 10, (x2 - x1) // 10, 3), dtype=np.uint8)
+    patch[:, :, 2] = 255  # Keep it saturated
+    frame[y1:y2, x1:x2] = cv.resize(patch, (x2 - x1, y2 - y1), interpolation=cv.INTER_NEAREST)
+    return frame
+
+
+def _blank():
+    return np.full((480, 854, 3), 90, dtype=np.uint8)
+
+
+def test_appearance_hash_tracks_the_same_vehicle():
+    """Noise barely moves the hash; a different vehicle changes it a lot"""
+    car = _car(_blank(), 1)[280:360, 600:720]
+    noisy = np.clip(car.astype(np.int16) + np.random.default_rng(0).integers(-6, 7, car.shape), 0, 255).astype(np.uint8)
+    other = _car(_blank(), 2)[280:360, 600:720]
+    assert hash_distance(appearance_hash(car), appearance_hash(noisy)) <= 4
+    assert hash_distance(appearance_hash(car), appearance_hash(other)) > 12
+
+
+def test_monitor_reports_dwell_once_and_restarts_for_new_vehicle():
+    """A vehicle is reported after the dwell time; a swap at the same spot starts over"""
+    backend = StubBackend()
+    regions = []
+
+    def detect(image):
+        regions.append(image.shape[:2])
+        return backend.detect(image)
+
+    monitor = DwellMonitor(detect, [ZONE], max_dwell_s=12)
+    events = []
+    for t in range(0, 40, 5):
+        frame = _car(_blank(), 1 if t < 25 else 2)
+        events += [(t, event['vehicle_id'], event['dwell_seconds']) for event in monitor.sample(frame, float(t))]
+
+    # Only the zone region is searched
+    assert set(regions) == {(220, 300)}
+    # Car 1 parks at 0 s and is reported at 15 s; car 2 replaces it at 25 s and has dwelt only 10 s by 35 s
+    assert events == [(15, 1, 15.0)]
+    assert monitor.stats()['candidates'] == 1 and monitor._candidates[0]['id'] == 2
+
+    # Vehicles outside the zone are ignored
+    assert monitor.sample(_car(_blank(), 3, 100, 100, 200, 180), 40.0) == []
+
+
+def test_sampler_never_blocks_the_caller():
+    """Offers return at once; frames arriving while a sample runs are skipped"""
+    def slow_detect(image):
+        time.sleep(0.2)
+        return Detections(np.zeros((0, 4)), np.zeros(0), np.zeros(0))
+
+    sampler = DwellSampler(DwellMonitor(slow_detect, [ZONE]), interval_s=0.0)
+    frame = _blank()
+    start = time.perf_counter()
+    taken = [sampler.offer(frame, i * 0.04) for i in range(10)]
+    assert time.perf_counter() - start < 0.05
+    assert taken[0] and not any(taken[1:]) and sampler.skipped_busy == 9
+    assert sampler.flush(timeout=5)
+    sampler.close()
+    assert sampler.stats()['samples'] == 1
+
+
+def test_detector_samples_parking_alongside_red_light(make_detector, work_dir, stub_backends):
+    """A parked vehicle in a video is reported from a handful of samples"""
+    config = {'frame_skip': 1, 'red_light_start_time': 100, 'warmup_iterations': 0, 'tracker': 'iou',
+              'violation_rules': ['red_light_violation', 'illegal_parking'],
+              'rule_params': {'illegal_parking': {'zones': [ZONE], 'max_dwell_s': 4, 'sample_interval_s': 1.5}}}
+    path = os.path.join(work_dir, 'parked.mp4')
+    writer = cv.VideoWriter(path, cv.VideoWriter_fourcc(*'mp4v'), 10, (854, 480))
+    frame = _car(_blank(), 1)
+    for _ in range(80):
+        writer.write(frame)
+    writer.release()
+
+    detector = make_detector(config)
+    results = detector.process_video(path)
+
+    assert results['violations_by_type'] == {'red_light_violation': 0, 'illegal_parking': 1}
+    assert 3 <= results['dwell']['samples'] <= 6
+    violation = detector.violations[0]
+    assert violation['violation_type'] == 'illegal_parking' and violation['details']['dwell_seconds'] >= 4
+    assert os.path.exists(violation['image_path'])
+
+
+def test_dwell_detector_gets_its_own_model(work_dir, monkeypatch):
+    """Parking samples never run on the tracking model, and share its weights fallback"""
+    class FakeModel:
+        def __call__(self, image, **kwargs):
+            return [type('Result', (), {'boxes': None, 'speed': {}})()]
+
+    loaded, created = [], []
+    registry = ModelRegistry()
+    monkeypatch.setattr(registry, '_load', lambda path, device, task: loaded.append(path) or FakeModel())
+    monkeypatch.setattr(model_registry, 'registry', registry)
+    monkeypatch.setattr(enhanced_detector_fixed, 'create_backend',
+                        lambda *args, **kwargs: created.append(create_backend(*args, **kwargs)) or created[-1])
+
+    detector = RedLightViolationDetector('missing.pt', {'tracker': 'iou', 'warmup_iterations': 0})
+    main_model = detector.model
+    assert len(detector._dwell_detector()(_blank())) == 0
+
+    assert loaded == ['yolov8n.pt']
+    assert len(created) == 2 and created[1].model is not main_model
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for full-resolution violation evidence
+"""
+
+import os
+import sys
+
+import cv2 as cv
+import numpy as np
+import pytest
+
+from detector_backends import Detections
+from evidence import extract_evidence, map_bbox
+from testing_support import generate_synthetic_clip
+
+
+def test_extract_maps_box_to_source_resolution():
+    """Boxes and padding scale with the source, and a second pass can tighten the box"""
+    source = np.zeros((720, 1280, 3), dtype=np.uint8)
+    assert np.allclose(map_bbox([100, 50, 200, 150], (640, 360), source.shape), [200, 100, 400, 300])
+
+    crop, source_bbox = extract_evidence(source, [100, 50, 200, 150], (640, 360), padding=10)
+    assert crop.shape[:2] == (240, 240) and source_bbox == [200, 100, 400, 300]
+
+    calls = []
+
+    def detect(image):
+        calls.append(image.shape[:2])
+        # The region is (100, 0)-(500, 400); the re-detected box is slightly tighter
+        return Detections(np.array([[110, 110, 290, 300]], dtype=np.float32), np.array([0.9]), np.array([2]))
+
+    crop, source_bbox = extract_evidence(source, [100, 50, 200, 150], (640, 360), padding=10, detect=detect)
+    assert calls == [(400, 400)] and source_bbox == [210, 110, 390, 300]
+    assert crop.shape[:2] == (230, 220)
+
+    # A pass that finds nothing overlapping keeps the mapped box
+    _, source_bbox = extract_evidence(source, [100, 50, 200, 150], (640, 360),
+                                      detect=lambda image: Detections(np.array([[0, 0, 10, 10]]),
+                                                                      np.array([0.9]), np.array([2])))
+    assert source_bbox == [200, 100, 400, 300]
+
+
+def test_detector_saves_full_resolution_snapshots(make_detector, work_dir):
+    """Snapshots from a high-resolution source are cut at source resolution"""
+    clip = generate_synthetic_clip(os.path.join(work_dir, 'clip.mp4'), (1280, 720), 8, 1)
+    detector = make_detector({'frame_skip': 2, 'red_light_start_time': 2.0, 'warmup_iterations': 0,
+                              'tracker': 'iou'})
+    results = detector.process_video(clip['path'])
+    assert results['total_violations'] > 0
+
+    scale = 1280 / 854
+    for violation in detector.violations:
+        x1, y1, x2, y2 = violation['bbox']
+        sx1, sy1, sx2, sy2 = violation['source_bbox']
+        assert abs((sx2 - sx1) - (x2 - x1) * scale) < 1
+        height, width = cv.imread(violation['image_path']).shape[:2]
+        assert width > (x2 - x1) * scale
+
+
+def test_smaller_source_and_refine_timing(make_detector, work_dir):
+    """A source smaller than the working frame is not upscaled; re-detection is its own stage"""
+    clip = generate_synthetic_clip(os.path.join(work_dir, 'small.mp4'), (640, 360), 8, 1)
+    detector = make_detector({'frame_skip': 2, 'red_light_start_time': 2.0, 'warmup_iterations': 0,
+                              'tracker': 'iou'})
+    results = detector.process_video(clip['path'])
+    assert results['total_violations'] > 0
+    assert all(violation['source_bbox'] is None for violation in detector.violations)
+    assert results['stage_timings']['evidence_detect']['count'] == 0
+
+    clip = generate_synthetic_clip(os.path.join(work_dir, 'large.mp4'), (1280, 720), 8, 1)
+    detector = make_detector({'frame_skip': 2, 'red_light_start_time': 2.0, 'warmup_iterations': 0,
+                              'tracker': 'iou', 'snapshot_refine': True})
+    results = detector.process_video(clip['path'])
+    timings = results['stage_timings']
+    assert timings['evidence_detect']['count'] == timings['snapshot_io']['count'] == results['total_violations']
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
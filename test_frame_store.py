@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Test script for the memory-mapped frame store
+"""
+
+import os
+import tempfile
+
+import cv2 as cv
+import numpy as np
+
+from frame_store import FrameStore
+from testing_support import generate_synthetic_clip
+
+
+def test_store_matches_decoded_frames():
+    """Stored frames equal the resized decoded frames and are reused across builds"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        clip = generate_synthetic_clip(os.path.join(work_dir, 'clip.mp4'), (640, 360), 4, 1)
+        store = FrameStore.build(clip['path'], os.path.join(work_dir, 'frames'), (320, 240), stride=3)
+        assert len(store) == clip['total_frames'] // 3
+        assert store.frames.shape[1:] == (240, 320, 3)
+
+        cap = cv.VideoCapture(clip['path'])
+        for _ in range(6):
+            _, frame = cap.read()
+        cap.release()
+        frame_number, stored = list(store.iter_frames())[1]
+        assert frame_number == 6
+        assert np.array_equal(stored, cv.resize(frame, (320, 240)))
+
+        reopened = FrameStore.build(clip['path'], os.path.join(work_dir, 'frames'), (320, 240), stride=3)
+        assert reopened.path == store.path
+        assert not reopened[0].flags.writeable
+        del store, reopened, stored
+
+
+if __name__ == "__main__":
+    test_store_matches_decoded_frames()
+    print("✅ Frame store tests passed!")
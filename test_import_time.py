@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Import-time budget test for utils.py
+
+Worker processes import utils on every start, so heavy analytics libraries
+must stay out of the module-level imports.
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+# Budget for a cold `import utils`, in seconds (override with UTILS_IMPORT_BUDGET)
+IMPORT_BUDGET_SECONDS = float(os.environ.get('UTILS_IMPORT_BUDGET', '1.0'))
+
+HEAVY_MODULES = ['pandas', 'matplotlib.pyplot', 'seaborn', 'plotly.express',
+                 'plotly.graph_objects', 'plotly.subplots']
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import utils
+elapsed = time.perf_counter() - start
+print(json.dumps({'elapsed': elapsed, 'loaded': [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def measure_utils_import():
+    """Import utils in a fresh interpreter and report time and heavy modules loaded"""
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.check_output([sys.executable, '-c', PROBE], cwd=repo_dir)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def test_utils_import_is_lazy():
+    """Heavy analytics libraries are not imported with utils"""
+    result = measure_utils_import()
+    assert result['loaded'] == [], f"utils imported heavy modules: {result['loaded']}"
+
+
+def test_utils_import_budget():
+    """Cold import of utils stays within the budget"""
+    result = measure_utils_import()
+    assert result['elapsed'] < IMPORT_BUDGET_SECONDS, (
+        f"import utils took {result['elapsed']:.3f}s (budget {IMPORT_BUDGET_SECONDS:.3f}s)"
+    )
+
+
+def main():
+    """Run the import-time checks"""
+    print("🔍 Measuring utils import time...")
+    result = measure_utils_import()
+    print(f"   - Import time: {result['elapsed']:.3f}s (budget {IMPORT_BUDGET_SECONDS:.3f}s)")
+    print(f"   - Heavy modules loaded: {result['loaded'] or 'none'}")
+
+    if result['loaded'] or result['elapsed'] >= IMPORT_BUDGET_SECONDS:
+        print("❌ Import-time budget check failed!")
+        sys.exit(1)
+    print("✅ Import-time budget check passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for the HTTP inference service
+"""
+
+import sys
+import json
+import time
+import base64
+import asyncio
+import http.client
+
+import cv2 as cv
+import numpy as np
+import pytest
+
+from inference_service import InferenceService
+from jobs import ACTIVE_STATES, JobManager
+
+
+def _request(port, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    conn.request(method, path, body=body, headers=headers or {})
+    response = conn.getresponse()
+    data = response.read()
+    conn.close()
+    if response.getheader('Content-Type', '').startswith('application/json'):
+        data = json.loads(data)
+    return response.status, data
+
+
+def _jpeg(box_bottom):
+    frame = np.zeros((480, 854, 3), dtype=np.uint8)
+    cv.rectangle(frame, (400, box_bottom - 60), (480, box_bottom), (0, 0, 255), -1)
+    return cv.imencode('.jpg', frame)[1].tobytes()
+
+
+async def _exercise(service, clip_path):
+    await service.start('127.0.0.1', 0)
+    port = service.port
+    call = lambda *args, **kwargs: asyncio.to_thread(_request, port, *args, **kwargs)
+    try:
+        while not service.model_ready:
+            await asyncio.sleep(0.01)
+        status, health = await call('GET', '/health')
+        assert status == 200 and health['status'] == 'ok'
+
+        # Concurrent single-frame requests share micro-batches
+        responses = await asyncio.gather(*(call('POST', '/detect', _jpeg(200), {'Content-Type': 'image/jpeg'})
+                                           for _ in range(6)))
+        assert all(status == 200 and len(body['detections']) == 1 for status, body in responses)
+        assert max(service.scheduler.batch_sizes) > 1
+
+        status, body = await call('POST', '/detect/batch', json.dumps(
+            {'images': [base64.b64encode(_jpeg(250)).decode()] * 3}), {'Content-Type': 'application/json'})
+        assert status == 200 and len(body['results']) == 3
+
+        # A tracked stream reports a stop-line crossing during red
+        _, first = await call('POST', '/detect?stream=cam1&red=1', _jpeg(300))
+        _, second = await call('POST', '/detect?stream=cam1&red=1', _jpeg(340))
+        assert first['violations'] == [] and len(second['violations']) == 1
+        assert second['violations'][0]['vehicle_id'] == second['detections'][0]['track_id']
+        assert second['violations'][0]['violation_type'] == 'red_light_violation'
+        status, error = await call('POST', '/detect?stream=cam2&rules=jaywalking', _jpeg(300))
+        assert status == 400 and 'jaywalking' in error['error']
+
+        assert (await call('POST', '/detect', b'not an image'))[0] == 400
+        assert (await call('GET', '/nowhere'))[0] == 404
+        assert (await call('GET', '/jobs?limit=ten'))[0] == 400
+        assert (await call('GET', '/jobs?limit=0'))[0] == 400
+
+        # Clients may tune violation settings, not paths or models outside MODEL_CONFIGS
+        for body, message in (({'config': {'violation_save_path': '/tmp/elsewhere'}}, 'violation_save_path'),
+                              ({'model_path': '/srv/other/weights.pt'}, 'Unknown model'),
+                              ({'config': {'frame_skip': 50}}, 'frame_skip')):
+            status, error = await call('POST', '/jobs', json.dumps(dict(body, video_path=clip_path)),
+                                       {'Content-Type': 'application/json'})
+            assert status == 400 and message in error['error']
+
+        status, job = await call('POST', '/jobs', json.dumps({'video_path': clip_path,
+                                                              'config': {'line_y_threshold': 310}}),
+                                 {'Content-Type': 'application/json'})
+        assert status == 202
+        deadline = time.time() + 60
+        while (await call('GET', f"/jobs/{job['id']}"))[1]['status'] in ACTIVE_STATES:
+            assert time.time() < deadline
+            await asyncio.sleep(0.1)
+        status, results = await call('GET', f"/jobs/{job['id']}/results")
+        assert status == 200 and results['total_violations'] == len(results['violations']) > 0
+
+        status, metrics = await call('GET', '/metrics')
+        metrics = metrics.decode()
+        assert status == 200
+        assert 'rlvd_requests_total{method="POST",route="/detect",status="200"}' in metrics
+        assert 'rlvd_jobs{status="completed"} 1' in metrics
+    finally:
+        await service.close()
+
+
+def test_service_detects_batches_and_runs_jobs(tmp_path, synthetic_clip, stub_backends):
+    """Frame requests are micro-batched, streams report violations and jobs run to completion"""
+    config = {'frame_skip': 2, 'red_light_start_time': 2.0, 'warmup_iterations': 0,
+              'tracker': 'iou', 'detection_cache_dir': None}
+    service = InferenceService('stub.pt', config, JobManager(str(tmp_path / 'jobs'), 1),
+                               max_batch_size=8, max_wait_ms=50)
+    asyncio.run(_exercise(service, synthetic_clip['path']))
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
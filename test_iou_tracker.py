@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test script for the built-in IoU tracker
+"""
+
+import numpy as np
+
+from iou_tracker import IoUTracker, greedy_assignment, iou_matrix
+
+
+def test_iou_matrix():
+    """Identical boxes have IoU 1, disjoint boxes 0"""
+    a = np.array([[0, 0, 10, 10], [20, 20, 30, 30]], dtype=np.float32)
+    iou = iou_matrix(a, a[:1])
+    assert np.allclose(iou[:, 0], [1.0, 0.0])
+
+
+def test_greedy_assignment_respects_max_cost():
+    """Pairs above the cost limit stay unmatched"""
+    cost = np.array([[0.1, 0.9], [0.2, 5.0]])
+    rows, cols = greedy_assignment(cost, max_cost=1.0)
+    assert list(zip(rows, cols)) == [(0, 0)]
+
+
+def test_ids_stay_stable_for_moving_boxes():
+    """Two vehicles moving in parallel keep their IDs, including a missed frame"""
+    tracker = IoUTracker(max_age=3)
+    first = None
+    for step in range(20):
+        if step == 10:
+            ids = tracker.update(np.zeros((0, 4)))
+            assert len(ids) == 0
+            continue
+        boxes = np.array([[100, 10 * step, 140, 10 * step + 60],
+                          [300, 15 * step, 340, 15 * step + 60]], dtype=np.float32)
+        ids = tracker.update(boxes, np.array([2, 2]))
+        if first is None:
+            first = list(ids)
+        assert list(ids) == first
+
+
+def test_class_gate_and_expiry():
+    """Tracks never switch class and expire after max_age missed updates"""
+    tracker = IoUTracker(max_age=1)
+    box = np.array([[0, 0, 50, 50]], dtype=np.float32)
+    car = tracker.update(box, np.array([2]))[0]
+    truck = tracker.update(box, np.array([7]))[0]
+    assert car != truck
+    tracker.update(np.zeros((0, 4)))
+    tracker.update(np.zeros((0, 4)))
+    assert len(tracker.ids) == 0
+
+
+if __name__ == "__main__":
+    test_iou_matrix()
+    test_greedy_assignment_respects_max_cost()
+    test_ids_stay_stable_for_moving_boxes()
+    test_class_gate_and_expiry()
+    print("✅ IoU tracker tests passed!")
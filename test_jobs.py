@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test script for the background job queue
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from jobs import ACTIVE_STATES, PROCESS_STARTED_AT, JobManager, JobStore
+
+
+def _wait(manager, job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job['status'] not in ACTIVE_STATES:
+            return job
+        time.sleep(0.1)
+    raise TimeoutError(job_id)
+
+
+def test_jobs_complete_and_cancel(tmp_path, synthetic_clip, stub_backends):
+    """Queued jobs run in the background, report results and can be cancelled"""
+    config = {'frame_skip': 2, 'red_light_start_time': 2.0, 'warmup_iterations': 0,
+              'tracker': 'iou', 'output_resolution': (854, 480), 'violation_save_path': 'violations'}
+    manager = JobManager(str(tmp_path / 'jobs'), max_workers=1)
+
+    first = manager.submit(synthetic_clip['path'], 'stub.pt', config)
+    second = manager.submit(synthetic_clip['path'], 'stub.pt', config)
+    manager.cancel(second)
+
+    done = _wait(manager, first)
+    assert done['status'] == 'completed', done['error']
+    assert done['progress'] == 1.0
+    results = manager.results(first)
+    assert results['total_violations'] == done['violations'] > 0
+    assert os.path.exists(done['output_path'])
+    # Snapshots land in the job's own folder, not the submitted shared one
+    assert all(os.path.dirname(v['image_path']) == manager.violations_dir(first) for v in results['violations'])
+    assert len(os.listdir(manager.violations_dir(first))) == done['violations']
+    assert _wait(manager, second)['status'] == 'cancelled'
+
+    # A new manager over the same table sees the finished jobs
+    reopened = JobManager(str(tmp_path / 'jobs'), max_workers=1)
+    assert {job['id'] for job in reopened.list()} == {first, second}
+
+    # Finished jobs leave no tokens behind; unknown IDs do not create any
+    manager._executor.shutdown(wait=True)
+    assert manager._tokens == {} and manager.is_cancelled(second) and not manager.is_cancelled('unknown')
+    manager.cancel('unknown')
+    assert manager._tokens == {}
+
+    # Only jobs past the retention period are swept, outputs included
+    assert reopened.cleanup_finished(max_age_hours=1) == 0
+    reopened.store.update(first, finished_at=time.time() - 7200)
+    assert reopened.cleanup_finished(max_age_hours=1) == 1
+    assert reopened.get(first) is None and not os.path.exists(reopened.job_dir(first))
+    assert reopened.get(second) is not None
+
+
+def test_only_orphaned_jobs_are_interrupted(tmp_path):
+    """A new manager leaves jobs of live processes alone and interrupts the rest"""
+    exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+    exited.wait()
+    store = JobStore(str(tmp_path / 'jobs' / 'jobs.db'))
+    owners = {
+        'live': (os.getpid(), PROCESS_STARTED_AT),
+        'exited': (exited.pid, time.time()),
+        'recycled': (os.getpid(), PROCESS_STARTED_AT - 3600),
+        'legacy': (None, None),
+    }
+    for job_id, (pid, started_at) in owners.items():
+        store.insert({'id': job_id, 'video_path': 'in.mp4', 'model_path': 'stub.pt', 'config': '{}',
+                      'status': 'running', 'created_at': time.time(),
+                      'owner_pid': pid, 'owner_started_at': started_at})
+
+    JobManager(str(tmp_path / 'jobs'), max_workers=1)
+    statuses = {job_id: store.get(job_id)['status'] for job_id in owners}
+    assert statuses == {'live': 'running', 'exited': 'interrupted', 'recycled': 'interrupted',
+                        'legacy': 'interrupted'}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
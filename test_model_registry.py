@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script for the process-wide model registry
+"""
+
+import sys
+import threading
+
+import pytest
+
+from model_registry import ModelRegistry
+
+
+class FakeModel:
+    def __init__(self, path):
+        self.path = path
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = ModelRegistry()
+    loads = []
+    monkeypatch.setattr(registry, '_load', lambda path, device, task: loads.append(path) or FakeModel(path))
+    registry.loads = loads
+    return registry
+
+
+def test_weights_load_once_and_each_thread_gets_its_own_instance(registry):
+    """Threads reuse the cached weights but never share a model instance"""
+    main = registry.get('yolov8n.pt')
+    assert registry.get('yolov8n.pt') is main
+
+    models = {}
+    barrier = threading.Barrier(4)
+
+    def worker(index):
+        barrier.wait()
+        models[index] = (registry.get('yolov8n.pt'), registry.get('yolov8n.pt'))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert registry.loads == ['yolov8n.pt']
+    assert all(first is second for first, second in models.values())
+    instances = {id(first) for first, _ in models.values()} | {id(main)}
+    assert len(instances) == 5
+
+
+def test_private_copies_and_clear(registry):
+    """shared=False always copies; clear() forces a reload"""
+    shared = registry.get('yolov8n.pt')
+    private = registry.get('yolov8n.pt', shared=False)
+    assert private is not shared and private.path == shared.path
+    assert registry.is_loaded('yolov8n.pt') and not registry.is_loaded('yolov8n.pt', device='cpu')
+
+    registry.clear()
+    assert not registry.is_loaded('yolov8n.pt')
+    assert registry.get('yolov8n.pt') is not shared
+    assert registry.loads == ['yolov8n.pt', 'yolov8n.pt']
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
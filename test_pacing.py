@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for latency SLO pacing
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+from batching import BatchScheduler
+from pacing import PacingController, build_ladder
+from testing_support import StubBackend, generate_synthetic_clip
+
+
+class SlowStubBackend(StubBackend):
+    """Stub whose inference time shrinks with the inference size"""
+
+    def detect(self, frame, classes=None, conf=0.5, imgsz=None):
+        time.sleep(0.08 * (imgsz or 640) / 640)
+        return super().detect(frame, classes, conf, imgsz)
+
+
+def test_ladder_order():
+    """Steps go inference size, frame rate, annotation, then faster stock models"""
+    ladder = build_ladder({}, 'yolov8m.pt')
+    assert [step['setting'] for step in ladder] == ['inference_size', 'inference_size', 'frame_stride',
+                                                    'frame_stride', 'annotate', 'model_path', 'model_path']
+    assert [step['value'] for step in ladder[-2:]] == ['yolov8s.pt', 'yolov8n.pt']
+    assert all(step['setting'] != 'model_path' for step in build_ladder({'inference_size': 480}, 'best.pt'))
+    assert build_ladder({'inference_size': 480}, 'best.pt')[0]['value'] == 320
+
+
+def test_model_rungs_need_builtin_tracking(make_detector, work_dir):
+    """Models are only swapped when track IDs survive the swap"""
+    assert all(step['setting'] != 'model_path' for step in build_ladder({}, 'yolov8m.pt', swap_models=False))
+
+    clip = generate_synthetic_clip(os.path.join(work_dir, 'clip.mp4'), (640, 360), 0.5, 1)
+    for tracker, swaps_models in (('bytetrack', False), ('iou', True)):
+        detector = make_detector({'red_light_start_time': 1.0, 'warmup_iterations': 0, 'tracker': tracker,
+                                  'latency_slo_ms': 1000})
+        detector.model_path = 'yolov8m.pt'
+        detector.tracking_available = True
+        ladder = detector.process_stream(clip['path'], realtime=False)['pacing']['ladder']
+        assert any(label.startswith('model') for label in ladder) == swaps_models
+
+    # A shared batch scheduler ignores per-stream input size and model
+    scheduler = BatchScheduler(StubBackend().detect_batch, name='pacing-test')
+    detector = make_detector({'red_light_start_time': 1.0, 'warmup_iterations': 0, 'latency_slo_ms': 1000},
+                             batch_scheduler=scheduler)
+    detector.model_path = 'yolov8m.pt'
+    ladder = detector.process_stream(clip['path'], realtime=False)['pacing']['ladder']
+    scheduler.close()
+    assert ladder == ['every 2 frames', 'every 3 frames', 'annotation off']
+
+    # An exported model ignores the inference size
+    fixed_size = StubBackend()
+    fixed_size.supports_resize = False
+    detector = make_detector({'red_light_start_time': 1.0, 'warmup_iterations': 0, 'tracker': 'iou',
+                              'latency_slo_ms': 1000}, backend=fixed_size)
+    ladder = detector.process_stream(clip['path'], realtime=False)['pacing']['ladder']
+    assert not any(label.startswith('inference size') for label in ladder)
+
+
+def test_controller_steps_down_and_up():
+    """Sustained SLO misses step down one rung per window; headroom steps back up"""
+    controller = PacingController(50, build_ladder({}, 'yolov8n.pt'), window=4)
+    for _ in range(8):
+        controller.record(80)
+    assert controller.level == 2 and controller.settings() == {'inference_size': 320}
+    for _ in range(8):
+        controller.record(40)  # Within the SLO but without headroom
+    assert controller.level == 2
+    for _ in range(4):
+        controller.record(10)
+    assert controller.level == 1 and controller.settings() == {'inference_size': 480}
+    assert [change['to_level'] for change in controller.changes] == [1, 2, 1]
+    summary = controller.summary()
+    assert summary['within_slo'] == 0.6 and summary['p95_ms'] == 80
+    assert 40 <= summary['p50_ms'] < 40 * 2 ** 0.25  # One histogram bucket
+
+
+def test_stream_degrades_under_load(make_detector, work_dir):
+    """A stream that misses its SLO degrades quality and restores settings afterwards"""
+    clip = generate_synthetic_clip(os.path.join(work_dir, 'clip.mp4'), (640, 360), 3, 1)
+    detector = make_detector({'red_light_start_time': 1.0, 'warmup_iterations': 0, 'tracker': 'iou',
+                              'latency_slo_ms': 40, 'slo_window': 3}, backend=SlowStubBackend())
+    results = detector.process_stream(clip['path'])
+
+    pacing = results['pacing']
+    assert pacing['changes'] and pacing['changes'][0]['step'] == 'inference size 480'
+    assert pacing['level'] > 0
+    assert detector._quality == {}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
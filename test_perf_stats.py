@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-stage latency histograms
+"""
+
+import sys
+
+import pytest
+
+from perf_stats import BUCKETS_PER_OCTAVE, PIPELINE_STAGES, LatencyHistogram, StageTimer
+
+BUCKET_RATIO = 2 ** (1 / BUCKETS_PER_OCTAVE)
+
+
+def test_percentiles_are_bucket_upper_bounds():
+    """Each estimate is at or at most one bucket above the exact percentile"""
+    histogram = LatencyHistogram()
+    # 1..100 ms, so the exact p-th percentile is p ms
+    for ms in range(1, 101):
+        histogram.record(ms * 1_000_000)
+
+    for pct in (1, 50, 95, 99):
+        exact = pct * 1_000_000
+        assert exact <= histogram.percentile(pct) < exact * BUCKET_RATIO
+    # Estimates never exceed the largest recorded duration
+    assert histogram.percentile(100) == 100_000_000
+
+
+def test_summary_in_milliseconds():
+    """Counts, totals and the mean are exact; empty histograms report zeros"""
+    assert LatencyHistogram().summary() == {'count': 0, 'total_ms': 0.0, 'mean_ms': 0.0, 'p50_ms': 0.0,
+                                            'p95_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+    histogram = LatencyHistogram()
+    for ns in (2_000_000, 4_000_000, 6_000_000):
+        histogram.record(ns)
+    summary = histogram.summary()
+
+    assert summary['count'] == 3
+    assert summary['total_ms'] == 12.0 and summary['mean_ms'] == 4.0 and summary['max_ms'] == 6.0
+    assert 4.0 <= summary['p50_ms'] < 4.0 * BUCKET_RATIO
+    assert summary['p99_ms'] == 6.0
+
+    # Zero-length durations land in the lowest bucket instead of failing
+    histogram.record(0)
+    assert histogram.percentile(1) == 2.0 ** (1 / BUCKETS_PER_OCTAVE)
+
+
+def test_stage_timer():
+    """Pipeline stages are always reported; unknown stages are added on first use"""
+    timer = StageTimer()
+    with timer.time('inference'):
+        pass
+    timer.record('upload', 5_000_000)
+    summary = timer.summary()
+
+    assert list(summary) == PIPELINE_STAGES + ['upload']
+    assert summary['inference']['count'] == 1 and summary['decode']['count'] == 0
+    line = timer.format_summary()
+    assert line.startswith('inference p50=') and 'upload p50=' in line and 'decode' not in line
+
+    timer.reset()
+    assert 'upload' not in timer.summary() and timer.format_summary() == ''
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
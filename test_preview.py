@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Test script for the live preview buffer
+"""
+
+import cv2 as cv
+import numpy as np
+
+from preview import LatestFrameBuffer, PreviewPublisher
+
+
+def test_publisher_downscales_and_rate_limits():
+    """Frames are downscaled to JPEG, throttled, and the latest frame wins"""
+    buffer = LatestFrameBuffer()
+    publisher = PreviewPublisher(buffer, max_fps=1000, max_width=200)
+    frame = np.zeros((480, 854, 3), dtype=np.uint8)
+    assert publisher.publish(frame, {'frame_number': 1})
+    publisher.min_interval = 0
+    frame[:] = 255
+    assert publisher.publish(frame, {'frame_number': 2})
+
+    sequence, jpeg, info = buffer.get()
+    decoded = cv.imdecode(np.frombuffer(jpeg, np.uint8), cv.IMREAD_COLOR)
+    assert sequence == 2 and info['frame_number'] == 2
+    assert decoded.shape[1] == 200 and decoded.mean() > 250
+
+    slow = PreviewPublisher(LatestFrameBuffer(), max_fps=0.001)
+    assert slow.publish(frame) and not slow.publish(frame)
+
+
+if __name__ == "__main__":
+    test_publisher_downscales_and_rate_limits()
+    print("✅ Preview tests passed!")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test script for progress reporting and cancellation in process_video
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from progress import CancellationToken, ProgressReporter
+
+
+def test_reporter_throttles_and_estimates():
+    """Reports are rate-limited unless forced, and carry progress and ETA"""
+    reports = []
+    reporter = ProgressReporter(reports.append, total_frames=100, interval=60)
+    assert reporter.report(10, 5, [{'vehicle_id': 1}]) is not None
+    assert reporter.report(20, 10, []) is None
+    final = reporter.report(100, 50, [], force=True, status='completed')
+    assert len(reports) == 2
+    assert reports[0]['progress'] == 0.1 and reports[0]['latest_violations'] == [{'vehicle_id': 1}]
+    assert reports[0]['eta_seconds'] is not None
+    assert final['eta_seconds'] == 0
+
+
+def test_process_video_stops_on_cancel(make_detector, work_dir, synthetic_clip):
+    """Cancelling from a progress callback stops the frame loop early"""
+    detector = make_detector({
+        'frame_skip': 2,
+        'warmup_iterations': 0,
+        'progress_interval': 0,
+        'violation_save_path': os.path.join(work_dir, 'violations'),
+    })
+    token = CancellationToken()
+    reports = []
+
+    def on_progress(report):
+        reports.append(report)
+        if report['frames_done'] >= 40:
+            token.cancel()
+
+    results = detector.process_video(synthetic_clip['path'], progress_callback=on_progress, cancel_token=token)
+
+    assert results['cancelled']
+    assert results['total_frames'] == 40 < synthetic_clip['total_frames']
+    assert reports[-1]['status'] == 'cancelled'
+    assert [r['frames_done'] for r in reports[:3]] == [2, 4, 6]
+
+
+def test_process_frame_needs_a_frame_time(make_detector):
+    """Without a capture or a timestamp there is no frame time to judge the signal by"""
+    detector = make_detector({'warmup_iterations': 0})
+    with pytest.raises(ValueError, match='timestamp'):
+        detector.process_frame(np.zeros((360, 640, 3), dtype=np.uint8))
+    annotated, _ = detector.process_frame(np.zeros((360, 640, 3), dtype=np.uint8), timestamp=0.0)
+    assert annotated.shape == (480, 854, 3)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for INT8 calibration sampling and the FP32 vs INT8 accuracy check
+"""
+
+import sys
+
+import numpy as np
+import pytest
+
+import enhanced_detector_fixed
+import quantization
+from quantization import check_accuracy, sample_calibration_frames
+from testing_support import StubBackend
+
+
+class DegradedStubBackend(StubBackend):
+    """Stands in for a badly calibrated model: misses every other vehicle"""
+
+    def detect(self, frame, classes=None, conf=0.5, imgsz=None):
+        detections = super().detect(frame, classes, conf, imgsz)
+        order = np.argsort(detections.xyxy[:, 0])
+        keep = np.sort(order[::2])
+        detections.xyxy, detections.conf, detections.cls = (detections.xyxy[keep], detections.conf[keep],
+                                                            detections.cls[keep])
+        return detections
+
+
+def _backends(monkeypatch, int8_backend):
+    def create(name, model_path, config, shared=True):
+        return int8_backend() if model_path == 'int8.xml' else StubBackend()
+    monkeypatch.setattr(quantization, 'create_backend', create)
+    monkeypatch.setattr(enhanced_detector_fixed, 'create_backend', create)
+
+
+def test_sample_calibration_frames(synthetic_clip):
+    """Frames are spread over every video and letterboxed like inference"""
+    blobs = sample_calibration_frames([synthetic_clip['path'], synthetic_clip['path']], num_frames=10, imgsz=320)
+    assert len(blobs) == 10
+    assert all(blob.shape == (1, 3, 320, 320) and blob.dtype == np.float32 for blob in blobs)
+    assert 0.0 <= min(blob.min() for blob in blobs) and max(blob.max() for blob in blobs) <= 1.0
+    with pytest.raises(ValueError):
+        sample_calibration_frames(['missing.mp4'])
+
+
+@pytest.mark.parametrize('int8_backend, passed', [(StubBackend, True), (DegradedStubBackend, False)])
+def test_check_accuracy(work_dir, synthetic_clip, monkeypatch, int8_backend, passed):
+    """A faithful INT8 model passes; one that misses vehicles fails on box agreement"""
+    _backends(monkeypatch, int8_backend)
+    config = {'frame_skip': 2, 'red_light_start_time': 2.0, 'warmup_iterations': 0, 'tracker': 'iou',
+              'confidence_threshold': 0.25, 'detection_cache_dir': None}
+    report = check_accuracy(synthetic_clip['path'], 'fp32.xml', 'int8.xml', config=config)
+
+    assert report['passed'] == passed
+    assert report['fp32_violations'] > 0
+    if passed:
+        assert report['box_agreement'] == 1.0 and report['violation_count_delta'] == 0
+    else:
+        assert 0.3 < report['box_agreement'] < 0.7
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
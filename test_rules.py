@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script for the violation rules engine
+"""
+
+import sys
+
+import numpy as np
+import pytest
+
+from detector_backends import Detections
+from rules import RulesEngine, TrackStore, create_rules, points_in_polygon
+from track_timeline import StopLineMonitor
+
+
+def _frame(boxes, ids):
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    return Detections(boxes, np.full(len(boxes), 0.9), np.full(len(boxes), 2), ids=np.asarray(ids))
+
+
+def test_points_in_polygon():
+    """Points inside a concave polygon are found in one call"""
+    polygon = [(0, 0), (10, 0), (10, 10), (5, 5), (0, 10)]
+    points = np.array([[2, 2], [5, 8], [8, 6], [12, 5]], dtype=np.float64)
+    assert points_in_polygon(points, polygon).tolist() == [True, False, True, False]
+
+
+def test_track_store_velocity_dwell_and_expiry():
+    """Moving tracks get a velocity, parked ones accumulate dwell, and stale tracks are forgotten"""
+    store = TrackStore(smoothing=1.0, stationary_speed=2.0, max_age_s=1.0)
+    for step in range(5):
+        state = store.update(step * 0.5, False, _frame([[10 * step, 0, 10 * step + 20, 40], [200, 200, 240, 260]], [1, 2]))
+    assert np.allclose(state.velocity[0], [20, 0]) and state.speed[1] == 0
+    assert state.dwell_s.tolist() == [0.0, 2.0] and state.age_s.tolist() == [2.0, 2.0]
+
+    # Track 1 leaves; many new tracks force the arrays to grow and reuse rows
+    for step in range(5, 10):
+        state = store.update(step * 0.5, False, _frame([[200, 200, 240, 260]] * 20, [2] + list(range(100 + step, 119 + step))))
+    assert 1 not in store._rows and 2 in store._rows and state.dwell_s[0] == 4.5
+
+
+def test_engine_runs_enabled_rules_once_per_vehicle():
+    """Red-light and parking rules read the same store and each reports a vehicle once"""
+    config = {'violation_rules': ['red_light_violation', 'illegal_parking'], 'line_y_threshold': 100,
+              'rule_params': {'illegal_parking': {'zones': [[(300, 0), (400, 0), (400, 200), (300, 200)]],
+                                                  'max_dwell_s': 3.0}}}
+    engine = RulesEngine.from_config(config)
+    events = []
+    for step in range(12):
+        frame = _frame([[0, 20 + 10 * step, 40, 60 + 10 * step], [320, 100, 360, 150]], [7, 8])
+        events += [(step, event['violation_type'], event['vehicle_id']) for event in engine.update(step * 0.5, step >= 2, frame)]
+
+    # The car crosses (bottom - 20) >= 100 at step 6, the parked car reaches 3 s at step 6
+    assert events == [(6, 'red_light_violation', 7), (6, 'illegal_parking', 8)]
+    assert engine.counts == {'red_light_violation': 1, 'illegal_parking': 1}
+    assert [rule.violation_type for rule in create_rules({})] == ['red_light_violation']
+    try:
+        create_rules({'violation_rules': ['jaywalking']})
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_engine_forgets_ended_tracks():
+    """A stream of short-lived tracks leaves no per-track state behind"""
+    config = {'violation_rules': ['red_light_violation', 'illegal_parking'], 'line_y_threshold': 80,
+              'track_store_max_age_s': 1.0,
+              'rule_params': {'illegal_parking': {'zones': [[(0, 0), (400, 0), (400, 400), (0, 400)]],
+                                                  'max_dwell_s': 0.5}}}
+    engine = RulesEngine.from_config(config)
+    red_rule, parking_rule = engine.rules
+    for vehicle in range(50):
+        for step in range(6):
+            engine.update(vehicle * 10 + step * 0.5, True, _frame([[0, 20 + 10 * step, 40, 60 + 10 * step]], [vehicle]))
+    assert engine.counts['red_light_violation'] == 50
+
+    assert len(engine.store) == 1
+    assert set(red_rule.monitor.object_y_hist) == {49} and red_rule.monitor.saved_ids == set(range(50))
+    assert all(len(history) <= 2 for history in red_rule.monitor.object_y_hist.values())
+    assert parking_rule.reported <= {49}
+
+    # A track revived after expiry is not reported again
+    for step in range(6):
+        engine.update(600 + step * 0.5, True, _frame([[0, 20 + 10 * step, 40, 60 + 10 * step]], [3]))
+    assert engine.counts['red_light_violation'] == 50
+
+    # Reported IDs are bounded, oldest first
+    monitor = StopLineMonitor(max_saved_ids=2)
+    for vehicle in range(3):
+        monitor.update(True, np.array([[0, 0, 10, 50]]), np.array([vehicle]), 80)
+        monitor.update(True, np.array([[0, 0, 10, 120]]), np.array([vehicle]), 80)
+    assert monitor.saved_ids == {1, 2}
+
+
+def test_detector_records_violation_types(make_detector, synthetic_clip):
+    """Enabling more rules leaves red-light results unchanged and tags each violation"""
+    config = {'frame_skip': 2, 'red_light_start_time': 2.0, 'warmup_iterations': 0, 'tracker': 'iou'}
+    expected = make_detector(dict(config)).process_video(synthetic_clip['path'])['total_violations']
+
+    detector = make_detector(dict(
+        config, violation_rules=['red_light_violation', 'illegal_parking'],
+        rule_params={'illegal_parking': {'zones': [[(0, 0), (100, 0), (100, 100), (0, 100)]]}}))
+    results = detector.process_video(synthetic_clip['path'])
+    assert results['total_violations'] == expected > 0
+    assert results['violations_by_type'] == {'red_light_violation': expected, 'illegal_parking': 0}
+    assert all(v['violation_type'] == 'red_light_violation' for v in detector.violations)
+
+
+def test_violations_flash_on_green(make_detector, work_dir):
+    """A violation raised while the light is green still gets its flash annotation"""
+    detector = make_detector({'warmup_iterations': 0, 'tracker': 'iou', 'flash_duration_frames': 2})
+    frame = np.full((360, 640, 3), 80, dtype=np.uint8)
+    frame[200:260, 100:200] = (0, 200, 255)
+
+    def update(timestamp, is_red, detections):
+        if detector.violations or not len(detections):
+            return []
+        return [{'vehicle_id': int(detections.ids[0]), 'index': 0, 'violation_type': 'illegal_parking',
+                 'details': {}}]
+    detector.rules.update = update
+
+    def flash_pixels(annotated):
+        return int(np.all(annotated == (0, 0, 255), axis=2).sum())
+
+    flashed, _ = detector.process_frame(frame, timestamp=0.0, is_red=False)
+    assert detector.violation_timers == {detector.violations[0]['vehicle_id']: 1}
+    plain, _ = detector.process_frame(frame, timestamp=0.1, is_red=False)
+    assert detector.violation_timers == {}
+    assert flash_pixels(flashed) > flash_pixels(plain)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
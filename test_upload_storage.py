@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for disk-backed upload handling
+"""
+
+import io
+import os
+import tempfile
+import time
+
+from upload_storage import (STATIC_URL, cleanup_stale_files, download_link, servable_inline, session_upload,
+                            static_url, too_large_notice)
+
+
+class _Upload(io.BytesIO):
+    """Stand-in for Streamlit's UploadedFile"""
+
+    def __init__(self, data: bytes, name: str, file_id: str):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+        self.file_id = file_id
+
+
+def test_upload_is_persisted_once_and_replaced():
+    """Reruns reuse the copy; a new upload deletes the previous copy"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        session = {}
+        first = _Upload(b'x' * 1000, 'clip.avi', 'a')
+        path = session_upload(session, first, directory=work_dir)
+        assert path.endswith('.avi')
+        assert open(path, 'rb').read() == b'x' * 1000
+        assert session_upload(session, first, directory=work_dir) == path
+
+        replacement = session_upload(session, _Upload(b'y', 'clip.mp4', 'b'), directory=work_dir)
+        assert replacement != path
+        assert not os.path.exists(path)
+        assert os.listdir(work_dir) == [os.path.basename(replacement)]
+
+
+def test_cleanup_stale_files():
+    """Only files older than the cutoff are removed"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        old, new = os.path.join(work_dir, 'old.mp4'), os.path.join(work_dir, 'new.mp4')
+        for path in (old, new):
+            open(path, 'wb').close()
+        stale = time.time() - 48 * 3600
+        os.utime(old, (stale, stale))
+        assert cleanup_stale_files(work_dir, max_age_hours=24) == 1
+        assert os.listdir(work_dir) == ['new.mp4']
+
+
+def test_servable_inline_caps_file_size():
+    """Files above the cap, and missing files, are not handed to the browser"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, 'out.mp4')
+        with open(path, 'wb') as f:
+            f.write(b'x' * 2048)
+        assert servable_inline(path, max_bytes=2048)
+        assert not servable_inline(path, max_bytes=1024)
+        assert not servable_inline(os.path.join(work_dir, 'missing.mp4'))
+        assert 'out.mp4' in too_large_notice(path, max_bytes=1024)
+
+
+def test_large_files_are_published_as_static_links():
+    """Large outputs get a static download link that reruns reuse and the sweep keeps while linked"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        static_dir = os.path.join(work_dir, 'static')
+        path = os.path.join(work_dir, 'out.mp4')
+        with open(path, 'wb') as f:
+            f.write(b'x' * 2048)
+        url = static_url(path, static_dir)
+        assert url.startswith(STATIC_URL + '/') and url.endswith('_out.mp4')
+        assert static_url(path, static_dir) == url and len(os.listdir(static_dir)) == 1
+        link_path = os.path.join(static_dir, os.listdir(static_dir)[0])
+        assert open(link_path, 'rb').read() == b'x' * 2048
+        assert 'download="annotated.mp4"' in download_link(path, 'Download', 'annotated.mp4', static_dir)
+
+        stale = time.time() - 48 * 3600
+        os.utime(path, (stale, stale))
+        assert cleanup_stale_files(static_dir, max_age_hours=24, keep_linked=True) == 0
+        os.remove(path)
+        assert cleanup_stale_files(static_dir, max_age_hours=24, keep_linked=True) == 1
+
+
+if __name__ == "__main__":
+    test_upload_is_persisted_once_and_replaced()
+    test_cleanup_stale_files()
+    test_servable_inline_caps_file_size()
+    test_large_files_are_published_as_static_links()
+    print("✅ Upload storage tests passed!")
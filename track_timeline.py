@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Track timeline and offline re-scoring
+
+A TrackTimeline records, for every processed frame, the frame number,
+video timestamp, signal state and each detection's track ID, box and class.
+It is saved as flat columns in a compressed .npz. rescore() replays a
+timeline through the same stop-line logic process_frame uses, so violations
+and statistics for any stop-line or signal timing can be recomputed in
+seconds, without the video decoder or the model.
+"""
+
+import os
+import json
+import argparse
+import logging
+from collections import defaultdict, deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cv2 as cv
+import numpy as np
+
+from detector_backends import Detections
+from evidence import extract_evidence
+
+logger = logging.getLogger(__name__)
+
+TIMELINE_VERSION = 1
+
+# Detector box bottoms are offset by this many pixels before the line test
+BOTTOM_OFFSET = 20
+
+
+class StopLineMonitor:
+    """
+    Red-light stop-line crossing logic, independent of video and model
+
+    A tracked vehicle violates when its box bottom moves from above to at or
+    below the stop line between two red-light observations. Each vehicle is
+    reported once. Only the last two observations per vehicle are kept, and
+    forget() drops the history of tracks that have ended. Reported IDs
+    survive forget(), so a revived track is not reported twice and rescore(),
+    which never forgets, agrees with the live count; past max_saved_ids the
+    oldest are dropped.
+    """
+
+    def __init__(self, max_saved_ids: int = 100000):
+        self.object_y_hist = defaultdict(list)
+        self.saved_ids = set()
+        self.max_saved_ids = max_saved_ids
+        self._saved_order = deque()
+
+    def update(self, is_red: bool, xyxy: np.ndarray, ids: Optional[np.ndarray],
+               line_y_threshold: float) -> List[int]:
+        """
+        Feed one frame of tracked detections
+
+        Args:
+            is_red: Whether the light is red in this frame
+            xyxy: (N, 4) boxes in working-resolution pixels
+            ids: (N,) track IDs, or None for untracked detections
+            line_y_threshold: Stop line y coordinate
+
+        Returns:
+            List[int]: Indices of the detections that just violated
+        """
+        if not is_red or ids is None:
+            return []
+
+        violators = []
+        for i, (bbox, vehicle_id) in enumerate(zip(xyxy, ids)):
+            vehicle_id = int(vehicle_id)
+            history = self.object_y_hist[vehicle_id]
+            history.append(int(bbox[3]) - BOTTOM_OFFSET)
+            del history[:-2]
+            if (len(history) >= 2 and history[-2] < line_y_threshold <= history[-1]
+                    and vehicle_id not in self.saved_ids):
+                self.saved_ids.add(vehicle_id)
+                self._saved_order.append(vehicle_id)
+                if len(self._saved_order) > self.max_saved_ids:
+                    self.saved_ids.discard(self._saved_order.popleft())
+                violators.append(i)
+        return violators
+
+    def forget(self, ids):
+        """Drop the history of tracks that have ended; they stay reported"""
+        for vehicle_id in ids:
+            self.object_y_hist.pop(int(vehicle_id), None)
+
+
+class TrackTimeline:
+    """
+    Per-frame track records for one processed video
+    """
+
+    def __init__(self, metadata: Dict = None, max_frames: Optional[int] = None):
+        """
+        Create an empty timeline
+
+        Args:
+            metadata: Free-form run details (video path, fps, resolution, ...)
+            max_frames: Keep only the most recent frames (live streams); None keeps all
+        """
+        self.metadata = metadata or {}
+        self.max_frames = max_frames
+        self.frames = deque(maxlen=max_frames)
+        self.times = deque(maxlen=max_frames)
+        self.is_red = deque(maxlen=max_frames)
+        self._detections = deque(maxlen=max_frames)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def append(self, frame_number: int, time_s: float, is_red: bool, detections: Detections):
+        """
+        Record one processed frame
+
+        Args:
+            frame_number: 1-based frame number in the video
+            time_s: Video timestamp in seconds
+            is_red: Signal state used for this frame
+            detections: Detections with track IDs when tracking was on
+        """
+        self.frames.append(frame_number)
+        self.times.append(time_s)
+        self.is_red.append(is_red)
+        self._detections.append(Detections(detections.xyxy, detections.conf,
+                                           detections.cls, ids=detections.ids))
+
+    def iter_frames(self) -> Iterator[Tuple[int, float, bool, Detections]]:
+        """Yield (frame_number, time_s, is_red, detections) in order"""
+        return zip(self.frames, self.times, self.is_red, self._detections)
+
+    def save(self, path: str) -> str:
+        """
+        Write the timeline as a compressed .npz
+
+        Args:
+            path: Output path
+
+        Returns:
+            str: Path written
+        """
+        detections = self._detections
+        offsets = np.zeros(len(detections) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(d) for d in detections])
+
+        def column(parts, shape, dtype):
+            return np.concatenate(parts).astype(dtype) if parts else np.zeros(shape, dtype)
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                version=np.int32(TIMELINE_VERSION),
+                metadata=np.array(json.dumps(self.metadata, default=list)),
+                frames=np.asarray(self.frames, dtype=np.int32),
+                times=np.asarray(self.times, dtype=np.float64),
+                is_red=np.asarray(self.is_red, dtype=bool),
+                offsets=offsets,
+                has_ids=np.asarray([d.ids is not None for d in detections], dtype=bool),
+                ids=column([d.ids if d.ids is not None else np.full(len(d), -1) for d in detections],
+                           (0,), np.int64),
+                xyxy=column([d.xyxy for d in detections], (0, 4), np.float32),
+                cls=column([d.cls for d in detections], (0,), np.int16),
+                conf=column([d.conf for d in detections], (0,), np.float16),
+            )
+        logger.info(f"Track timeline saved: {path} ({len(self)} frames, {offsets[-1]} detections)")
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> 'TrackTimeline':
+        """
+        Read a timeline written by save()
+
+        Args:
+            path: Timeline path
+
+        Returns:
+            TrackTimeline: Loaded timeline
+        """
+        with np.load(path) as data:
+            if int(data['version']) != TIMELINE_VERSION:
+                raise ValueError(f"Unsupported track timeline version in {path}")
+            timeline = cls(json.loads(str(data['metadata'])))
+            offsets = data['offsets']
+            has_ids = data['has_ids']
+            xyxy, conf, class_ids, ids = data['xyxy'], data['conf'], data['cls'], data['ids']
+            timeline.frames = data['frames'].tolist()
+            timeline.times = data['times'].tolist()
+            timeline.is_red = data['is_red'].tolist()
+        for i in range(len(timeline.frames)):
+            rows = slice(offsets[i], offsets[i + 1])
+            timeline._detections.append(Detections(xyxy[rows], conf[rows], class_ids[rows],
+                                                   ids=ids[rows] if has_ids[i] else None))
+        return timeline
+
+
+def rescore(tracks, config: Dict) -> Dict:
+    """
+    Recompute violations and statistics from a track timeline
+
+    The signal state is recomputed from each frame's timestamp when the
+    config has 'red_light_start_time', and taken from the timeline otherwise.
+
+    Args:
+        tracks: TrackTimeline or path to a saved timeline
+        config: Detector configuration ('line_y_threshold', 'red_light_start_time')
+
+    Returns:
+        Dict: Violations (frame, time, bbox and class for each snapshot) and statistics
+    """
+    if isinstance(tracks, str):
+        tracks = TrackTimeline.load(tracks)
+
+    line_y_threshold = config.get('line_y_threshold', 310)
+    red_light_start_time = config.get('red_light_start_time')
+    monitor = StopLineMonitor()
+    violations = []
+    red_frames = 0
+    max_active = 0
+
+    for frame_number, time_s, is_red, detections in tracks.iter_frames():
+        if red_light_start_time is not None:
+            is_red = time_s > red_light_start_time
+        if is_red:
+            red_frames += 1
+            max_active = max(max_active, len(detections))
+        for i in monitor.update(is_red, detections.xyxy, detections.ids, line_y_threshold):
+            violations.append({
+                'vehicle_id': int(detections.ids[i]),
+                'frame_number': int(frame_number),
+                'time': float(time_s),
+                'bbox': detections.xyxy[i].tolist(),
+                'class_id': int(detections.cls[i])
+            })
+
+    return {
+        'total_violations': len(violations),
+        'violations': violations,
+        'processed_frames': len(tracks),
+        'red_light_frames': red_frames,
+        'tracked_vehicles': len(monitor.object_y_hist),
+        'max_active_vehicles': max_active,
+        'config': {'line_y_threshold': line_y_threshold, 'red_light_start_time': red_light_start_time}
+    }
+
+
+def render_snapshots(video_path: str, violations: List[Dict], save_path: str,
+                     output_resolution: Tuple[int, int] = (854, 480), padding: int = 20) -> List[str]:
+    """
+    Crop violation snapshots for re-scored violations
+
+    Seeks only to the violating frames, so it stays cheap next to a full run.
+    Snapshots are cut from the source frames at full resolution.
+
+    Args:
+        video_path: Source video of the timeline
+        violations: Violations from rescore()
+        save_path: Directory for the snapshots
+        output_resolution: Working resolution the boxes are in
+        padding: Pixels of context around each box
+
+    Returns:
+        List[str]: Snapshot paths; each violation gets an 'image_path'
+    """
+    os.makedirs(save_path, exist_ok=True)
+    cap = cv.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video: {video_path}")
+
+    paths = []
+    try:
+        for violation in sorted(violations, key=lambda v: v['frame_number']):
+            cap.set(cv.CAP_PROP_POS_FRAMES, violation['frame_number'] - 1)
+            ret, frame = cap.read()
+            if not ret:
+                logger.warning(f"Could not read frame {violation['frame_number']}")
+                continue
+            # Cut from the decoded frame, so snapshots keep source resolution
+            crop, violation['source_bbox'] = extract_evidence(frame, violation['bbox'], tuple(output_resolution),
+                                                              padding)
+            path = os.path.join(save_path, f"violation_{violation['vehicle_id']}_f{violation['frame_number']}.jpg")
+            cv.imwrite(path, crop)
+            violation['image_path'] = path
+            paths.append(path)
+    finally:
+        cap.release()
+    return paths
+
+
+def main():
+    """Command-line entry point"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Re-score violations from a saved track timeline")
+    parser.add_argument('timeline', help="Track timeline (.npz) saved by process_video")
+    parser.add_argument('--line-y', type=float, action='append',
+                        help="Stop line y coordinate (repeat to compare several)")
+    parser.add_argument('--red-start', type=float, help="Red light start time in seconds")
+    parser.add_argument('--video', help="Source video, to crop snapshots for the violations")
+    parser.add_argument('--snapshot-dir', default=os.path.join('violations', 'rescored'))
+    args = parser.parse_args()
+
+    timeline = TrackTimeline.load(args.timeline)
+    for line_y in args.line_y or [timeline.metadata.get('line_y_threshold', 310)]:
+        config = {'line_y_threshold': line_y}
+        if args.red_start is not None:
+            config['red_light_start_time'] = args.red_start
+        result = rescore(timeline, config)
+        print(f"🚦 line_y={line_y}: {result['total_violations']} violations "
+              f"over {result['processed_frames']} frames")
+        if args.video:
+            render_snapshots(args.video, result['violations'],
+                             os.path.join(args.snapshot_dir, f"line_{line_y:g}"),
+                             timeline.metadata.get('output_resolution', (854, 480)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Disk-backed upload and download handling for the Streamlit apps
+
+Uploads are copied to disk in fixed-size chunks instead of through
+getvalue(), persisted once per upload rather than on every rerun, and the
+previous file for a session slot is removed when it is replaced. Streamlit
+reads a file handed to st.video or st.download_button fully into server
+memory, so only files up to MAX_INLINE_BYTES are served that way. Larger
+ones are linked into the app's static folder and downloaded from there;
+Streamlit's static file handler streams them from disk. Files left behind
+by ended sessions are swept by age.
+"""
+
+import os
+import html
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+from typing import Dict, MutableMapping, Optional
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = os.path.join(tempfile.gettempdir(), 'rlvd_uploads')
+CHUNK_SIZE = 8 * 1024 * 1024
+MAX_INLINE_BYTES = 200 * 1024 * 1024
+# Served at STATIC_URL when the server runs with enableStaticServing (.streamlit/config.toml)
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'downloads')
+STATIC_URL = 'app/static/downloads'
+
+
+def persist_upload(uploaded_file, directory: str = UPLOAD_DIR, chunk_size: int = CHUNK_SIZE) -> str:
+    """
+    Copy an uploaded file to disk chunk by chunk
+
+    Args:
+        uploaded_file: File-like upload (Streamlit UploadedFile)
+        directory: Directory for the copy
+        chunk_size: Bytes copied per chunk
+
+    Returns:
+        str: Path of the copy
+    """
+    os.makedirs(directory, exist_ok=True)
+    suffix = os.path.splitext(getattr(uploaded_file, 'name', '') or '')[1] or '.mp4'
+    uploaded_file.seek(0)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=directory) as tmp_file:
+        shutil.copyfileobj(uploaded_file, tmp_file, chunk_size)
+    return tmp_file.name
+
+
+def remove_file(path: Optional[str]):
+    """Delete a file if it exists"""
+    if not path:
+        return
+    try:
+        os.remove(path)
+        logger.info(f"🧹 Removed {path}")
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not remove {path}: {e}")
+
+
+def replace_session_file(session_state: MutableMapping, key: str, path: str) -> str:
+    """
+    Store a file path in a session slot, deleting the file it replaces
+
+    Args:
+        session_state: Streamlit session state (or any mapping)
+        key: Slot name
+        path: New file path
+
+    Returns:
+        str: The new path
+    """
+    previous = session_state.get(key)
+    if previous and previous != path:
+        remove_file(previous)
+    session_state[key] = path
+    return path
+
+
+def session_upload(session_state: MutableMapping, uploaded_file, key: str = 'original_video_path',
+                   directory: str = UPLOAD_DIR) -> str:
+    """
+    Persist an upload once, reusing the copy across Streamlit reruns
+
+    Args:
+        session_state: Streamlit session state
+        uploaded_file: Streamlit UploadedFile
+        key: Session slot holding the copy's path
+        directory: Directory for the copy
+
+    Returns:
+        str: Path of the copy on disk
+    """
+    upload_id = getattr(uploaded_file, 'file_id', None) or f"{uploaded_file.name}:{uploaded_file.size}"
+    path = session_state.get(key)
+    if session_state.get(f'{key}_upload_id') == upload_id and path and os.path.exists(path):
+        return path
+
+    path = replace_session_file(session_state, key, persist_upload(uploaded_file, directory))
+    session_state[f'{key}_upload_id'] = upload_id
+    return path
+
+
+def servable_inline(path: str, max_bytes: int = MAX_INLINE_BYTES) -> bool:
+    """
+    Whether a file is small enough to hand to st.video or st.download_button
+
+    Args:
+        path: File on disk
+        max_bytes: Largest file read into server memory
+
+    Returns:
+        bool: True if the file exists and is at most max_bytes
+    """
+    try:
+        return os.path.getsize(path) <= max_bytes
+    except OSError:
+        return False
+
+
+def too_large_notice(path: str, max_bytes: int = MAX_INLINE_BYTES) -> str:
+    """Message shown instead of a player for a large file"""
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    return (f"📁 {os.path.basename(path)} is {size_mb:,.0f} MB, above the {max_bytes // (1024 * 1024)} MB "
+            f"in-browser playback limit. Use the download link instead.")
+
+
+def static_url(path: str, directory: str = STATIC_DIR) -> str:
+    """
+    Publish a file through Streamlit's static file serving
+
+    The file is hard-linked (or copied, across file systems) into the static
+    folder under a name derived from its path, size and modification time,
+    so reruns reuse the same link and the name cannot be guessed from the
+    file name alone.
+
+    Args:
+        path: File on disk
+        directory: Static download folder
+
+    Returns:
+        str: URL the browser can fetch the file from
+    """
+    stat = os.stat(path)
+    key = f"{os.path.realpath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    name = f"{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}_{os.path.basename(path)}"
+    link_path = os.path.join(directory, name)
+    if not os.path.exists(link_path):
+        os.makedirs(directory, exist_ok=True)
+        try:
+            os.link(path, link_path)
+        except OSError:
+            shutil.copyfile(path, link_path)
+    return f"{STATIC_URL}/{name}"
+
+
+def download_link(path: str, label: str, file_name: Optional[str] = None, directory: str = STATIC_DIR) -> str:
+    """HTML link that downloads a file from the static folder instead of through server memory"""
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    return (f'<a href="{html.escape(static_url(path, directory))}" download="{html.escape(file_name or os.path.basename(path))}">'
+            f'{html.escape(label)}</a> ({size_mb:,.0f} MB)')
+
+
+def write_json_file(data: Dict, path: str) -> str:
+    """
+    Write JSON incrementally to a file instead of building the string in memory
+
+    Args:
+        data: JSON-serializable data
+        path: Output path
+
+    Returns:
+        str: Path written
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+    return path
+
+
+def cleanup_stale_files(directory: str = UPLOAD_DIR, max_age_hours: float = 24, keep_linked: bool = False) -> int:
+    """
+    Delete files older than max_age_hours, left by sessions that ended
+
+    Args:
+        directory: Directory to sweep
+        max_age_hours: Age after which files are removed
+        keep_linked: Keep files that are still hard-linked elsewhere, such as
+            static download links whose source still exists
+
+    Returns:
+        int: Number of files removed
+    """
+    if not os.path.isdir(directory):
+        return 0
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+            if keep_linked and stat.st_nlink > 1:
+                continue
+            if os.path.isfile(path) and stat.st_mtime < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            continue
+    if removed:
+        logger.info(f"🧹 Removed {removed} stale file(s) from {directory}")
+    return removed
@@ -4,16 +4,17 @@ Utility functions for Red Light Violation Detection System
 
 import os
 import json
-import pandas as pd
 import numpy as np
 import cv2
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-import seaborn as sns
-from typing import Dict, List, Tuple, Optional
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional
+from chart_renderer import ChartRenderer
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+# pandas and plotly are imported inside the functions that use them, so that
+# processes which only need video validation or system info start quickly.
 
 def load_violation_data(results_file: str = 'detection_results.json') -> Dict:
     """
@@ -48,6 +49,8 @@ def create_violation_summary(violations: List[Dict]) -> Dict:
     if not violations:
         return {}
     
+    import pandas as pd
+    
     # Convert to DataFrame for easier analysis
     df = pd.DataFrame(violations)
     
@@ -70,13 +73,19 @@ def create_violation_summary(violations: List[Dict]) -> Dict:
     
     return summary
 
-def generate_violation_charts(violations: List[Dict], save_path: str = 'charts') -> List[str]:
+def generate_violation_charts(violations: List[Dict], save_path: str = 'charts',
+                              dpi='print', formats: tuple = ('png',),
+                              thumbnails: bool = False, parallel: bool = True) -> List[str]:
     """
     Generate visualization charts for violations
     
     Args:
         violations: List of violation dictionaries
         save_path: Directory to save charts
+        dpi: DPI preset name ('thumbnail', 'draft', 'screen', 'print') or explicit DPI
+        formats: Output formats ('png' and/or 'svg')
+        thumbnails: Also write a small PNG thumbnail per chart
+        parallel: Render charts in worker processes
         
     Returns:
         List[str]: Paths to saved chart files
@@ -84,64 +93,58 @@ def generate_violation_charts(violations: List[Dict], save_path: str = 'charts')
     if not violations:
         return []
     
-    os.makedirs(save_path, exist_ok=True)
+    import pandas as pd
+    
     df = pd.DataFrame(violations)
     df['datetime'] = pd.to_datetime(df['datetime'])
     df['date'] = df['datetime'].dt.date
     df['hour'] = df['datetime'].dt.hour
     
-    chart_paths = []
-    
     # 1. Hourly violation distribution
-    plt.figure(figsize=(12, 6))
     hourly_counts = df['hour'].value_counts().sort_index()
-    plt.bar(hourly_counts.index, hourly_counts.values, color='red', alpha=0.7)
-    plt.title('Violations by Hour of Day', fontsize=16, fontweight='bold')
-    plt.xlabel('Hour of Day')
-    plt.ylabel('Number of Violations')
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    
-    hourly_chart_path = os.path.join(save_path, 'hourly_violations.png')
-    plt.savefig(hourly_chart_path, dpi=300, bbox_inches='tight')
-    plt.close()
-    chart_paths.append(hourly_chart_path)
-    
     # 2. Daily violation trend
-    plt.figure(figsize=(12, 6))
     daily_counts = df['date'].value_counts().sort_index()
-    plt.plot(daily_counts.index, daily_counts.values, marker='o', linewidth=2, markersize=6)
-    plt.title('Daily Violation Trend', fontsize=16, fontweight='bold')
-    plt.xlabel('Date')
-    plt.ylabel('Number of Violations')
-    plt.xticks(rotation=45)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    
-    daily_chart_path = os.path.join(save_path, 'daily_trend.png')
-    plt.savefig(daily_chart_path, dpi=300, bbox_inches='tight')
-    plt.close()
-    chart_paths.append(daily_chart_path)
-    
     # 3. Vehicle violation frequency
-    plt.figure(figsize=(12, 6))
     vehicle_counts = df['vehicle_id'].value_counts().head(20)
-    plt.barh(range(len(vehicle_counts)), vehicle_counts.values, color='orange', alpha=0.7)
-    plt.yticks(range(len(vehicle_counts)), [f'Vehicle {vid}' for vid in vehicle_counts.index])
-    plt.title('Top 20 Vehicles by Violation Count', fontsize=16, fontweight='bold')
-    plt.xlabel('Number of Violations')
-    plt.gca().invert_yaxis()
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    
-    vehicle_chart_path = os.path.join(save_path, 'vehicle_frequency.png')
-    plt.savefig(vehicle_chart_path, dpi=300, bbox_inches='tight')
-    plt.close()
-    chart_paths.append(vehicle_chart_path)
-    
-    return chart_paths
+    
+    specs = [
+        {
+            'name': 'hourly_violations',
+            'kind': 'bar',
+            'x': [int(h) for h in hourly_counts.index],
+            'y': [int(v) for v in hourly_counts.values],
+            'color': 'red',
+            'title': 'Violations by Hour of Day',
+            'xlabel': 'Hour of Day',
+            'ylabel': 'Number of Violations'
+        },
+        {
+            'name': 'daily_trend',
+            'kind': 'line',
+            'x': [d.isoformat() for d in daily_counts.index],
+            'x_is_date': True,
+            'y': [int(v) for v in daily_counts.values],
+            'title': 'Daily Violation Trend',
+            'xlabel': 'Date',
+            'ylabel': 'Number of Violations',
+            'xtick_rotation': 45
+        },
+        {
+            'name': 'vehicle_frequency',
+            'kind': 'barh',
+            'x': [f'Vehicle {vid}' for vid in vehicle_counts.index],
+            'y': [int(v) for v in vehicle_counts.values],
+            'color': 'orange',
+            'title': 'Top 20 Vehicles by Violation Count',
+            'xlabel': 'Number of Violations'
+        }
+    ]
+    
+    renderer = ChartRenderer(save_path=save_path, dpi=dpi, formats=formats,
+                             thumbnails=thumbnails, parallel=parallel)
+    return renderer.render(specs)
 
-def create_interactive_dashboard(violations: List[Dict]) -> go.Figure:
+def create_interactive_dashboard(violations: List[Dict]) -> 'go.Figure':
     """
     Create interactive Plotly dashboard
     
@@ -151,9 +154,14 @@ def create_interactive_dashboard(violations: List[Dict]) -> go.Figure:
     Returns:
         go.Figure: Interactive dashboard figure
     """
+    import plotly.graph_objects as go
+    
     if not violations:
         return go.Figure()
     
+    import pandas as pd
+    from plotly.subplots import make_subplots
+    
     df = pd.DataFrame(violations)
     df['datetime'] = pd.to_datetime(df['datetime'])
     df['date'] = df['datetime'].dt.date
@@ -236,6 +244,17 @@ def analyze_video_performance(results: Dict) -> Dict:
         'detection_rate': total_violations / max(total_frames, 1) * 100
     }
     
+    # Report cold-start cost separately from steady-state throughput
+    startup = results.get('startup') or {}
+    if startup:
+        performance['model_load_time_seconds'] = startup.get('model_load_time') or 0.0
+        performance['warmup_time_seconds'] = startup.get('warmup_time') or 0.0
+    
+    frame_latency = results.get('steady_state_frame_latency') or {}
+    if frame_latency.get('frames'):
+        performance['steady_state_latency_ms'] = frame_latency['mean_ms']
+        performance['steady_state_processed_fps'] = 1000.0 / frame_latency['mean_ms'] if frame_latency['mean_ms'] > 0 else 0.0
+    
     return performance
 
 def export_violation_report(violations: List[Dict], output_file: str = 'violation_report.csv') -> str:
@@ -252,6 +271,8 @@ def export_violation_report(violations: List[Dict], output_file: str = 'violatio
     if not violations:
         return ""
     
+    import pandas as pd
+    
     df = pd.DataFrame(violations)
     
     # Add additional columns